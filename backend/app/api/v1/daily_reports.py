@@ -6,15 +6,19 @@ Handles operator daily report submissions and management
 from typing import List, Optional
 from datetime import datetime, date
 from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func
+from sqlalchemy import and_, desc, func, select
 from pydantic import BaseModel, Field
 
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db
+from app.core.exports import EXPORT_FORMATS
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.daily_report import DailyReport, OperatorProfile
 from app.models.equipment import Equipment
+from app.api.v1.reports.ledger import FinancialLedgerService
+from app.api.v1.reports.maintenance import MaintenanceForecastService
 
 router = APIRouter()
 
@@ -157,6 +161,77 @@ def can_access_report(report: DailyReport, current_user: User) -> bool:
     return False
 
 
+def filter_reports(statement, date_from: Optional[date], date_to: Optional[date], status: Optional[str]):
+    """Apply the report list filters to a query or select statement"""
+    if date_from:
+        statement = statement.filter(DailyReport.report_date >= date_from)
+    if date_to:
+        statement = statement.filter(DailyReport.report_date <= date_to)
+    if status:
+        statement = statement.filter(DailyReport.status == status)
+    return statement
+
+
+# Columns of report exports, as (header, model column)
+REPORT_EXPORT_COLUMNS = [
+    ("Report ID", DailyReport.id),
+    ("Report Date", DailyReport.report_date),
+    ("Operator ID", DailyReport.operator_id),
+    ("Operator", DailyReport.operator_name),
+    ("Equipment ID", DailyReport.equipment_id),
+    ("Equipment Code", DailyReport.equipment_code),
+    ("Equipment", DailyReport.equipment_name),
+    ("Project", DailyReport.project_name),
+    ("Site", DailyReport.site_location),
+    ("Work Zone", DailyReport.work_zone),
+    ("Shift Start", DailyReport.shift_start),
+    ("Shift End", DailyReport.shift_end),
+    ("Initial Hourmeter", DailyReport.initial_hourmeter),
+    ("Final Hourmeter", DailyReport.final_hourmeter),
+    ("Hours Worked", DailyReport.hours_worked),
+    ("Initial Odometer", DailyReport.initial_odometer),
+    ("Final Odometer", DailyReport.final_odometer),
+    ("Distance Traveled", DailyReport.distance_traveled),
+    ("Initial Fuel Level", DailyReport.initial_fuel_level),
+    ("Final Fuel Level", DailyReport.final_fuel_level),
+    ("Fuel Consumed", DailyReport.fuel_consumed),
+    ("Maintenance Needed", DailyReport.maintenance_needed),
+    ("Status", DailyReport.status),
+    ("Submitted At", DailyReport.submitted_at),
+    ("Approved By", DailyReport.approved_by),
+    ("Approved At", DailyReport.approved_at)
+]
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = 2000
+
+
+def iter_report_export_rows(
+    operator_id: Optional[int],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    status: Optional[str]
+):
+    """
+    Batches of export rows read through a server-side cursor.
+    
+    Uses its own session since rows are produced while the response streams.
+    """
+    statement = select(*(column for _, column in REPORT_EXPORT_COLUMNS))
+    if operator_id is not None:
+        statement = statement.filter(DailyReport.operator_id == operator_id)
+    statement = filter_reports(statement, date_from, date_to, status)
+    statement = statement.order_by(desc(DailyReport.report_date), desc(DailyReport.id))
+    
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=EXPORT_FETCH_SIZE))
+        for rows in result.partitions():
+            yield [tuple(row) for row in rows]
+    finally:
+        db.close()
+
+
 # API Endpoints
 
 @router.get("/profile", response_model=OperatorProfileResponse)
@@ -181,13 +256,7 @@ async def get_my_reports(
 ):
     """Get current operator's daily reports"""
     query = db.query(DailyReport).filter(DailyReport.operator_id == current_user.id)
-    
-    if date_from:
-        query = query.filter(DailyReport.report_date >= date_from)
-    if date_to:
-        query = query.filter(DailyReport.report_date <= date_to)
-    if status:
-        query = query.filter(DailyReport.status == status)
+    query = filter_reports(query, date_from, date_to, status)
     
     query = query.order_by(desc(DailyReport.report_date))
     reports = query.offset(offset).limit(limit).all()
@@ -195,6 +264,38 @@ async def get_my_reports(
     return reports
 
 
+@router.get("/reports/export/{export_format}")
+async def export_reports(
+    export_format: str,
+    date_from: Optional[date] = Query(None, description="Filter reports from this date"),
+    date_to: Optional[date] = Query(None, description="Filter reports to this date"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export daily reports as CSV or Excel (xlsx)
+    
+    Same filters as the report list, without paging. Operators export their
+    own reports; supervisors and admins export everyone's. Rows stream from a
+    server-side cursor, so memory stays flat for any number of reports.
+    """
+    export = EXPORT_FORMATS.get(export_format.lower())
+    if export is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid export format. Must be one of: {list(EXPORT_FORMATS)}"
+        )
+    
+    operator_id = None if current_user.has_role("supervisor") or current_user.has_role("admin") else current_user.id
+    rows = iter_report_export_rows(operator_id, date_from, date_to, status)
+    file_name = f"daily_reports_{datetime.now().strftime('%Y%m%d')}.{export_format.lower()}"
+    return StreamingResponse(
+        export.encode([header for header, _ in REPORT_EXPORT_COLUMNS], rows, "Daily Reports"),
+        media_type=export.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
+
+
 @router.get("/reports/{report_id}", response_model=DailyReportResponse)
 async def get_report(
     report_id: int,
@@ -334,6 +435,38 @@ async def submit_report(
     return {"message": "Report submitted successfully"}
 
 
+@router.post("/reports/{report_id}/approve")
+async def approve_report(
+    report_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Approve a submitted report, post it to the financial ledger and fit its hourmeter reading"""
+    report = db.query(DailyReport).filter(DailyReport.id == report_id).first()
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    if not (current_user.has_role("supervisor") or current_user.has_role("admin")):
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    if report.status != "submitted":
+        raise HTTPException(status_code=400, detail="Report is not in submitted status")
+    
+    report.status = "approved"
+    report.approved_by = current_user.id
+    report.approved_at = func.now()
+    report.rejection_reason = None
+    db.flush()
+    
+    # Posted in the same transaction so the ledger never misses or double counts an approval
+    FinancialLedgerService(db).post_reports([report.id])
+    MaintenanceForecastService(db).fit_reports([report.id])
+    
+    db.commit()
+    
+    return {"message": "Report approved successfully"}
+
+
 @router.delete("/reports/{report_id}")
 async def delete_report(
     report_id: int,
@@ -7,6 +7,7 @@ import math
 
 from app.core.database import get_db
 from app.models.equipment import Equipment
+from app.api.v1.scheduling.cache import invalidate_equipment
 from .schemas import (
     EquipmentCreate, EquipmentUpdate, EquipmentResponse,
     EquipmentListResponse,
@@ -179,6 +180,8 @@ async def update_equipment(
     
     db.commit()
     db.refresh(equipment)
+    # Scheduling caches carry the equipment name
+    invalidate_equipment(equipment_id)
     
     return equipment
 
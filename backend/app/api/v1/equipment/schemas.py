@@ -71,6 +71,7 @@ class EquipmentUpdate(BaseModel):
     odometer_reading: Optional[int] = Field(None, ge=0)
     specifications: Optional[Dict[str, Any]] = None
     notes: Optional[str] = None
+    working_calendar_id: Optional[int] = Field(None, gt=0, description="Working calendar (default: company calendar)")
 
 
 class EquipmentResponse(EquipmentBase):
@@ -83,6 +84,7 @@ class EquipmentResponse(EquipmentBase):
     odometer_reading: Optional[int] = Field(default=None, description="Odometer reading (for vehicles)")
     images: List[str] = Field(default_factory=list, description="Equipment images")
     is_active: bool
+    working_calendar_id: Optional[int] = Field(default=None, description="Working calendar ID")
     created_at: datetime
     updated_at: datetime
     
@@ -0,0 +1,255 @@
+"""
+Report builders
+Turn a ReportRequest into a titled table of rows that the file writers can render
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.api.v1.reports.ledger import FinancialLedgerService
+from app.api.v1.reports.maintenance import DUE_LATER_DAYS, MaintenanceForecastService
+from app.api.v1.reports.schemas import ReportRequest
+from app.api.v1.reports.service import FLEET_SQL, ReportsService, report_window
+
+# Days covered when a request gives no date_from
+DEFAULT_PERIOD_DAYS = 30
+
+# Longest period a report may cover
+MAX_PERIOD_DAYS = 3650
+
+# Maintenance schedule rows are listed most urgent first
+_PRIORITY_ORDER = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+
+@dataclass
+class ReportTable:
+    """Rendered content of a report: a header block plus one table"""
+    title: str
+    period: str
+    columns: List[str]
+    rows: Sequence[Sequence[Any]]
+    summary: List[Tuple[str, Any]] = field(default_factory=list)
+
+
+def report_period(request: ReportRequest) -> Tuple[int, date]:
+    """
+    Number of days and last day covered by a request.
+
+    date_to defaults to today and date_from to DEFAULT_PERIOD_DAYS before it.
+
+    Raises:
+        ValueError: If the period is empty or longer than MAX_PERIOD_DAYS
+    """
+    end_day = request.date_to.date() if request.date_to else datetime.now(timezone.utc).date()
+    start_day = (
+        request.date_from.date() if request.date_from
+        else end_day - timedelta(days=DEFAULT_PERIOD_DAYS - 1)
+    )
+    date_range = (end_day - start_day).days + 1
+    if date_range < 1:
+        raise ValueError("date_from must not be after date_to")
+    if date_range > MAX_PERIOD_DAYS:
+        raise ValueError(f"Reports can cover at most {MAX_PERIOD_DAYS} days")
+    return date_range, end_day
+
+
+def _company_id(request: ReportRequest) -> Optional[int]:
+    value = (request.filters or {}).get('company_id')
+    return int(value) if value is not None else None
+
+
+def _period_label(date_range: int, end_day: date) -> str:
+    start, _ = report_window(date_range, end_day)
+    return f"{start.date().isoformat()} to {end_day.isoformat()}"
+
+
+def build_performance_analytics(db: Session, request: ReportRequest) -> ReportTable:
+    """Per-equipment utilization, costs and ROI"""
+    date_range, end_day = report_period(request)
+    performance = ReportsService(db).get_equipment_performance(
+        date_range, request.equipment_filter, _company_id(request), end_day
+    )
+    return ReportTable(
+        title="Performance Analytics",
+        period=_period_label(date_range, end_day),
+        columns=[
+            "Equipment ID", "Equipment", "Type", "Status", "Hours",
+            "Utilization %", "Total Cost", "Cost / Hour", "ROI %"
+        ],
+        rows=[
+            (
+                item.id, item.equipment_name, item.equipment_type, item.status, item.total_hours,
+                item.utilization_rate, item.total_cost, item.cost_per_hour, item.roi
+            )
+            for item in performance
+        ],
+        summary=[
+            ("Equipment", len(performance)),
+            ("Total hours", sum(item.total_hours for item in performance)),
+            ("Total cost", round(sum(item.total_cost for item in performance), 2))
+        ]
+    )
+
+
+def build_cost_analysis(db: Session, request: ReportRequest) -> ReportTable:
+    """Financial summary plus revenue and fuel per project, from the financial ledger"""
+    date_range, end_day = report_period(request)
+    company_id = _company_id(request)
+    summary = ReportsService(db).get_financial_summary(date_range, company_id, end_day=end_day)
+    start, end = report_window(date_range, end_day)
+    projects = FinancialLedgerService(db).get_project_totals(start.date(), end.date(), company_id)
+    return ReportTable(
+        title="Cost Analysis",
+        period=_period_label(date_range, end_day),
+        columns=["Project", "Reports", "Hours", "Revenue", "Fuel (L)", "Fuel Cost"],
+        rows=[
+            (
+                row.project_name, int(row.report_count), float(row.hours), float(row.revenue),
+                float(row.fuel_liters), float(row.fuel_cost)
+            )
+            for row in projects
+        ],
+        summary=[
+            ("Total revenue", summary.total_revenue),
+            ("Total operational cost", summary.total_operational_cost),
+            ("Cost savings", summary.cost_savings),
+            ("Budget adherence %", summary.budget_adherence),
+            ("Profit margin %", summary.profit_margin)
+        ]
+    )
+
+
+def build_equipment_valuation(db: Session, request: ReportRequest) -> ReportTable:
+    """
+    Straight-line valuation of the fleet as of the report's last day.
+
+    Equipment is depreciated over REPORTS_EQUIPMENT_USEFUL_LIFE_YEARS from
+    its year of manufacture; a recorded current_value takes precedence over
+    the depreciated value. Replacement (insurance) value is the purchase cost.
+    """
+    _, end_day = report_period(request)
+    rows = db.execute(text(f"""
+        WITH fleet AS ({FLEET_SQL})
+        SELECT f.id, f.name, f.equipment_type, f.purchase_cost,
+               e.current_value, e.year_manufactured
+        FROM fleet f
+        JOIN equipment e ON e.id = f.id
+        ORDER BY f.id
+    """), {
+        'company_id': _company_id(request),
+        'equipment_type': request.equipment_filter.lower() if request.equipment_filter else None
+    }).fetchall()
+
+    useful_life = settings.REPORTS_EQUIPMENT_USEFUL_LIFE_YEARS
+    table_rows = []
+    for row in rows:
+        purchase = float(row.purchase_cost)
+        age = max(0, end_day.year - row.year_manufactured) if row.year_manufactured else 0
+        accumulated = min(purchase, purchase * age / useful_life)
+        current = float(row.current_value) if row.current_value is not None else purchase - accumulated
+        table_rows.append((
+            row.id, row.name, row.equipment_type, purchase, round(current, 2),
+            round(100.0 / useful_life, 2), round(accumulated, 2),
+            max(0, int(useful_life - age)), purchase
+        ))
+
+    return ReportTable(
+        title="Equipment Valuation",
+        period=f"As of {end_day.isoformat()}",
+        columns=[
+            "Equipment ID", "Equipment", "Type", "Purchase Value", "Current Value",
+            "Depreciation %/yr", "Accumulated Depreciation", "Remaining Life (yrs)", "Insurance Value"
+        ],
+        rows=table_rows,
+        summary=[
+            ("Equipment", len(table_rows)),
+            ("Total purchase value", round(sum(row[3] for row in table_rows), 2)),
+            ("Total current value", round(sum(row[4] for row in table_rows), 2))
+        ]
+    )
+
+
+def build_operator_performance(db: Session, request: ReportRequest) -> ReportTable:
+    """Every operator with counted reports in the period, in hours rank order"""
+    date_range, end_day = report_period(request)
+    operators, _ = ReportsService(db).get_operator_performance(
+        date_range, _company_id(request), request.equipment_filter, end_day
+    )
+    return ReportTable(
+        title="Operator Performance",
+        period=_period_label(date_range, end_day),
+        columns=[
+            "Rank", "Operator ID", "Operator", "Reports", "Hours", "Equipment", "Fuel L/h",
+            "Efficiency Rank", "On-time %", "Safety Incidents", "Hourly Rate", "Earnings"
+        ],
+        rows=[
+            (
+                item.hours_rank, item.operator_id, item.operator_name, item.report_count,
+                item.total_hours, ", ".join(item.equipment_operated), item.fuel_per_hour,
+                item.efficiency_rank, item.on_time_rate, item.safety_incidents,
+                item.hourly_rate, item.salary_calculation
+            )
+            for item in operators
+        ],
+        summary=[
+            ("Operators", len(operators)),
+            ("Total hours", sum(item.total_hours for item in operators)),
+            ("Total earnings", round(sum(item.salary_calculation for item in operators), 2))
+        ]
+    )
+
+
+def build_maintenance_schedule(db: Session, request: ReportRequest) -> ReportTable:
+    """Projected next service of every unit as of the report's last day, by priority and then soonest first"""
+    _, end_day = report_period(request)
+    maintenance = MaintenanceForecastService(db)
+    maintenance.fit_pending()
+    forecasts = sorted(
+        maintenance.get_forecasts(end_day, _company_id(request), request.equipment_filter),
+        key=lambda item: (
+            _PRIORITY_ORDER.get(item.priority, len(_PRIORITY_ORDER)),
+            item.days_until is None, item.days_until, item.equipment_id
+        )
+    )
+    due = [item for item in forecasts if item.days_until is not None and item.days_until <= DUE_LATER_DAYS]
+    return ReportTable(
+        title="Maintenance Schedule",
+        period=f"As of {end_day.isoformat()}",
+        columns=[
+            "Equipment ID", "Equipment", "Type", "Hourmeter", "Hours / Day", "Service At (h)",
+            "Last Maintenance (est.)", "Next Maintenance", "Days Until", "Maintenance",
+            "Priority", "Status", "Estimated Cost"
+        ],
+        rows=[
+            (
+                item.equipment_id, item.equipment_name, item.equipment_type, item.hourmeter,
+                item.hours_per_day, item.next_service_hours,
+                item.last_maintenance.date().isoformat() if item.last_maintenance else None,
+                item.next_maintenance.date().isoformat() if item.next_maintenance else None,
+                item.days_until, item.maintenance_type, item.priority, item.status, item.estimated_cost
+            )
+            for item in forecasts
+        ],
+        summary=[
+            ("Equipment", len(forecasts)),
+            ("Overdue", sum(1 for item in forecasts if item.status == "overdue")),
+            ("Requested by operators", sum(1 for item in forecasts if item.status == "requested")),
+            (f"Due within {DUE_LATER_DAYS} days", len(due)),
+            (f"Estimated cost within {DUE_LATER_DAYS} days", round(sum(item.estimated_cost for item in due), 2))
+        ]
+    )
+
+
+# Report type -> builder; types missing here cannot be generated yet
+REPORT_BUILDERS: Dict[str, Callable[[Session, ReportRequest], ReportTable]] = {
+    'performance_analytics': build_performance_analytics,
+    'cost_analysis': build_cost_analysis,
+    'equipment_valuation': build_equipment_valuation,
+    'operator_performance': build_operator_performance,
+    'maintenance_schedule': build_maintenance_schedule
+}
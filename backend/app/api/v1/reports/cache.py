@@ -0,0 +1,46 @@
+"""
+Reports caches
+Redis caches for computed reports, keyed by the data watermark they were built from
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.cache import VersionedCache
+from app.core.config import settings
+
+# KPI tiles per (company, date range, watermark)
+kpi_cache = VersionedCache("reports:kpis", ttl_seconds=settings.REPORTS_KPI_CACHE_TTL_SECONDS)
+
+# Source tables whose writes change report results
+SOURCE_TABLES = (
+    "daily_reports", "equipment_schedules", "equipment", "companies", "operator_profiles", "users"
+)
+
+
+def data_watermark(db: Session) -> str:
+    """
+    Latest update across the report source tables.
+
+    One index probe per table (MAX over an indexed updated_at). Deletes do
+    not move it, so cached results still expire through their TTL.
+
+    updated_at is stamped at transaction start, so a write committed after
+    a report was computed can land below the watermark without moving it.
+    While the latest update is younger than REPORTS_WATERMARK_SETTLE_SECONDS
+    the watermark is marked provisional; once it settles the mark changes,
+    so results computed in that window are not reused afterwards.
+    """
+    row = db.execute(text(
+        "SELECT " + ", ".join(
+            f"(SELECT MAX(updated_at) FROM {table}) AS {table}" for table in SOURCE_TABLES
+        ) + ", clock_timestamp() AS read_at"
+    )).fetchone()
+    updates = [value for value in row[:len(SOURCE_TABLES)] if value is not None]
+    settled = not updates or (
+        row.read_at - max(updates)
+    ).total_seconds() >= settings.REPORTS_WATERMARK_SETTLE_SECONDS
+    return "|".join(
+        [value.isoformat() if value else "-" for value in row[:len(SOURCE_TABLES)]]
+        + ["settled" if settled else "provisional"]
+    )
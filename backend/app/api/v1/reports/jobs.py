@@ -0,0 +1,629 @@
+"""
+Report jobs
+Background report generation on a per-process worker pool, with job state in report_jobs.
+Completed jobs double as a content-addressed cache of report files: each file is stored
+under its canonical request key and the data watermark it was built from.
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple, cast
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import CursorResult, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.api.v1.reports.builders import REPORT_BUILDERS
+from app.api.v1.reports.cache import data_watermark
+from app.api.v1.reports.pdf import warm_pdf_caches
+from app.api.v1.reports.schemas import ReportRequest
+from app.api.v1.reports.writers import REPORT_FORMATS
+
+logger = logging.getLogger(__name__)
+
+IN_FLIGHT_STATUSES = ('queued', 'running')
+
+# Seconds between progress writes of a running job
+_PROGRESS_INTERVAL_SECONDS = 1.0
+
+# Seconds between heartbeats of the jobs handed to this process's pool
+_HEARTBEAT_INTERVAL_SECONDS = 30.0
+
+# Bytes per chunk when streaming a report file
+_STREAM_CHUNK_BYTES = 64 * 1024
+
+_JOB_COLUMNS_SQL = """
+    id, request_key, watermark, report_type, format, parameters, status, progress, message,
+    file_path, file_size, row_count, error_message, requested_by,
+    created_at, started_at, finished_at, updated_at, last_accessed_at
+"""
+
+
+def canonical_request(request: ReportRequest) -> Dict[str, Any]:
+    """
+    Normalized form of a report request.
+
+    Case, key order and timestamp zones are normalized, and dates are cut to
+    midnight UTC of the day reports are computed at, so requests that ask for
+    the same report compare equal. A missing date_to becomes today, which
+    keeps "latest" requests from matching reports built on earlier days.
+    Dates stay full instants so render_report can rebuild the ReportRequest.
+    """
+    def midnight(day: date) -> str:
+        return f"{day.isoformat()}T00:00:00+00:00"
+
+    def day(value: Optional[datetime]) -> Optional[str]:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return midnight(value.astimezone(timezone.utc).date())
+
+    return {
+        'report_type': request.report_type.strip().lower(),
+        'format': request.format.strip().upper(),
+        'date_from': day(request.date_from),
+        'date_to': day(request.date_to) or midnight(datetime.now(timezone.utc).date()),
+        'equipment_filter': request.equipment_filter.strip().lower() if request.equipment_filter else None,
+        'include_charts': request.include_charts,
+        'filters': request.filters or {}
+    }
+
+
+def request_key(canonical: Dict[str, Any]) -> str:
+    """SHA-256 of a canonical request"""
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def reports_directory() -> Path:
+    """Directory generated report files are written to"""
+    return Path(settings.UPLOAD_DIRECTORY) / "reports"
+
+
+def artifact_path(key: str, watermark: str, extension: str) -> Path:
+    """File a report is stored under: the same request over the same data maps to the same file"""
+    digest = hashlib.sha256(f"{key}:{watermark}".encode()).hexdigest()
+    return reports_directory() / "cache" / f"{digest}.{extension}"
+
+
+class ReportJobService:
+    """Creates report jobs and reads their state"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def submit(self, request: ReportRequest, requested_by: Optional[int]) -> Tuple[Any, bool]:
+        """
+        Serve a report from the cache, join an identical job in flight, or queue a new one.
+
+        A completed job for the same canonical request and the current data
+        watermark is returned as is. Jobs whose heartbeat is older than
+        REPORTS_JOB_TIMEOUT_SECONDS are marked failed first, so a worker that
+        died does not block new requests forever; the API process that owns
+        a job beats for it while it is queued and running.
+
+        Args:
+            request: Report request; type and format must be supported
+            requested_by: User ID of the requester
+
+        Returns:
+            Tuple of (job row, whether a new job was created and must be started)
+        """
+        canonical = canonical_request(request)
+        key = request_key(canonical)
+        watermark = data_watermark(self.db)
+
+        cached = self.find_artifact(key, watermark)
+        if cached is not None:
+            self.db.commit()
+            return cached, False
+
+        self.db.execute(text("""
+            UPDATE report_jobs
+            SET status = 'failed',
+                error_message = 'Report job stopped responding',
+                finished_at = CURRENT_TIMESTAMP,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE request_key = :request_key
+                AND watermark = :watermark
+                AND status = ANY(:in_flight)
+                AND updated_at < CURRENT_TIMESTAMP - make_interval(secs => :timeout)
+        """), {
+            'request_key': key,
+            'watermark': watermark,
+            'in_flight': list(IN_FLIGHT_STATUSES),
+            'timeout': settings.REPORTS_JOB_TIMEOUT_SECONDS
+        })
+
+        job = self.db.execute(text(f"""
+            INSERT INTO report_jobs (id, request_key, watermark, report_type, format, parameters, requested_by)
+            VALUES (:id, :request_key, :watermark, :report_type, :format, CAST(:parameters AS JSONB), :requested_by)
+            ON CONFLICT (request_key, watermark) WHERE status IN ('queued', 'running') DO NOTHING
+            RETURNING {_JOB_COLUMNS_SQL}
+        """), {
+            'id': uuid.uuid4().hex,
+            'request_key': key,
+            'watermark': watermark,
+            'report_type': canonical['report_type'],
+            'format': canonical['format'],
+            'parameters': json.dumps(canonical, default=str),
+            'requested_by': requested_by
+        }).fetchone()
+        created = job is not None
+
+        if job is None:
+            job = self.db.execute(text(f"""
+                SELECT {_JOB_COLUMNS_SQL}
+                FROM report_jobs
+                WHERE request_key = :request_key AND watermark = :watermark AND status = ANY(:in_flight)
+            """), {'request_key': key, 'watermark': watermark, 'in_flight': list(IN_FLIGHT_STATUSES)}).fetchone()
+        self.db.commit()
+
+        if job is None:
+            # The identical job finished between the insert and the lookup
+            return self.submit(request, requested_by)
+        return job, created
+
+    def get_job(self, job_id: str) -> Optional[Any]:
+        """Job row, or None if it does not exist"""
+        return self.db.execute(
+            text(f"SELECT {_JOB_COLUMNS_SQL} FROM report_jobs WHERE id = :id"),
+            {'id': job_id}
+        ).fetchone()
+
+    def find_artifact(self, key: str, watermark: str) -> Optional[Any]:
+        """
+        Latest completed job for a request key built at watermark, marked as just used.
+
+        Runs in the caller's transaction. Jobs finished more than
+        REPORTS_CACHE_MAX_AGE_SECONDS ago are not reused, since deleted rows
+        do not move the watermark. A job whose file has disappeared is
+        expired and not returned.
+        """
+        job = self.db.execute(text(f"""
+            UPDATE report_jobs
+            SET last_accessed_at = CURRENT_TIMESTAMP
+            WHERE id = (
+                SELECT id FROM report_jobs
+                WHERE request_key = :request_key
+                    AND watermark = :watermark
+                    AND status = 'completed'
+                    AND file_path IS NOT NULL
+                    AND finished_at > CURRENT_TIMESTAMP - make_interval(secs => :max_age)
+                ORDER BY finished_at DESC
+                LIMIT 1
+            )
+            RETURNING {_JOB_COLUMNS_SQL}
+        """), {
+            'request_key': key,
+            'watermark': watermark,
+            'max_age': settings.REPORTS_CACHE_MAX_AGE_SECONDS
+        }).fetchone()
+        if job is not None and not os.path.isfile(job.file_path):
+            self.db.execute(
+                text("UPDATE report_jobs SET status = 'expired', file_path = NULL WHERE id = :id"),
+                {'id': job.id}
+            )
+            return None
+        return job
+
+    def record_artifact(
+        self,
+        canonical: Dict[str, Any],
+        watermark: str,
+        path: Path,
+        row_count: int,
+        requested_by: Optional[int]
+    ) -> Any:
+        """Register a report rendered outside the job queue so later requests can reuse it"""
+        job = self.db.execute(text(f"""
+            INSERT INTO report_jobs (
+                id, request_key, watermark, report_type, format, parameters, status, progress,
+                message, file_path, file_size, row_count, requested_by,
+                started_at, finished_at, last_accessed_at
+            )
+            VALUES (
+                :id, :request_key, :watermark, :report_type, :format, CAST(:parameters AS JSONB),
+                'completed', 100, 'Report ready', :file_path, :file_size, :row_count, :requested_by,
+                CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+            )
+            RETURNING {_JOB_COLUMNS_SQL}
+        """), {
+            'id': uuid.uuid4().hex,
+            'request_key': request_key(canonical),
+            'watermark': watermark,
+            'report_type': canonical['report_type'],
+            'format': canonical['format'],
+            'parameters': json.dumps(canonical, default=str),
+            'file_path': str(path),
+            'file_size': path.stat().st_size,
+            'row_count': row_count,
+            'requested_by': requested_by
+        }).fetchone()
+        self.db.commit()
+        return job
+
+    def evict_artifacts(self) -> int:
+        """
+        Drop cached report files that are superseded or over budget, and commit.
+
+        A file is superseded once a newer build of the same request exists.
+        The rest are kept most recently used first until their total size
+        reaches REPORTS_CACHE_MAX_BYTES; older ones are deleted and their jobs
+        marked expired.
+
+        Returns:
+            Number of files evicted
+        """
+        evicted = self.db.execute(text("""
+            WITH artifacts AS (
+                SELECT id, file_path, file_size, last_accessed_at,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY request_key ORDER BY finished_at DESC, id DESC
+                    ) AS generation
+                FROM report_jobs
+                WHERE status = 'completed' AND file_path IS NOT NULL
+            ),
+            retained AS (
+                SELECT id,
+                    SUM(COALESCE(file_size, 0)) OVER (
+                        ORDER BY last_accessed_at DESC NULLS LAST, id DESC
+                    ) AS retained_bytes
+                FROM artifacts
+                WHERE generation = 1
+            ),
+            victims AS (
+                SELECT id FROM artifacts WHERE generation > 1
+                UNION
+                SELECT id FROM retained WHERE retained_bytes > :max_bytes
+            )
+            UPDATE report_jobs rj
+            SET status = 'expired',
+                file_path = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            FROM victims, artifacts a
+            WHERE rj.id = victims.id
+                AND a.id = victims.id
+                AND rj.status = 'completed'
+            RETURNING a.file_path
+        """), {'max_bytes': settings.REPORTS_CACHE_MAX_BYTES}).fetchall()
+        # Identical builds share one file; keep it while a completed job still points at it
+        paths = sorted({row.file_path for row in evicted})
+        in_use = {
+            row.file_path for row in self.db.execute(text("""
+                SELECT DISTINCT file_path FROM report_jobs
+                WHERE status = 'completed' AND file_path = ANY(:paths)
+            """), {'paths': paths})
+        } if paths else set()
+        self.db.commit()
+
+        for path in paths:
+            if path not in in_use:
+                Path(path).unlink(missing_ok=True)
+        if evicted:
+            logger.info(f"Report cache: evicted {len(evicted)} files")
+        return len(evicted)
+
+
+class _JobState:
+    """
+    Writes a job's status and progress in short transactions of its own.
+
+    Only jobs still in flight are updated, so a job that submit already
+    failed for a lost heartbeat stays failed.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    def update(self, **values: Any) -> bool:
+        """Apply values to the job; False if it is no longer queued or running"""
+        assignments = ", ".join(f"{column} = :{column}" for column in values)
+        db = SessionLocal()
+        try:
+            result = cast(CursorResult[Any], db.execute(
+                text(f"""
+                    UPDATE report_jobs SET {assignments}, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = :job_id AND status IN ('queued', 'running')
+                """),
+                {**values, 'job_id': self.job_id}
+            ))
+            db.commit()
+        finally:
+            db.close()
+        self._last_write = time.monotonic()
+        return result.rowcount > 0
+
+    def progress(self, percent: int, message: str) -> None:
+        """Record progress, at most once per _PROGRESS_INTERVAL_SECONDS"""
+        if time.monotonic() - self._last_write >= _PROGRESS_INTERVAL_SECONDS:
+            self.update(progress=max(0, min(100, int(percent))), message=message[:255])
+
+
+def render_report(
+    parameters: Dict[str, Any],
+    path: str,
+    progress: Optional[Callable[[int, str], None]] = None
+) -> int:
+    """
+    Build a report and write it to path; runs in a report pool process.
+
+    Progress: 0-40% building the data, 40-100% writing rows. The file is
+    written under a temporary name and renamed when complete, so readers
+    never see a partial report.
+
+    Args:
+        parameters: Canonical report request
+        path: Destination file
+        progress: Called with (percent, message) as work advances
+
+    Returns:
+        Number of data rows written
+    """
+    def report(percent: int, message: str) -> None:
+        if progress is not None:
+            progress(percent, message)
+
+    request = ReportRequest(**{
+        key: value for key, value in parameters.items() if key in ReportRequest.model_fields
+    })
+
+    db = SessionLocal()
+    try:
+        table = REPORT_BUILDERS[parameters['report_type']](db, request)
+    finally:
+        db.close()
+    total = max(1, len(table.rows))
+    report(40, f'Writing {len(table.rows)} rows')
+
+    destination = Path(path)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    # Unique per render: concurrent builds of the same artifact must not share a temporary file
+    temporary = destination.with_name(f"{destination.name}.{uuid.uuid4().hex[:8]}.part")
+    try:
+        with open(temporary, "wb") as output:
+            REPORT_FORMATS[parameters['format']].write(
+                table, output,
+                lambda written: report(40 + 60 * written // total, f'Wrote {written} of {total} rows')
+            )
+        os.replace(temporary, destination)
+    finally:
+        temporary.unlink(missing_ok=True)
+    return len(table.rows)
+
+
+def run_report_job(job_id: str) -> None:
+    """Run a queued report job and record its outcome; runs in a report pool process"""
+    state = _JobState(job_id)
+    db = SessionLocal()
+    try:
+        job = ReportJobService(db).get_job(job_id)
+        db.rollback()
+        if job is None or job.status != 'queued':
+            return
+        if not state.update(status='running', progress=0, message='Building report data', started_at=_now()):
+            return
+
+        path = artifact_path(job.request_key, job.watermark, REPORT_FORMATS[job.format].extension)
+        row_count = render_report(job.parameters, str(path), state.progress)
+
+        completed = state.update(
+            status='completed', progress=100, message='Report ready',
+            file_path=str(path), file_size=path.stat().st_size,
+            row_count=row_count, finished_at=_now(), last_accessed_at=_now()
+        )
+        if not completed:
+            # submit failed the job meanwhile; drop the file unless a newer job of the same request owns it
+            owned = db.execute(
+                text("SELECT 1 FROM report_jobs WHERE file_path = :file_path AND status = 'completed' LIMIT 1"),
+                {'file_path': str(path)}
+            ).fetchone()
+            db.rollback()
+            if owned is None:
+                path.unlink(missing_ok=True)
+            return
+    except Exception as e:
+        logger.exception(f"Report job {job_id} failed")
+        state.update(status='failed', message='Report generation failed', error_message=str(e), finished_at=_now())
+        return
+    finally:
+        db.close()
+
+    # The job is complete; cache housekeeping must not change that
+    db = SessionLocal()
+    try:
+        ReportJobService(db).evict_artifacts()
+    except Exception:
+        logger.exception(f"Report cache eviction after job {job_id} failed")
+    finally:
+        db.close()
+
+
+async def cached_report_file(db: Session, request: ReportRequest, requested_by: Optional[int]) -> Iterator[bytes]:
+    """
+    Chunks of a report file, from the cache or rendered on the report pool without blocking the event loop.
+
+    Fresh renders are registered as completed jobs, so /reports/generate
+    and later exports of the same request reuse them until the data
+    watermark moves. The session and file work runs in the threadpool;
+    only the render is awaited on the event loop.
+    """
+    canonical = canonical_request(request)
+    watermark, chunks = await run_in_threadpool(_open_cached_report, db, canonical)
+    if chunks is not None:
+        return chunks
+
+    path = artifact_path(request_key(canonical), watermark, REPORT_FORMATS[canonical['format']].extension)
+    loop = asyncio.get_running_loop()
+    row_count = await loop.run_in_executor(get_report_pool(), render_report, canonical, str(path))
+    return await run_in_threadpool(_publish_rendered_report, db, canonical, watermark, path, row_count, requested_by)
+
+
+def _open_cached_report(db: Session, canonical: Dict[str, Any]) -> Tuple[str, Optional[Iterator[bytes]]]:
+    """Current data watermark, and the chunks of the cached report built at it if there is one"""
+    watermark = data_watermark(db)
+    cached = ReportJobService(db).find_artifact(request_key(canonical), watermark)
+    db.commit()
+    if cached is not None:
+        try:
+            return watermark, iter_report_file(Path(cached.file_path))
+        except FileNotFoundError:
+            # Evicted by another worker since the lookup; render it again
+            pass
+    return watermark, None
+
+
+def _publish_rendered_report(
+    db: Session,
+    canonical: Dict[str, Any],
+    watermark: str,
+    path: Path,
+    row_count: int,
+    requested_by: Optional[int]
+) -> Iterator[bytes]:
+    """
+    Register a fresh render, trim the cache and return the render's chunks.
+
+    The file is opened before the cache is trimmed, so an eviction, even
+    of this file when it alone exceeds REPORTS_CACHE_MAX_BYTES, cannot
+    remove it from under the response.
+    """
+    service = ReportJobService(db)
+    service.record_artifact(canonical, watermark, path, row_count, requested_by)
+    chunks = iter_report_file(path)
+    try:
+        service.evict_artifacts()
+    except Exception:
+        logger.exception("Report cache eviction failed")
+    return chunks
+
+
+def iter_report_file(path: Path) -> Iterator[bytes]:
+    """
+    Read a report file in chunks for a StreamingResponse.
+
+    The file is opened before the first chunk is requested, so a cache
+    eviction that unlinks it mid-stream does not cut the download short.
+    """
+    report_file = open(path, "rb")
+
+    def chunks() -> Iterator[bytes]:
+        with report_file:
+            while True:
+                chunk = report_file.read(_STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    return chunks()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _init_report_worker() -> None:
+    warm_pdf_caches()
+
+
+class _JobHeartbeat:
+    """
+    Touches updated_at of the jobs this process handed to its pool, in a daemon thread.
+
+    A job beats from submission until its future is done, so jobs waiting
+    in the pool queue or building their data are not mistaken for dead
+    ones. If this process or the pool dies, the beats stop and submit
+    fails the jobs after REPORTS_JOB_TIMEOUT_SECONDS.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._jobs: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            self._jobs.add(job_id)
+        future.add_done_callback(lambda _: self._forget(job_id))
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="report-heartbeat", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def _forget(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.discard(job_id)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            with self._lock:
+                job_ids = list(self._jobs)
+            if not job_ids:
+                continue
+            db = SessionLocal()
+            try:
+                db.execute(text("""
+                    UPDATE report_jobs SET updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ANY(:job_ids) AND status IN ('queued', 'running')
+                """), {'job_ids': job_ids})
+                db.commit()
+            except Exception as e:
+                logger.error(f"Report job heartbeat failed: {e}")
+            finally:
+                db.close()
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_heartbeat = _JobHeartbeat(_HEARTBEAT_INTERVAL_SECONDS)
+
+
+def get_report_pool() -> ProcessPoolExecutor:
+    """
+    Process pool running the report jobs started by this API worker.
+
+    Workers are spawned rather than forked: the API process runs threads
+    (the event loop's executor, the snapshot refresher, the heartbeat),
+    and a fork could copy a lock one of them holds.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.REPORTS_JOB_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_report_worker
+        )
+    return _pool
+
+
+def start_report_job(job_id: str) -> None:
+    """Hand a newly created job to the report pool"""
+    _heartbeat.track(job_id, get_report_pool().submit(run_report_job, job_id))
+
+
+def shutdown_report_pool() -> None:
+    """Stop the pool without waiting; unfinished jobs time out and can be requested again"""
+    global _pool
+    _heartbeat.stop()
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
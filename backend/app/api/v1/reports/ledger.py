@@ -0,0 +1,167 @@
+"""
+Financial ledger
+Per-day, per-project totals of approved daily reports, maintained incrementally on approval
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# Marks approved, unposted reports as posted and adds them to their ledger
+# days in one statement. The UPDATE's row locks make concurrent postings of
+# the same report skip it instead of counting it twice.
+_POST_SQL = """
+    WITH posted AS (
+        UPDATE daily_reports dr
+        SET ledger_posted_at = CURRENT_TIMESTAMP
+        WHERE dr.status = 'approved'
+            AND dr.ledger_posted_at IS NULL
+            AND (CAST(:report_ids AS INTEGER[]) IS NULL OR dr.id = ANY(:report_ids))
+        RETURNING dr.id, dr.report_date, dr.project_name, dr.equipment_id,
+            COALESCE(dr.hours_worked, 0) AS hours, dr.fuel_consumed
+    ),
+    amounts AS (
+        SELECT
+            CAST(p.report_date AS DATE) AS day,
+            e.company_id,
+            p.project_name,
+            p.hours,
+            p.hours * COALESCE(e.hourly_rate, 0) AS revenue,
+            -- fuel_consumed is the drop in tank level in percent
+            COALESCE(p.fuel_consumed, 0) / 100.0 * COALESCE(e.fuel_capacity, 0) AS fuel_liters
+        FROM posted p
+        JOIN equipment e ON e.id = p.equipment_id
+    )
+    INSERT INTO financial_ledger
+        (day, company_id, project_name, report_count, hours, revenue, fuel_liters, fuel_cost, updated_at)
+    SELECT day, company_id, project_name, COUNT(*), SUM(hours), SUM(revenue),
+        SUM(fuel_liters), SUM(fuel_liters) * :fuel_price, CURRENT_TIMESTAMP
+    FROM amounts
+    GROUP BY day, company_id, project_name
+    ON CONFLICT (day, company_id, project_name) DO UPDATE SET
+        report_count = financial_ledger.report_count + EXCLUDED.report_count,
+        hours = financial_ledger.hours + EXCLUDED.hours,
+        revenue = financial_ledger.revenue + EXCLUDED.revenue,
+        fuel_liters = financial_ledger.fuel_liters + EXCLUDED.fuel_liters,
+        fuel_cost = financial_ledger.fuel_cost + EXCLUDED.fuel_cost,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+class FinancialLedgerService:
+    """
+    Incremental financial ledger.
+
+    Each approved report is posted once: its hours, hours x hourly_rate and
+    fuel are added to the (day, company, project) row it belongs to. Approved
+    reports cannot be edited, so posted amounts never need revisiting and any
+    date range is answered by summing at most one row per project and day.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def post_reports(self, report_ids: Optional[List[int]] = None) -> None:
+        """
+        Add approved, not yet posted reports to the ledger.
+
+        Runs in the caller's transaction so approval and posting commit
+        together. Without report_ids every pending approval is posted, which
+        also backfills reports approved before the ledger existed.
+
+        Args:
+            report_ids: Reports to post, or None for all pending ones
+        """
+        self.db.execute(text(_POST_SQL), {
+            'report_ids': report_ids,
+            'fuel_price': settings.REPORTS_FUEL_PRICE_PER_LITER
+        })
+
+    def post_pending(self) -> None:
+        """Post approvals that bypassed the approval endpoint, if there are any"""
+        pending = self.db.execute(text("""
+            SELECT EXISTS (
+                SELECT 1 FROM daily_reports
+                WHERE status = 'approved' AND ledger_posted_at IS NULL
+            )
+        """)).scalar()
+        if pending:
+            self.post_reports()
+            self.db.commit()
+
+    def get_totals(
+        self,
+        start_day: date,
+        end_day: date,
+        company_id: Optional[int] = None,
+        project_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Ledger totals for the days in [start_day, end_day).
+
+        Args:
+            start_day: First day included
+            end_day: First day excluded
+            company_id: Optional company filter
+            project_name: Optional project filter
+
+        Returns:
+            Dict with report_count, hours, revenue, fuel_liters and fuel_cost
+        """
+        row = self.db.execute(text("""
+            SELECT
+                COALESCE(SUM(report_count), 0) AS report_count,
+                COALESCE(SUM(hours), 0) AS hours,
+                COALESCE(SUM(revenue), 0) AS revenue,
+                COALESCE(SUM(fuel_liters), 0) AS fuel_liters,
+                COALESCE(SUM(fuel_cost), 0) AS fuel_cost
+            FROM financial_ledger
+            WHERE day >= :start_day AND day < :end_day
+                AND (CAST(:company_id AS INTEGER) IS NULL OR company_id = :company_id)
+                AND (CAST(:project_name AS VARCHAR) IS NULL OR project_name = :project_name)
+        """), {
+            'start_day': start_day,
+            'end_day': end_day,
+            'company_id': company_id,
+            'project_name': project_name
+        }).fetchone()
+
+        return {
+            'report_count': int(row.report_count),
+            'hours': float(row.hours),
+            'revenue': float(row.revenue),
+            'fuel_liters': float(row.fuel_liters),
+            'fuel_cost': float(row.fuel_cost)
+        }
+
+    def get_project_totals(
+        self,
+        start_day: date,
+        end_day: date,
+        company_id: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Ledger totals per project for the days in [start_day, end_day).
+
+        Returns:
+            Rows with project_name, report_count, hours, revenue, fuel_liters
+            and fuel_cost, highest revenue first
+        """
+        return self.db.execute(text("""
+            SELECT
+                project_name,
+                SUM(report_count) AS report_count,
+                SUM(hours) AS hours,
+                SUM(revenue) AS revenue,
+                SUM(fuel_liters) AS fuel_liters,
+                SUM(fuel_cost) AS fuel_cost
+            FROM financial_ledger
+            WHERE day >= :start_day AND day < :end_day
+                AND (CAST(:company_id AS INTEGER) IS NULL OR company_id = :company_id)
+            GROUP BY project_name
+            ORDER BY revenue DESC, project_name
+        """), {'start_day': start_day, 'end_day': end_day, 'company_id': company_id}).fetchall()
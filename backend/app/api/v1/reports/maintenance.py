@@ -0,0 +1,346 @@
+"""
+Maintenance forecasts
+Per-equipment hourmeter growth fits, maintained incrementally on approval, and the service dates they project
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.api.v1.reports.schemas import MaintenanceScheduleReport
+
+# Approved reports folded into the fits per transaction
+FIT_BATCH_SIZE = 50000
+
+# Services due within this many days are high priority, and medium up to the second
+DUE_SOON_DAYS = 7
+DUE_LATER_DAYS = 30
+
+# Fitted growth below this many hours per day is idle equipment, with no projected service
+MIN_HOURS_PER_DAY = 0.01
+
+_EPOCH = date(1970, 1, 1)
+
+# Weighted least-squares sums of hourmeter (y) over day offset from anchor_day (x)
+_SUM_COLUMNS = (
+    'weight_sum', 'weighted_day_sum', 'weighted_hourmeter_sum',
+    'weighted_day_square_sum', 'weighted_day_hourmeter_sum'
+)
+
+# Marks a batch of approved, unfitted reports as fitted and returns their
+# readings. Concurrent fits wait on the row locks and then skip the reports
+# the other one marked, so no reading is counted twice.
+_MARK_SQL = """
+    UPDATE daily_reports dr
+    SET maintenance_fitted_at = CURRENT_TIMESTAMP
+    WHERE dr.id IN (
+            SELECT id FROM daily_reports
+            WHERE status = 'approved'
+                AND maintenance_fitted_at IS NULL
+                AND (CAST(:report_ids AS INTEGER[]) IS NULL OR id = ANY(:report_ids))
+            ORDER BY id
+            LIMIT :batch_size
+        )
+        AND dr.status = 'approved'
+        AND dr.maintenance_fitted_at IS NULL
+    RETURNING
+        dr.equipment_id,
+        CAST(dr.report_date AT TIME ZONE 'UTC' AS DATE) - DATE '1970-01-01' AS day,
+        COALESCE(dr.final_hourmeter, dr.initial_hourmeter + COALESCE(dr.hours_worked, 0)) AS hourmeter,
+        COALESCE(dr.maintenance_needed, FALSE) AS maintenance_needed
+"""
+
+_STORE_SQL = """
+    UPDATE equipment_usage_fits f
+    SET reading_count = v.reading_count,
+        anchor_day = v.anchor_day,
+        weight_sum = v.weight_sum,
+        weighted_day_sum = v.weighted_day_sum,
+        weighted_hourmeter_sum = v.weighted_hourmeter_sum,
+        weighted_day_square_sum = v.weighted_day_square_sum,
+        weighted_day_hourmeter_sum = v.weighted_day_hourmeter_sum,
+        last_hourmeter = v.last_hourmeter,
+        maintenance_flagged_day = v.maintenance_flagged_day,
+        updated_at = CURRENT_TIMESTAMP
+    FROM UNNEST(
+        CAST(:equipment_id AS INTEGER[]),
+        CAST(:reading_count AS INTEGER[]),
+        CAST(:anchor_day AS INTEGER[]),
+        CAST(:weight_sum AS FLOAT8[]),
+        CAST(:weighted_day_sum AS FLOAT8[]),
+        CAST(:weighted_hourmeter_sum AS FLOAT8[]),
+        CAST(:weighted_day_square_sum AS FLOAT8[]),
+        CAST(:weighted_day_hourmeter_sum AS FLOAT8[]),
+        CAST(:last_hourmeter AS FLOAT8[]),
+        CAST(:maintenance_flagged_day AS INTEGER[])
+    ) AS v(
+        equipment_id, reading_count, anchor_day, weight_sum, weighted_day_sum,
+        weighted_hourmeter_sum, weighted_day_square_sum, weighted_day_hourmeter_sum,
+        last_hourmeter, maintenance_flagged_day
+    )
+    WHERE f.equipment_id = v.equipment_id
+"""
+
+# Active, non-retired equipment with its fit; a numeric
+# specifications.service_interval_hours overrides the default interval
+_FORECAST_SQL = """
+    SELECT
+        e.id, e.name, e.equipment_type,
+        COALESCE(e.purchase_cost, 0) AS purchase_cost,
+        COALESCE(e.hourmeter_reading, 0) AS hourmeter_reading,
+        CASE WHEN e.specifications->>'service_interval_hours' ~ '^[0-9]+(\\.[0-9]+)?$'
+            THEN CAST(e.specifications->>'service_interval_hours' AS DOUBLE PRECISION)
+        END AS service_interval,
+        COALESCE(f.reading_count, 0) AS reading_count,
+        COALESCE(f.anchor_day, 0) AS anchor_day,
+        COALESCE(f.weight_sum, 0) AS weight_sum,
+        COALESCE(f.weighted_day_sum, 0) AS weighted_day_sum,
+        COALESCE(f.weighted_hourmeter_sum, 0) AS weighted_hourmeter_sum,
+        COALESCE(f.weighted_day_square_sum, 0) AS weighted_day_square_sum,
+        COALESCE(f.weighted_day_hourmeter_sum, 0) AS weighted_day_hourmeter_sum,
+        f.last_hourmeter,
+        f.maintenance_flagged_day
+    FROM equipment e
+    LEFT JOIN equipment_usage_fits f ON f.equipment_id = e.id
+    WHERE e.is_active = TRUE
+        AND e.status <> 'retired'
+        AND (CAST(:company_id AS INTEGER) IS NULL OR e.company_id = :company_id)
+        AND (CAST(:equipment_type AS VARCHAR) IS NULL OR e.equipment_type = :equipment_type)
+        AND (CAST(:equipment_ids AS INTEGER[]) IS NULL OR e.id = ANY(:equipment_ids))
+    ORDER BY e.id
+"""
+
+
+def _column(rows: List[Any], name: str) -> np.ndarray:
+    """One result column as floats, NULL as NaN"""
+    return np.array([getattr(row, name) for row in rows], dtype=float)
+
+
+def _day_datetime(day: float) -> Optional[datetime]:
+    """UTC midnight of a (fractional) day number, None for NaN"""
+    if np.isnan(day):
+        return None
+    return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(days=int(np.floor(day)))
+
+
+class MaintenanceForecastService:
+    """
+    Predictive maintenance from daily report hourmeter readings.
+
+    Each equipment's hourmeter is fitted against time by weighted least
+    squares, with readings losing half their weight every
+    REPORTS_MAINTENANCE_HALF_LIFE_DAYS so the growth rate follows recent
+    use. Only the five weighted sums are stored. An approved report is
+    folded in once, by shifting and decaying its unit's sums to the new
+    latest day and adding the reading, so forecasts stay current without
+    refitting history. Services are assumed to happen every
+    service-interval hours (REPORTS_MAINTENANCE_INTERVAL_HOURS unless the
+    equipment specifications say otherwise), and the next one is
+    projected where the fitted line crosses the next multiple.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def fit_reports(self, report_ids: Optional[List[int]] = None) -> int:
+        """
+        Fold approved, not yet fitted reports into their equipment's fit.
+
+        Runs in the caller's transaction so approval and fitting commit
+        together. Without report_ids one batch of pending approvals is
+        fitted, oldest first.
+
+        Args:
+            report_ids: Reports to fit, or None for pending ones
+
+        Returns:
+            Number of reports fitted
+        """
+        readings = self.db.execute(text(_MARK_SQL), {
+            'report_ids': report_ids,
+            'batch_size': FIT_BATCH_SIZE
+        }).fetchall()
+        if readings:
+            self._fold(readings)
+        return len(readings)
+
+    def fit_pending(self) -> None:
+        """Fit approvals that bypassed the approval endpoint, one committed batch at a time"""
+        while self.db.execute(text("""
+            SELECT EXISTS (
+                SELECT 1 FROM daily_reports
+                WHERE status = 'approved' AND maintenance_fitted_at IS NULL
+            )
+        """)).scalar():
+            self.fit_reports()
+            self.db.commit()
+
+    def _fold(self, readings: List[Any]) -> None:
+        """Add readings to the stored sums of their equipment, every unit at once"""
+        ids, unit = np.unique([row.equipment_id for row in readings], return_inverse=True)
+        day = _column(readings, 'day')
+        hourmeter = _column(readings, 'hourmeter')
+        flagged = np.array([row.maintenance_needed for row in readings], dtype=bool)
+        units = len(ids)
+
+        # Create missing fits first so concurrent folds of a new unit serialize on its row lock
+        self.db.execute(text("""
+            INSERT INTO equipment_usage_fits (equipment_id)
+            SELECT UNNEST(CAST(:ids AS INTEGER[]))
+            ON CONFLICT (equipment_id) DO NOTHING
+        """), {'ids': ids.tolist()})
+        stored = self.db.execute(text(f"""
+            SELECT equipment_id, reading_count, anchor_day, {', '.join(_SUM_COLUMNS)},
+                last_hourmeter, maintenance_flagged_day
+            FROM equipment_usage_fits
+            WHERE equipment_id = ANY(:ids)
+            ORDER BY equipment_id
+            FOR UPDATE
+        """), {'ids': ids.tolist()}).fetchall()
+        count = _column(stored, 'reading_count')
+        sw, swx, swy, swxx, swxy = (_column(stored, name) for name in _SUM_COLUMNS)
+
+        latest = np.full(units, -np.inf)
+        np.maximum.at(latest, unit, day)
+        old_anchor = _column(stored, 'anchor_day')
+        anchor = np.where(count > 0, np.maximum(old_anchor, latest), latest)
+
+        # Move the stored sums to the new anchor: x' = x - shift, weights decay by 2^(-shift / half life)
+        shift = anchor - old_anchor
+        keep = np.where(count > 0, np.exp2(-shift / settings.REPORTS_MAINTENANCE_HALF_LIFE_DAYS), 0.0)
+        sw, swx, swy, swxx, swxy = (
+            keep * sw,
+            keep * (swx - shift * sw),
+            keep * swy,
+            keep * (swxx - 2 * shift * swx + shift ** 2 * sw),
+            keep * (swxy - shift * swy)
+        )
+
+        x = day - anchor[unit]
+        w = np.exp2(x / settings.REPORTS_MAINTENANCE_HALF_LIFE_DAYS)
+        sw += np.bincount(unit, weights=w, minlength=units)
+        swx += np.bincount(unit, weights=w * x, minlength=units)
+        swy += np.bincount(unit, weights=w * hourmeter, minlength=units)
+        swxx += np.bincount(unit, weights=w * x * x, minlength=units)
+        swxy += np.bincount(unit, weights=w * x * hourmeter, minlength=units)
+
+        last_hourmeter = np.full(units, -np.inf)
+        np.maximum.at(last_hourmeter, unit, hourmeter)
+        last_hourmeter = np.fmax(_column(stored, 'last_hourmeter'), last_hourmeter)
+        flagged_day = np.full(units, -np.inf)
+        np.maximum.at(flagged_day, unit, np.where(flagged, day, -np.inf))
+        flagged_day = np.fmax(_column(stored, 'maintenance_flagged_day'), flagged_day)
+
+        self.db.execute(text(_STORE_SQL), {
+            'equipment_id': ids.tolist(),
+            'reading_count': (count + np.bincount(unit, minlength=units)).astype(np.int64).tolist(),
+            'anchor_day': anchor.astype(np.int64).tolist(),
+            'weight_sum': sw.tolist(),
+            'weighted_day_sum': swx.tolist(),
+            'weighted_hourmeter_sum': swy.tolist(),
+            'weighted_day_square_sum': swxx.tolist(),
+            'weighted_day_hourmeter_sum': swxy.tolist(),
+            'last_hourmeter': last_hourmeter.tolist(),
+            'maintenance_flagged_day': [
+                int(value) if np.isfinite(value) else None for value in flagged_day
+            ]
+        })
+
+    def get_forecasts(
+        self,
+        as_of: date,
+        company_id: Optional[int] = None,
+        equipment_type: Optional[str] = None,
+        equipment_ids: Optional[List[int]] = None
+    ) -> List[MaintenanceScheduleReport]:
+        """
+        Next service of each active unit, projected from its fit.
+
+        Growth rates and crossings are computed for the whole selection in
+        one set of NumPy vector operations. The last service is estimated
+        where the fitted line crossed the previous interval multiple. A
+        maintenance_needed report since then makes the service critical.
+        Units with fewer than two reading days, or idle ones, get no dates.
+
+        Args:
+            as_of: Day the forecast is made on
+            company_id: Restrict to one company's equipment
+            equipment_type: Restrict to one equipment type
+            equipment_ids: Restrict to these units
+
+        Returns:
+            Forecasts ordered by equipment ID
+        """
+        rows = self.db.execute(text(_FORECAST_SQL), {
+            'company_id': company_id,
+            'equipment_type': equipment_type.lower() if equipment_type else None,
+            'equipment_ids': equipment_ids
+        }).fetchall()
+        if not rows:
+            return []
+
+        today = float((as_of - _EPOCH).days)
+        count = _column(rows, 'reading_count')
+        sw, swx, swy, swxx, swxy = (_column(rows, name) for name in _SUM_COLUMNS)
+        denominator = sw * swxx - swx ** 2
+        fitted = (count >= 2) & (denominator > 1e-9 * sw ** 2)
+        rate = np.divide(
+            sw * swxy - swx * swy, denominator,
+            out=np.full(len(rows), np.nan), where=fitted
+        )
+        rate[~(rate >= MIN_HOURS_PER_DAY)] = np.nan
+
+        hourmeter = np.fmax(_column(rows, 'last_hourmeter'), _column(rows, 'hourmeter_reading'))
+        reading_day = np.where(count > 0, _column(rows, 'anchor_day'), today)
+        interval = _column(rows, 'service_interval')
+        interval = np.where(interval > 0, interval, settings.REPORTS_MAINTENANCE_INTERVAL_HOURS)
+
+        completed = np.floor(hourmeter / interval)
+        next_hours = (completed + 1) * interval
+        due_day = reading_day + (next_hours - hourmeter) / rate
+        last_day = np.where(completed > 0, reading_day - (hourmeter - completed * interval) / rate, np.nan)
+        days_until = due_day - today
+
+        flagged_day = _column(rows, 'maintenance_flagged_day')
+        requested = flagged_day >= np.where(np.isnan(last_day), today - DUE_LATER_DAYS, last_day)
+        major = (completed + 1) % settings.REPORTS_MAINTENANCE_MAJOR_SERVICE_EVERY == 0
+        cost = (
+            _column(rows, 'purchase_cost') * settings.REPORTS_MAINTENANCE_SERVICE_COST_PERCENT / 100
+            * np.where(major, settings.REPORTS_MAINTENANCE_MAJOR_SERVICE_EVERY, 1)
+        )
+
+        unknown = np.isnan(days_until)
+        priority = np.select(
+            [requested | (days_until < 0), days_until <= DUE_SOON_DAYS, days_until <= DUE_LATER_DAYS],
+            ['critical', 'high', 'medium'],
+            'low'
+        )
+        status = np.select(
+            [requested, unknown & fitted, unknown, days_until < 0, days_until <= DUE_SOON_DAYS],
+            ['requested', 'idle', 'insufficient_data', 'overdue', 'due_soon'],
+            'scheduled'
+        )
+
+        return [
+            MaintenanceScheduleReport(
+                equipment_id=row.id,
+                equipment_name=row.name,
+                equipment_type=row.equipment_type,
+                hourmeter=round(float(hourmeter[i]), 1),
+                hours_per_day=None if np.isnan(rate[i]) else round(float(rate[i]), 2),
+                service_interval_hours=float(interval[i]),
+                next_service_hours=float(next_hours[i]),
+                last_maintenance=_day_datetime(last_day[i]),
+                next_maintenance=_day_datetime(due_day[i]),
+                days_until=None if unknown[i] else int(np.floor(days_until[i])),
+                maintenance_type='major_service' if major[i] else 'routine_service',
+                estimated_cost=round(float(cost[i]), 2),
+                priority=str(priority[i]),
+                status=str(status[i])
+            )
+            for i, row in enumerate(rows)
+        ]
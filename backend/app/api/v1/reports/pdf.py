@@ -0,0 +1,227 @@
+"""
+PDF report rendering
+Draws a ReportTable page by page with reportlab, reusing fonts, logo and page layouts across renders
+"""
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, BinaryIO, Callable, NamedTuple, Optional, Sequence, Tuple
+import logging
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from app.core.config import settings
+from app.api.v1.reports.builders import ReportTable
+
+logger = logging.getLogger(__name__)
+
+PAGE_WIDTH, PAGE_HEIGHT = landscape(A4)
+MARGIN = 36
+HEADER_HEIGHT = 48
+COLUMN_HEADER_HEIGHT = 16
+ROW_HEIGHT = 12
+FOOTER_HEIGHT = 20
+FONT_SIZE = 8
+TITLE_SIZE = 14
+
+# Per-document forms: page chrome, and the column header row drawn at y = 0
+_PAGE_FORM = "report_page"
+_COLUMNS_FORM = "report_columns"
+
+_ROW_SHADE = colors.Color(0.95, 0.95, 0.95)
+_HEADER_FILL = colors.Color(0.85, 0.87, 0.9)
+
+
+class TableLayout(NamedTuple):
+    x: Tuple[float, ...]
+    widths: Tuple[float, ...]
+    max_chars: Tuple[int, ...]
+
+
+@lru_cache(maxsize=None)
+def report_fonts() -> Tuple[str, str]:
+    """
+    Regular and bold font names, registering the configured TrueType fonts once per process.
+
+    Falls back to the built-in Helvetica when none are configured or they fail to load.
+    """
+    if not settings.REPORTS_PDF_FONT_PATH:
+        return "Helvetica", "Helvetica-Bold"
+    try:
+        pdfmetrics.registerFont(TTFont("ReportFont", settings.REPORTS_PDF_FONT_PATH))
+        bold_path = settings.REPORTS_PDF_BOLD_FONT_PATH or settings.REPORTS_PDF_FONT_PATH
+        pdfmetrics.registerFont(TTFont("ReportFont-Bold", bold_path))
+    except Exception as e:
+        logger.warning(f"Could not load report fonts, using Helvetica: {e}")
+        return "Helvetica", "Helvetica-Bold"
+    return "ReportFont", "ReportFont-Bold"
+
+
+@lru_cache(maxsize=None)
+def report_logo() -> Optional[Tuple[ImageReader, float, float]]:
+    """Decoded logo and its drawn size, loaded once per process; None when not configured"""
+    if not settings.REPORTS_PDF_LOGO_PATH:
+        return None
+    try:
+        logo = ImageReader(settings.REPORTS_PDF_LOGO_PATH)
+    except Exception as e:
+        logger.warning(f"Could not load report logo: {e}")
+        return None
+    width, height = logo.getSize()
+    scale = (HEADER_HEIGHT - 12) / height
+    return logo, width * scale, height * scale
+
+
+@lru_cache(maxsize=64)
+def table_layout(columns: Tuple[str, ...]) -> TableLayout:
+    """Column positions and widths, shared by every render of the same column set"""
+    weights = [max(len(column), 6) for column in columns]
+    usable = PAGE_WIDTH - 2 * MARGIN
+    widths = tuple(usable * weight / sum(weights) for weight in weights)
+    x = []
+    position = MARGIN
+    for width in widths:
+        x.append(position)
+        position += width
+    # Helvetica averages about half the font size per character
+    max_chars = tuple(max(3, int((width - 4) / (FONT_SIZE * 0.5))) for width in widths)
+    return TableLayout(tuple(x), widths, max_chars)
+
+
+def _cell_text(value: Any, max_chars: int) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        text = "Yes" if value else "No"
+    elif isinstance(value, int):
+        text = f"{value:,}"
+    elif isinstance(value, float):
+        text = f"{value:,.2f}"
+    else:
+        text = str(value)
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+
+def _draw_forms(pdf: canvas.Canvas, table: ReportTable, layout: TableLayout, generated: str) -> None:
+    """Record the page chrome and the column header once; every page references them"""
+    regular, bold = report_fonts()
+    logo = report_logo()
+    top = PAGE_HEIGHT - MARGIN
+
+    pdf.beginForm(_PAGE_FORM)
+    title_x = float(MARGIN)
+    if logo is not None:
+        image, width, height = logo
+        pdf.drawImage(image, MARGIN, top - height, width, height, mask='auto')
+        title_x += width + 12
+    pdf.setFont(bold, TITLE_SIZE)
+    pdf.drawString(title_x, top - TITLE_SIZE, table.title)
+    pdf.setFont(regular, FONT_SIZE + 1)
+    pdf.drawString(title_x, top - TITLE_SIZE - 14, table.period)
+    pdf.drawRightString(PAGE_WIDTH - MARGIN, top - TITLE_SIZE, f"Generated {generated}")
+    pdf.setStrokeColor(colors.grey)
+    pdf.line(MARGIN, MARGIN + FOOTER_HEIGHT - 6, PAGE_WIDTH - MARGIN, MARGIN + FOOTER_HEIGHT - 6)
+    pdf.endForm()
+
+    pdf.beginForm(_COLUMNS_FORM)
+    pdf.setFillColor(_HEADER_FILL)
+    pdf.rect(MARGIN, 0, PAGE_WIDTH - 2 * MARGIN, COLUMN_HEADER_HEIGHT, stroke=0, fill=1)
+    pdf.setFillColor(colors.black)
+    pdf.setFont(bold, FONT_SIZE)
+    for column, x, max_chars in zip(table.columns, layout.x, layout.max_chars):
+        pdf.drawString(x + 2, 5, _cell_text(column, max_chars))
+    pdf.endForm()
+
+
+def _draw_columns(pdf: canvas.Canvas, top: float) -> float:
+    """Place the column header below top; returns the baseline of the first row"""
+    pdf.saveState()
+    pdf.translate(0, top - COLUMN_HEADER_HEIGHT)
+    pdf.doForm(_COLUMNS_FORM)
+    pdf.restoreState()
+    return top - COLUMN_HEADER_HEIGHT - ROW_HEIGHT + 3
+
+
+def _draw_summary(pdf: canvas.Canvas, summary: Sequence[Tuple[str, Any]], y: float) -> float:
+    regular, bold = report_fonts()
+    for label, value in summary:
+        pdf.setFont(bold, FONT_SIZE + 1)
+        pdf.drawString(MARGIN, y, f"{label}:")
+        pdf.setFont(regular, FONT_SIZE + 1)
+        pdf.drawString(MARGIN + 160, y, _cell_text(value, 80))
+        y -= ROW_HEIGHT + 2
+    return y - 6
+
+
+def write_pdf(table: ReportTable, output: BinaryIO, progress: Callable[[int], None]) -> None:
+    """
+    Render a report as a landscape A4 PDF.
+
+    Rows are drawn straight onto the canvas, with no flowables, so
+    rendering cost stays linear in the row count. The page chrome and
+    column header are form XObjects written once and referenced by every
+    page. Progress is reported once per page.
+    """
+    regular, _ = report_fonts()
+    layout = table_layout(tuple(table.columns))
+    generated = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+    pdf = canvas.Canvas(output, pagesize=(PAGE_WIDTH, PAGE_HEIGHT), pageCompression=1)
+    pdf.setTitle(table.title)
+    pdf.setAuthor(settings.PROJECT_NAME)
+    _draw_forms(pdf, table, layout, generated)
+
+    content_top = PAGE_HEIGHT - MARGIN - HEADER_HEIGHT
+    bottom = MARGIN + FOOTER_HEIGHT
+    page = 1
+
+    def start_page(top: float) -> float:
+        pdf.doForm(_PAGE_FORM)
+        row_y = _draw_columns(pdf, top)
+        pdf.setFont(regular, FONT_SIZE)
+        return row_y
+
+    def finish_page() -> None:
+        pdf.setFont(regular, FONT_SIZE)
+        pdf.drawRightString(PAGE_WIDTH - MARGIN, MARGIN, f"Page {page}")
+        pdf.showPage()
+
+    # The summary opens the first page, above the table
+    top = content_top
+    if table.summary:
+        top = _draw_summary(pdf, table.summary, content_top - ROW_HEIGHT) + ROW_HEIGHT
+    y = start_page(top)
+    written = 0
+    for index, row in enumerate(table.rows):
+        if y < bottom:
+            finish_page()
+            progress(written)
+            page += 1
+            y = start_page(content_top)
+        if index % 2:
+            pdf.setFillColor(_ROW_SHADE)
+            pdf.rect(MARGIN, y - 3, PAGE_WIDTH - 2 * MARGIN, ROW_HEIGHT, stroke=0, fill=1)
+            pdf.setFillColor(colors.black)
+        for value, x, width, max_chars in zip(row, layout.x, layout.widths, layout.max_chars):
+            text = _cell_text(value, max_chars)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                pdf.drawRightString(x + width - 2, y, text)
+            else:
+                pdf.drawString(x + 2, y, text)
+        y -= ROW_HEIGHT
+        written += 1
+
+    finish_page()
+    pdf.save()
+    progress(written)
+
+
+def warm_pdf_caches() -> None:
+    """Load fonts and logo before the first render of a worker process"""
+    report_fonts()
+    report_logo()
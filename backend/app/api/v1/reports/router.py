@@ -4,23 +4,54 @@ Provides endpoints for equipment valuation, performance analytics, and cost anal
 """
 
 from typing import List, Optional
-from datetime import datetime, timedelta
+import os
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.deps import get_current_user, get_db
 from app.models.user import User
+from app.api.v1.reports.builders import REPORT_BUILDERS, report_period
+from app.api.v1.reports.jobs import ReportJobService, cached_report_file, start_report_job
 from app.api.v1.reports.schemas import (
-    ReportRequest, ReportResponse, KPIMetrics, EquipmentPerformanceReport,
-    FinancialSummary, ReportListResponse
+    ReportRequest, ReportResponse, ReportJobStatus, KPIMetrics, EquipmentPerformanceReport,
+    FinancialSummary, OperatorPerformanceList, MaintenanceScheduleReport, ReportListResponse
 )
+from app.api.v1.reports.maintenance import MaintenanceForecastService
+from app.api.v1.reports.service import ReportsService
+from app.api.v1.reports.writers import REPORT_FORMATS
 
 router = APIRouter()
 
 
+def _job_file_url(job) -> str:
+    return f"{settings.API_V1_STR}/reports/jobs/{job.id}/download"
+
+
+def _job_status(job) -> ReportJobStatus:
+    return ReportJobStatus(
+        job_id=job.id,
+        report_type=job.report_type,
+        format=job.format,
+        status=job.status,
+        progress=job.progress,
+        message=job.message,
+        file_url=_job_file_url(job) if job.status == "completed" else None,
+        file_size=job.file_size,
+        row_count=job.row_count,
+        error_message=job.error_message,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at
+    )
+
+
 @router.get("/kpis", response_model=KPIMetrics, summary="Get KPI Metrics")
 def get_kpi_metrics(
-    date_range: int = Query(30, description="Number of days for metrics calculation"),
+    date_range: int = Query(30, ge=1, le=3650, description="Number of days for metrics calculation"),
+    company_id: Optional[int] = Query(None, description="Restrict metrics to one company's equipment"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -34,6 +65,9 @@ def get_kpi_metrics(
     - Daily report compliance
     - Equipment downtime
     - ROI analysis
+    
+    Results are cached per company and date range until the underlying
+    reports, schedules or equipment change.
     """
     
     # Check if user has permission to view reports
@@ -41,24 +75,14 @@ def get_kpi_metrics(
     if "report_view" not in user_permissions:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    # Mock KPI data - in real implementation, this would query the database
-    # and calculate actual metrics based on equipment usage, costs, etc.
-    return KPIMetrics(
-        equipment_utilization_rate=87.0,
-        cost_savings_vs_rental=2500000.0,
-        timesheet_completion_rate=96.0,
-        daily_report_compliance=98.0,
-        equipment_downtime=4.2,
-        average_equipment_roi=285.0,
-        date_range=date_range,
-        last_updated=datetime.now()
-    )
+    return ReportsService(db).get_kpi_metrics(date_range, company_id)
 
 
 @router.get("/equipment-performance", response_model=List[EquipmentPerformanceReport])
 def get_equipment_performance(
     equipment_type: Optional[str] = Query(None, description="Filter by equipment type"),
-    date_range: int = Query(30, description="Number of days for analysis"),
+    date_range: int = Query(30, ge=1, le=3650, description="Number of days for analysis"),
+    company_id: Optional[int] = Query(None, description="Restrict to one company's equipment"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -77,72 +101,14 @@ def get_equipment_performance(
     if "report_view" not in user_permissions:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    # Mock equipment performance data
-    equipment_data = [
-        EquipmentPerformanceReport(
-            id=1,
-            equipment_name="CAT 320D Excavator",
-            equipment_type="Excavator",
-            utilization_rate=89.0,
-            total_hours=186,
-            cost_per_hour=1200.0,
-            total_cost=223200.0,
-            roi=340.0,
-            status="active",
-            last_maintenance=datetime.now() - timedelta(days=15),
-            next_maintenance=datetime.now() + timedelta(days=45)
-        ),
-        EquipmentPerformanceReport(
-            id=2,
-            equipment_name="Volvo A40F Truck",
-            equipment_type="Dump Truck",
-            utilization_rate=92.0,
-            total_hours=201,
-            cost_per_hour=950.0,
-            total_cost=190950.0,
-            roi=280.0,
-            status="active",
-            last_maintenance=datetime.now() - timedelta(days=8),
-            next_maintenance=datetime.now() + timedelta(days=52)
-        ),
-        EquipmentPerformanceReport(
-            id=3,
-            equipment_name="JCB 3CX Backhoe",
-            equipment_type="Backhoe",
-            utilization_rate=78.0,
-            total_hours=156,
-            cost_per_hour=800.0,
-            total_cost=124800.0,
-            roi=195.0,
-            status="maintenance",
-            last_maintenance=datetime.now() - timedelta(days=2),
-            next_maintenance=datetime.now() + timedelta(days=58)
-        ),
-        EquipmentPerformanceReport(
-            id=4,
-            equipment_name="Liebherr LTM 1050",
-            equipment_type="Mobile Crane",
-            utilization_rate=85.0,
-            total_hours=145,
-            cost_per_hour=1800.0,
-            total_cost=261000.0,
-            roi=420.0,
-            status="active",
-            last_maintenance=datetime.now() - timedelta(days=22),
-            next_maintenance=datetime.now() + timedelta(days=38)
-        )
-    ]
-    
-    # Filter by equipment type if specified
-    if equipment_type:
-        equipment_data = [eq for eq in equipment_data if eq.equipment_type.lower() == equipment_type.lower()]
-    
-    return equipment_data
+    return ReportsService(db).get_equipment_performance(date_range, equipment_type, company_id)
 
 
 @router.get("/financial-summary", response_model=FinancialSummary)
 def get_financial_summary(
-    date_range: int = Query(30, description="Number of days for financial analysis"),
+    date_range: int = Query(30, ge=1, le=3650, description="Number of days for financial analysis"),
+    company_id: Optional[int] = Query(None, description="Restrict to one company"),
+    project_name: Optional[str] = Query(None, description="Restrict revenue and fuel to one project"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -153,7 +119,10 @@ def get_financial_summary(
     - Total operational costs
     - Cost savings analysis
     - Budget adherence
-    - Revenue projections
+    - Revenue from approved daily reports
+    
+    Summed from the per-day financial ledger, which approved reports are
+    posted to as they are approved.
     """
     
     # Check permissions
@@ -161,18 +130,69 @@ def get_financial_summary(
     if "report_view" not in user_permissions:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    return FinancialSummary(
-        total_operational_cost=799950.0,
-        total_revenue=2285000.0,
-        cost_savings=2500000.0,
-        budget_adherence=94.5,
-        profit_margin=65.2,
-        date_range=date_range,
-        last_updated=datetime.now()
+    return ReportsService(db).get_financial_summary(date_range, company_id, project_name)
+
+
+@router.get("/operator-performance", response_model=OperatorPerformanceList)
+def get_operator_performance(
+    date_range: int = Query(30, ge=1, le=3650, description="Number of days for analysis"),
+    company_id: Optional[int] = Query(None, description="Restrict to reports on one company's equipment"),
+    equipment_type: Optional[str] = Query(None, description="Restrict to reports on one equipment type"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get operator performance analytics
+    
+    Ranks every operator with counted daily reports in the period by:
+    - Total hours and equipment mix
+    - Fuel burned per working hour
+    - On-time report submission rate
+    - Earnings at the operator profile's hourly rate
+    
+    Ranks are computed across all operators before the page is cut.
+    """
+    
+    # Check permissions
+    user_permissions = [perm.name for role in current_user.roles for perm in role.permissions]
+    if "report_view" not in user_permissions:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    operators, total = ReportsService(db).get_operator_performance(
+        date_range, company_id, equipment_type, skip=skip, limit=limit
     )
+    return OperatorPerformanceList(operators=operators, total=total, skip=skip, limit=limit)
 
 
-@router.post("/generate", response_model=ReportResponse)
+@router.get("/maintenance-schedule", response_model=List[MaintenanceScheduleReport])
+def get_maintenance_schedule(
+    equipment_type: Optional[str] = Query(None, description="Filter by equipment type"),
+    company_id: Optional[int] = Query(None, description="Restrict to one company's equipment"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get projected maintenance for each equipment unit
+    
+    Service dates are projected from each unit's hourmeter growth, fitted
+    to its approved daily reports, and its service interval. Units whose
+    operators reported maintenance needed since the last service are
+    critical.
+    """
+    
+    # Check permissions
+    user_permissions = [perm.name for role in current_user.roles for perm in role.permissions]
+    if "report_view" not in user_permissions:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    maintenance = MaintenanceForecastService(db)
+    maintenance.fit_pending()
+    return maintenance.get_forecasts(datetime.now(timezone.utc).date(), company_id, equipment_type)
+
+
+@router.post("/generate", response_model=ReportResponse, status_code=202)
 def generate_report(
     report_request: ReportRequest,
     current_user: User = Depends(get_current_user),
@@ -187,6 +207,12 @@ def generate_report(
     - cost_analysis: Equipment usage costs and budget adherence
     - operator_performance: Operator productivity and salary calculations
     - maintenance_schedule: Equipment maintenance tracking
+    
+    The report is generated by a background worker: the response carries the
+    job ID to poll at /reports/jobs/{job_id}. Identical requests made while
+    a job is still running join that job instead of starting another, and
+    a report already built from the current data is returned completed
+    right away.
     """
     
     # Check permissions
@@ -200,36 +226,111 @@ def generate_report(
         "operator_performance", "maintenance_schedule"
     ]
     
-    if report_request.report_type not in valid_types:
+    report_type = report_request.report_type.strip().lower()
+    if report_type not in valid_types:
         raise HTTPException(status_code=400, detail=f"Invalid report type. Must be one of: {valid_types}")
+    if report_type not in REPORT_BUILDERS:
+        raise HTTPException(status_code=400, detail=f"Generating {report_type} reports is not supported yet")
+    if report_request.format.strip().upper() not in REPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid report format. Must be one of: {list(REPORT_FORMATS)}"
+        )
+    try:
+        report_period(report_request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # In real implementation, this would:
-    # 1. Query database based on filters
-    # 2. Process data according to report type
-    # 3. Generate PDF/Excel file
-    # 4. Store file and return download URL
+    try:
+        job, created = ReportJobService(db).submit(report_request, current_user.id)
+        if created:
+            start_report_job(job.id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue report: {str(e)}")
+    
+    if job.status == "completed":
+        return ReportResponse(
+            report_id=job.id,
+            report_type=job.report_type,
+            status="completed",
+            file_url=_job_file_url(job),
+            generated_at=job.finished_at,
+            file_size=job.file_size
+        )
     
     return ReportResponse(
-        report_id=f"RPT_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-        report_type=report_request.report_type,
-        status="completed",
-        file_url=f"/api/v1/reports/download/{report_request.report_type}_{datetime.now().strftime('%Y%m%d')}.pdf",
-        generated_at=datetime.now(),
-        file_size=1024 * 256  # Mock file size in bytes
+        report_id=job.id,
+        report_type=job.report_type,
+        status="generating",
+        file_url=None,
+        generated_at=job.created_at
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=ReportJobStatus)
+def get_report_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the status and progress of a report generation job"""
+    
+    user_permissions = [perm.name for role in current_user.roles for perm in role.permissions]
+    if "report_view" not in user_permissions:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    job = ReportJobService(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    
+    return _job_status(job)
+
+
+@router.get("/jobs/{job_id}/download")
+def download_report_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Download the file of a completed report job"""
+    
+    user_permissions = [perm.name for role in current_user.roles for perm in role.permissions]
+    if "report_view" not in user_permissions:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    job = ReportJobService(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job.status != "completed":
+        raise HTTPException(status_code=400, detail=f"Report is not ready (status: {job.status})")
+    
+    if not os.path.isfile(job.file_path):
+        raise HTTPException(status_code=404, detail="Report file no longer exists")
+    
+    report_format = REPORT_FORMATS[job.format]
+    return FileResponse(
+        job.file_path,
+        media_type=report_format.media_type,
+        filename=f"{job.report_type}_{job.created_at.strftime('%Y%m%d')}.{report_format.extension}"
     )
 
 
 @router.get("/export/{report_type}")
-def export_report_pdf(
+async def export_report_pdf(
     report_type: str,
-    date_range: int = Query(30, description="Number of days for report data"),
+    date_range: int = Query(30, ge=1, le=3650, description="Number of days for report data"),
+    equipment_type: Optional[str] = Query(None, description="Filter by equipment type"),
+    company_id: Optional[int] = Query(None, description="Restrict to one company's equipment"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Export report as PDF
     
-    Generates and returns a PDF file for the specified report type
+    Renders the report in a report worker process and streams the PDF back
+    in chunks, so large documents never sit in API worker memory. Renders
+    are cached: the same export is served from disk until reports,
+    schedules or equipment change.
     """
     
     # Check export permissions
@@ -237,17 +338,36 @@ def export_report_pdf(
     if "report_export" not in user_permissions:
         raise HTTPException(status_code=403, detail="Not enough permissions to export reports")
     
-    # In real implementation, this would:
-    # 1. Generate the report data
-    # 2. Create PDF using reportlab or similar
-    # 3. Return the PDF file as response
-    
-    # For now, return a success message
-    return {
-        "message": f"PDF export for {report_type} initiated",
-        "file_name": f"{report_type}_{datetime.now().strftime('%Y%m%d')}.pdf",
-        "status": "generating"
-    }
+    report_type = report_type.strip().lower()
+    if report_type not in REPORT_BUILDERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid report type. Must be one of: {list(REPORT_BUILDERS)}"
+        )
+    
+    end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    report_request = ReportRequest(
+        report_type=report_type,
+        date_from=end - timedelta(days=date_range - 1),
+        date_to=end,
+        equipment_filter=equipment_type,
+        format="PDF",
+        filters={"company_id": company_id} if company_id is not None else None
+    )
+    
+    try:
+        chunks = await cached_report_file(db, report_request, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export report: {str(e)}")
+    
+    file_name = f"{report_type}_{end.strftime('%Y%m%d')}.pdf"
+    return StreamingResponse(
+        chunks,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
 
 
 @router.get("/available", response_model=ReportListResponse)
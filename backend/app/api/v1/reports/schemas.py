@@ -30,6 +30,23 @@ class ReportResponse(BaseModel):
     error_message: Optional[str] = Field(None, description="Error message if generation failed")
 
 
+class ReportJobStatus(BaseModel):
+    """State of a background report generation job"""
+    job_id: str = Field(..., description="Report job identifier")
+    report_type: str = Field(..., description="Type of report being generated")
+    format: str = Field(..., description="Output format")
+    status: str = Field(..., description="Job status (queued, running, completed, failed, expired)")
+    progress: int = Field(..., description="Completion percentage")
+    message: Optional[str] = Field(None, description="Current step")
+    file_url: Optional[str] = Field(None, description="Download URL once completed")
+    file_size: Optional[int] = Field(None, description="File size in bytes")
+    row_count: Optional[int] = Field(None, description="Number of data rows in the report")
+    error_message: Optional[str] = Field(None, description="Error message if generation failed")
+    created_at: datetime = Field(..., description="When the job was requested")
+    started_at: Optional[datetime] = Field(None, description="When a worker started the job")
+    finished_at: Optional[datetime] = Field(None, description="When the job completed or failed")
+
+
 class KPIMetrics(BaseModel):
     """Key Performance Indicators for equipment management"""
     equipment_utilization_rate: float = Field(..., description="Overall equipment utilization percentage")
@@ -97,21 +114,43 @@ class OperatorPerformanceReport(BaseModel):
     safety_incidents: int = Field(..., description="Number of safety incidents")
     efficiency_rating: float = Field(..., description="Efficiency rating percentage")
     salary_calculation: float = Field(..., description="Calculated salary/compensation")
+    report_count: int = Field(0, description="Counted daily reports in the period")
+    equipment_mix: Dict[str, float] = Field(default={}, description="Share of hours per equipment type, in percent")
+    fuel_per_hour: Optional[float] = Field(None, description="Fuel burned per working hour, in liters")
+    on_time_rate: float = Field(0.0, description="Percentage of reports submitted by the deadline")
+    hourly_rate: Optional[float] = Field(None, description="Hourly rate from the operator profile")
+    hours_rank: int = Field(0, description="Rank by total hours, 1 is most")
+    efficiency_rank: Optional[int] = Field(None, description="Rank by fuel per hour, 1 is least")
+    on_time_rank: int = Field(0, description="Rank by on-time submission rate, 1 is best")
     
     class Config:
         from_attributes = True
 
 
+class OperatorPerformanceList(BaseModel):
+    """One page of operator performance rows"""
+    operators: List[OperatorPerformanceReport] = Field(..., description="Operators ranked by total hours")
+    total: int = Field(..., description="Number of operators with reports in the period")
+    skip: int
+    limit: int
+
+
 class MaintenanceScheduleReport(BaseModel):
     """Maintenance scheduling and tracking model"""
     equipment_id: int = Field(..., description="Equipment ID")
     equipment_name: str = Field(..., description="Equipment name")
-    last_maintenance: datetime = Field(..., description="Date of last maintenance")
-    next_maintenance: datetime = Field(..., description="Next scheduled maintenance")
+    equipment_type: str = Field(..., description="Type of equipment")
+    hourmeter: float = Field(..., description="Latest hourmeter reading")
+    hours_per_day: Optional[float] = Field(None, description="Fitted hourmeter growth per day")
+    service_interval_hours: float = Field(..., description="Hours between services")
+    next_service_hours: float = Field(..., description="Hourmeter reading the next service is due at")
+    last_maintenance: Optional[datetime] = Field(None, description="Estimated date of last maintenance")
+    next_maintenance: Optional[datetime] = Field(None, description="Projected date of next maintenance")
+    days_until: Optional[int] = Field(None, description="Days until the next maintenance, negative when overdue")
     maintenance_type: str = Field(..., description="Type of maintenance required")
     estimated_cost: float = Field(..., description="Estimated maintenance cost")
     priority: str = Field(..., description="Maintenance priority (low, medium, high, critical)")
-    status: str = Field(..., description="Current maintenance status")
+    status: str = Field(..., description="Maintenance status (scheduled, due_soon, overdue, requested, idle, insufficient_data)")
     
     class Config:
         from_attributes = True
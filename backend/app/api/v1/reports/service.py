@@ -0,0 +1,606 @@
+"""
+Reports and Analytics service
+Computes report data from daily_reports, equipment_schedules and equipment with set-based queries
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
+import logging
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.api.v1.reports.cache import data_watermark, kpi_cache
+from app.api.v1.reports.ledger import FinancialLedgerService
+from app.api.v1.reports.maintenance import MaintenanceForecastService
+from app.api.v1.reports.schemas import (
+    EquipmentPerformanceReport, FinancialSummary, KPIMetrics, OperatorPerformanceReport
+)
+from app.api.v1.reports.snapshot import fresh_snapshot
+from app.api.v1.scheduling.recurrence import expand_rows
+from app.api.v1.scheduling.service import RECURRENCE_COLUMNS_SQL, WINDOW_OVERLAP_SQL
+
+logger = logging.getLogger(__name__)
+
+# Report statuses that count as work done
+COUNTED_STATUSES = ('submitted', 'approved')
+
+# Active, non-retired equipment, optionally of one company and type
+FLEET_SQL = """
+    SELECT
+        e.id, e.name, e.equipment_type, e.status,
+        COALESCE(e.hourly_rate, 0) AS hourly_rate,
+        COALESCE(e.purchase_cost, 0) AS purchase_cost,
+        COALESCE(e.fuel_capacity, 0) AS fuel_capacity
+    FROM equipment e
+    WHERE e.is_active = TRUE
+        AND e.status <> 'retired'
+        AND (CAST(:company_id AS INTEGER) IS NULL OR e.company_id = :company_id)
+        AND (CAST(:equipment_type AS VARCHAR) IS NULL OR e.equipment_type = :equipment_type)
+"""
+
+# Counted hours and fuel per equipment of the fleet in the window
+USAGE_SQL = """
+    SELECT
+        dr.equipment_id,
+        SUM(COALESCE(dr.hours_worked, 0)) AS hours,
+        SUM(COALESCE(dr.fuel_consumed, 0)) AS fuel_consumed
+    FROM daily_reports dr
+    JOIN fleet f ON f.id = dr.equipment_id
+    WHERE dr.report_date >= :start
+        AND dr.report_date < :end
+        AND dr.status = ANY(:counted_statuses)
+    GROUP BY dr.equipment_id
+"""
+
+# The same sums, precomputed from the usage snapshot and bound as arrays
+SNAPSHOT_USAGE_SQL = """
+    SELECT u.*
+    FROM UNNEST(
+        CAST(:usage_equipment_ids AS INTEGER[]),
+        CAST(:usage_hours AS FLOAT8[]),
+        CAST(:usage_fuel AS FLOAT8[])
+    ) AS u(equipment_id, hours, fuel_consumed)
+    JOIN fleet f ON f.id = u.equipment_id
+"""
+
+# fuel_consumed is the drop in tank level in percent; liters need the tank size
+FUEL_COST_SQL = "COALESCE({fuel}, 0) / 100.0 * {capacity} * :fuel_price"
+
+
+# Counted reports grouped per operator and equipment, then per operator, ranked across all operators.
+# The operator count is joined to the page so an out-of-range page still reports it.
+OPERATOR_PERFORMANCE_SQL = """
+    WITH operator_equipment AS (
+        SELECT
+            dr.operator_id,
+            e.id AS equipment_id,
+            e.name AS equipment_name,
+            e.equipment_type,
+            MAX(dr.operator_name) AS report_name,
+            COUNT(*) AS report_count,
+            SUM(COALESCE(dr.hours_worked, 0)) AS hours,
+            SUM(COALESCE(dr.fuel_consumed, 0) / 100.0 * COALESCE(e.fuel_capacity, 0)) AS fuel_liters,
+            COUNT(dr.submitted_at) AS submitted_count,
+            COUNT(*) FILTER (
+                WHERE dr.submitted_at <= COALESCE(dr.shift_end, dr.report_date)
+                    + :deadline_hours * INTERVAL '1 hour'
+            ) AS on_time_count,
+            COUNT(*) FILTER (WHERE NULLIF(TRIM(dr.safety_incidents), '') IS NOT NULL) AS safety_incidents
+        FROM daily_reports dr
+        JOIN equipment e ON e.id = dr.equipment_id
+        WHERE dr.report_date >= :start
+            AND dr.report_date < :end
+            AND dr.status = ANY(:counted_statuses)
+            AND (CAST(:company_id AS INTEGER) IS NULL OR e.company_id = :company_id)
+            AND (CAST(:equipment_type AS VARCHAR) IS NULL OR e.equipment_type = :equipment_type)
+        GROUP BY dr.operator_id, e.id
+    ),
+    operators AS (
+        SELECT
+            operator_id,
+            MAX(report_name) AS report_name,
+            SUM(report_count) AS report_count,
+            SUM(hours) AS hours,
+            SUM(fuel_liters) AS fuel_liters,
+            SUM(submitted_count) AS submitted_count,
+            SUM(on_time_count) AS on_time_count,
+            SUM(safety_incidents) AS safety_incidents,
+            ARRAY_AGG(equipment_name ORDER BY hours DESC, equipment_id) AS equipment_names,
+            ARRAY_AGG(equipment_type ORDER BY hours DESC, equipment_id) AS equipment_types,
+            ARRAY_AGG(hours ORDER BY hours DESC, equipment_id) AS equipment_hours
+        FROM operator_equipment
+        GROUP BY operator_id
+    ),
+    measured AS (
+        SELECT
+            o.*,
+            COALESCE(NULLIF(TRIM(CONCAT_WS(' ', u.first_name, u.last_name)), ''), o.report_name) AS operator_name,
+            op.hourly_rate,
+            o.fuel_liters / NULLIF(o.hours, 0) AS fuel_per_hour,
+            COALESCE(o.on_time_count * 100.0 / NULLIF(o.submitted_count, 0), 0) AS on_time_rate
+        FROM operators o
+        LEFT JOIN users u ON u.id = o.operator_id
+        LEFT JOIN operator_profiles op ON op.user_id = o.operator_id
+    ),
+    ranked AS (
+        SELECT
+            m.*,
+            RANK() OVER (ORDER BY m.hours DESC) AS hours_rank,
+            CASE WHEN m.fuel_per_hour IS NOT NULL
+                THEN RANK() OVER (ORDER BY m.fuel_per_hour ASC NULLS LAST) END AS efficiency_rank,
+            RANK() OVER (ORDER BY m.on_time_rate DESC) AS on_time_rank,
+            CUME_DIST() OVER (ORDER BY m.hours) * 100 AS productivity_score,
+            CASE WHEN m.fuel_per_hour IS NOT NULL
+                THEN CUME_DIST() OVER (ORDER BY m.fuel_per_hour DESC NULLS FIRST) * 100
+                ELSE 0 END AS efficiency_rating
+        FROM measured m
+    )
+    SELECT page.*, total.operator_count
+    FROM (SELECT COUNT(*) AS operator_count FROM operators) total
+    LEFT JOIN LATERAL (
+        SELECT * FROM ranked
+        ORDER BY hours_rank, operator_id
+        LIMIT :limit OFFSET :skip
+    ) page ON TRUE
+"""
+
+
+def report_window(date_range: int, end_day: Optional[date] = None) -> Tuple[datetime, datetime]:
+    """
+    Last date_range days up to end_day (today by default), ending at the following UTC midnight.
+
+    Day-aligned so every request of the same day shares cached results.
+    """
+    if end_day is None:
+        end_day = datetime.now(timezone.utc).date()
+    end = datetime(end_day.year, end_day.month, end_day.day, tzinfo=timezone.utc) + timedelta(days=1)
+    return end - timedelta(days=date_range), end
+
+
+def cost_parameters(date_range: int) -> Dict[str, Any]:
+    """Bind parameters for the fuel and ownership cost model"""
+    return {
+        'fuel_price': settings.REPORTS_FUEL_PRICE_PER_LITER,
+        'days': date_range,
+        'useful_life_days': settings.REPORTS_EQUIPMENT_USEFUL_LIFE_YEARS * 365.0,
+        'counted_statuses': list(COUNTED_STATUSES)
+    }
+
+
+class ReportsService:
+    """
+    Report computations shared by the reports endpoints.
+
+    Cost model: work is valued at the equipment's hourly_rate (what renting
+    it would cost), fuel at REPORTS_FUEL_PRICE_PER_LITER, and ownership as
+    straight-line depreciation of purchase_cost over
+    REPORTS_EQUIPMENT_USEFUL_LIFE_YEARS.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_kpi_metrics(self, date_range: int, company_id: Optional[int] = None) -> KPIMetrics:
+        """
+        Fleet KPIs over the last date_range days.
+
+        Computed with three grouped queries and cached per (company, date
+        range, day) under the data watermark of the source tables, so
+        dashboards re-aggregate only after reports, schedules or equipment
+        change.
+
+        Args:
+            date_range: Number of days to cover
+            company_id: Restrict to one company's equipment
+
+        Returns:
+            KPI metrics
+        """
+        start, end = report_window(date_range)
+        watermark = data_watermark(self.db)
+        key = f"{company_id or 'all'}:{date_range}:{end.date().isoformat()}:{watermark}"
+        cached, versioned_key = kpi_cache.lookup("kpis", key)
+        if cached is not None:
+            return KPIMetrics(**cached)
+
+        params = {
+            'company_id': company_id,
+            'equipment_type': None,
+            'start': start,
+            'end': end,
+            **cost_parameters(date_range)
+        }
+        usage_sql, usage_params = self._usage(start, end)
+        usage = self._fleet_usage_totals(usage_sql, {**params, **usage_params})
+        reporting = self._reporting_totals(params, min(end, datetime.now(timezone.utc)))
+
+        fleet_size = usage.fleet_size or 0
+        available_hours = fleet_size * date_range * settings.REPORTS_STANDARD_HOURS_PER_DAY
+
+        metrics = KPIMetrics(
+            equipment_utilization_rate=round(_percent(usage.hours, available_hours), 2),
+            cost_savings_vs_rental=round(float(usage.rental_value) - float(usage.ownership_cost), 2),
+            timesheet_completion_rate=round(
+                _percent(reporting.completed_count, reporting.report_count, empty=100.0), 2
+            ),
+            daily_report_compliance=round(
+                _percent(reporting.reported_days, reporting.scheduled_days, empty=100.0), 2
+            ),
+            equipment_downtime=round(_percent(usage.down_count, fleet_size), 2),
+            average_equipment_roi=round(float(usage.average_roi or 0.0), 2),
+            date_range=date_range,
+            last_updated=datetime.now(timezone.utc)
+        )
+        kpi_cache.store(versioned_key, metrics.model_dump(mode='json'))
+        return metrics
+
+    def get_equipment_performance(
+        self,
+        date_range: int,
+        equipment_type: Optional[str] = None,
+        company_id: Optional[int] = None,
+        end_day: Optional[date] = None
+    ) -> List[EquipmentPerformanceReport]:
+        """
+        Per-equipment hours, costs, utilization and ROI over the last date_range days.
+
+        One grouped query returns a row per unit of the (type-filtered)
+        fleet; costs, ROI and utilization are then computed as NumPy vectors
+        over the result columns. Maintenance dates are the units' current
+        forecasts from MaintenanceForecastService.
+
+        Args:
+            date_range: Number of days to cover
+            equipment_type: Restrict to one equipment type
+            company_id: Restrict to one company's equipment
+            end_day: Last day covered, today by default
+
+        Returns:
+            Performance rows ordered by equipment ID
+        """
+        start, end = report_window(date_range, end_day)
+        usage_sql, usage_params = self._usage(start, end)
+        rows = self.db.execute(text(f"""
+            WITH fleet AS ({FLEET_SQL}),
+            usage AS ({usage_sql})
+            SELECT
+                f.id, f.name, f.equipment_type, f.status,
+                f.hourly_rate, f.purchase_cost, f.fuel_capacity,
+                COALESCE(u.hours, 0) AS hours,
+                COALESCE(u.fuel_consumed, 0) AS fuel_consumed
+            FROM fleet f
+            LEFT JOIN usage u ON u.equipment_id = f.id
+            ORDER BY f.id
+        """), {
+            'company_id': company_id,
+            'equipment_type': equipment_type.lower() if equipment_type else None,
+            'start': start,
+            'end': end,
+            **usage_params,
+            **cost_parameters(date_range)
+        }).fetchall()
+        if not rows:
+            return []
+
+        columns = list(zip(*rows))
+        hourly_rate, purchase_cost, fuel_capacity, hours, fuel_consumed = (
+            np.array(column, dtype=float) for column in columns[4:9]
+        )
+
+        maintenance = MaintenanceForecastService(self.db)
+        maintenance.fit_pending()
+        forecasts = {
+            forecast.equipment_id: forecast
+            for forecast in maintenance.get_forecasts(
+                datetime.now(timezone.utc).date(), equipment_ids=list(columns[0])
+            )
+        }
+
+        rental_value = hours * hourly_rate
+        fuel_cost = fuel_consumed / 100.0 * fuel_capacity * settings.REPORTS_FUEL_PRICE_PER_LITER
+        ownership_cost = purchase_cost * date_range / (settings.REPORTS_EQUIPMENT_USEFUL_LIFE_YEARS * 365.0)
+        total_cost = fuel_cost + ownership_cost
+        cost_per_hour = np.divide(total_cost, hours, out=np.zeros_like(hours), where=hours > 0)
+        roi = np.divide(
+            (rental_value - total_cost) * 100, ownership_cost,
+            out=np.zeros_like(hours), where=ownership_cost > 0
+        )
+        utilization = hours / (date_range * settings.REPORTS_STANDARD_HOURS_PER_DAY) * 100
+
+        return [
+            EquipmentPerformanceReport(
+                id=equipment_id,
+                equipment_name=name,
+                equipment_type=kind,
+                utilization_rate=rate,
+                total_hours=total_hours,
+                cost_per_hour=per_hour,
+                total_cost=cost,
+                roi=unit_roi,
+                status=status,
+                last_maintenance=forecasts[equipment_id].last_maintenance if equipment_id in forecasts else None,
+                next_maintenance=forecasts[equipment_id].next_maintenance if equipment_id in forecasts else None
+            )
+            for equipment_id, name, kind, status, rate, total_hours, per_hour, cost, unit_roi in zip(
+                columns[0], columns[1], columns[2], columns[3],
+                np.round(utilization, 2).tolist(),
+                np.rint(hours).astype(np.int64).tolist(),
+                np.round(cost_per_hour, 2).tolist(),
+                np.round(total_cost, 2).tolist(),
+                np.round(roi, 2).tolist()
+            )
+        ]
+
+    def get_financial_summary(
+        self,
+        date_range: int,
+        company_id: Optional[int] = None,
+        project_name: Optional[str] = None,
+        end_day: Optional[date] = None
+    ) -> FinancialSummary:
+        """
+        Revenue, costs and margins over the last date_range days.
+
+        Revenue and fuel come from the financial ledger (approved reports,
+        pre-aggregated per day and project), so the cost of a summary grows
+        with the number of days rather than the number of reports. Ownership
+        cost and budgets are fleet-level and added from one small aggregate.
+        A company's budget is the daily_equipment_budget in its settings;
+        without one, budget adherence is 100%.
+
+        Args:
+            date_range: Number of days to cover
+            company_id: Restrict to one company
+            project_name: Restrict revenue and fuel to one project
+            end_day: Last day covered, today by default
+
+        Returns:
+            Financial summary for the period
+        """
+        start, end = report_window(date_range, end_day)
+        ledger = FinancialLedgerService(self.db)
+        ledger.post_pending()
+        totals = ledger.get_totals(start.date(), end.date(), company_id, project_name)
+
+        fleet = self.db.execute(text(f"""
+            WITH fleet AS ({FLEET_SQL})
+            SELECT
+                COALESCE(SUM(f.purchase_cost), 0) * :days / :useful_life_days AS ownership_cost,
+                (
+                    SELECT SUM(CAST(c.settings->>'daily_equipment_budget' AS NUMERIC))
+                    FROM companies c
+                    WHERE c.settings->>'daily_equipment_budget' IS NOT NULL
+                        AND (CAST(:company_id AS INTEGER) IS NULL OR c.id = :company_id)
+                ) * :days AS budget
+            FROM fleet f
+        """), {
+            'company_id': company_id,
+            'equipment_type': None,
+            **cost_parameters(date_range)
+        }).fetchone()
+
+        revenue = totals['revenue']
+        ownership_cost = float(fleet.ownership_cost or 0.0)
+        operational_cost = totals['fuel_cost'] + ownership_cost
+        budget = float(fleet.budget) if fleet.budget is not None else None
+        if not budget or operational_cost <= budget:
+            budget_adherence = 100.0
+        else:
+            budget_adherence = budget / operational_cost * 100
+
+        return FinancialSummary(
+            total_operational_cost=round(operational_cost, 2),
+            total_revenue=round(revenue, 2),
+            # Rental value of the approved hours beyond what owning the fleet costs
+            cost_savings=round(revenue - ownership_cost, 2),
+            budget_adherence=round(budget_adherence, 2),
+            profit_margin=round(_percent(revenue - operational_cost, revenue), 2),
+            date_range=date_range,
+            last_updated=datetime.now(timezone.utc)
+        )
+
+    def get_operator_performance(
+        self,
+        date_range: int,
+        company_id: Optional[int] = None,
+        equipment_type: Optional[str] = None,
+        end_day: Optional[date] = None,
+        skip: int = 0,
+        limit: Optional[int] = None
+    ) -> Tuple[List[OperatorPerformanceReport], int]:
+        """
+        Per-operator hours, equipment mix, fuel efficiency, punctuality and earnings.
+
+        One query groups the period's counted reports by operator and ranks
+        every operator with window functions before the page is cut, so
+        ranks and scores are fleet-wide whichever page is read. A report is
+        on time when submitted within REPORTS_SUBMISSION_DEADLINE_HOURS of
+        its shift end; earnings are hours at the operator profile's
+        hourly_rate. Scores are cumulative distributions: the share of
+        operators with at most this many hours (productivity) or at least
+        this much fuel per hour (efficiency).
+
+        Args:
+            date_range: Number of days to cover
+            company_id: Restrict to reports on one company's equipment
+            equipment_type: Restrict to reports on one equipment type
+            end_day: Last day covered, today by default
+            skip: Operators to skip, in rank order
+            limit: Page size; all operators when None
+
+        Returns:
+            The page of operators ordered by hours rank, and the number of operators
+        """
+        start, end = report_window(date_range, end_day)
+        rows = self.db.execute(text(OPERATOR_PERFORMANCE_SQL), {
+            'company_id': company_id,
+            'equipment_type': equipment_type.lower() if equipment_type else None,
+            'start': start,
+            'end': end,
+            'deadline_hours': settings.REPORTS_SUBMISSION_DEADLINE_HOURS,
+            'skip': skip,
+            'limit': limit,
+            **cost_parameters(date_range)
+        }).fetchall()
+        total = rows[0].operator_count if rows else 0
+
+        operators = []
+        for row in rows:
+            if row.operator_id is None:
+                continue
+            hours = float(row.hours)
+            mix: Dict[str, float] = {}
+            for kind, unit_hours in zip(row.equipment_types, row.equipment_hours):
+                mix[kind] = mix.get(kind, 0.0) + float(unit_hours)
+            operators.append(OperatorPerformanceReport(
+                operator_id=row.operator_id,
+                operator_name=row.operator_name,
+                total_hours=round(hours),
+                equipment_operated=list(row.equipment_names),
+                productivity_score=round(float(row.productivity_score), 2),
+                safety_incidents=int(row.safety_incidents),
+                efficiency_rating=round(float(row.efficiency_rating), 2),
+                salary_calculation=round(hours * float(row.hourly_rate or 0), 2),
+                report_count=int(row.report_count),
+                equipment_mix={
+                    kind: round(_percent(unit_hours, hours), 2) for kind, unit_hours in mix.items()
+                } if hours > 0 else {},
+                fuel_per_hour=round(float(row.fuel_per_hour), 2) if row.fuel_per_hour is not None else None,
+                on_time_rate=round(float(row.on_time_rate), 2),
+                hourly_rate=row.hourly_rate,
+                hours_rank=row.hours_rank,
+                efficiency_rank=row.efficiency_rank,
+                on_time_rank=row.on_time_rank
+            ))
+        return operators, total
+
+    def _usage(self, start: datetime, end: datetime) -> Tuple[str, Dict[str, Any]]:
+        """
+        SQL and parameters of the per-equipment usage CTE over [start, end).
+
+        Reads the memory-mapped usage snapshot when no daily report changed
+        since it was built, so the sums are a few NumPy passes over one
+        contiguous slice instead of a scan of daily_reports; otherwise falls
+        back to aggregating daily_reports in the query.
+        """
+        snapshot = fresh_snapshot(self.db)
+        if snapshot is None:
+            return USAGE_SQL, {}
+        equipment_ids, hours, fuel = snapshot.usage_by_equipment(start.date(), end.date())
+        return SNAPSHOT_USAGE_SQL, {
+            'usage_equipment_ids': equipment_ids.tolist(),
+            'usage_hours': hours.tolist(),
+            'usage_fuel': fuel.tolist()
+        }
+
+    def _fleet_usage_totals(self, usage_sql: str, params: Dict[str, Any]) -> Any:
+        """Fleet size, downtime count, hours, rental value, ownership cost and mean ROI in one query"""
+        return self.db.execute(text(f"""
+            WITH fleet AS ({FLEET_SQL}),
+            usage AS ({usage_sql}),
+            unit AS (
+                SELECT
+                    f.status,
+                    COALESCE(u.hours, 0) AS hours,
+                    COALESCE(u.hours, 0) * f.hourly_rate AS rental_value,
+                    {FUEL_COST_SQL.format(fuel='u.fuel_consumed', capacity='f.fuel_capacity')} AS fuel_cost,
+                    f.purchase_cost * :days / :useful_life_days AS ownership_cost
+                FROM fleet f
+                LEFT JOIN usage u ON u.equipment_id = f.id
+            )
+            SELECT
+                COUNT(*) AS fleet_size,
+                COUNT(*) FILTER (WHERE status IN ('maintenance', 'out_of_order')) AS down_count,
+                COALESCE(SUM(hours), 0) AS hours,
+                COALESCE(SUM(rental_value), 0) AS rental_value,
+                COALESCE(SUM(ownership_cost), 0) AS ownership_cost,
+                AVG((rental_value - fuel_cost - ownership_cost) / ownership_cost * 100)
+                    FILTER (WHERE ownership_cost > 0) AS average_roi
+            FROM unit
+        """), params).fetchone()
+
+    def _reporting_totals(self, params: Dict[str, Any], due_end: datetime) -> Any:
+        """
+        Report completion counts and scheduled vs reported equipment-days.
+
+        An equipment-day is due once it has started and some schedule
+        covers it; occurrences of recurring series are expanded here and
+        passed in as arrays so the comparison stays one query.
+        """
+        series = self.db.execute(text(f"""
+            SELECT es.equipment_id, es.start_datetime, es.end_datetime, {RECURRENCE_COLUMNS_SQL}
+            FROM equipment_schedules es
+            JOIN equipment e ON e.id = es.equipment_id
+            WHERE es.recurrence_rule IS NOT NULL
+                AND es.status <> 'cancelled'
+                AND e.is_active = TRUE
+                AND (CAST(:company_id AS INTEGER) IS NULL OR e.company_id = :company_id)
+                AND {WINDOW_OVERLAP_SQL}
+        """), {
+            'company_id': params['company_id'],
+            'start_date': params['start'],
+            'end_date': due_end
+        }).fetchall()
+        occurrences = list(expand_rows(series, params['start'], due_end))
+
+        return self.db.execute(text(f"""
+            WITH fleet AS ({FLEET_SQL}),
+            window_reports AS (
+                SELECT dr.equipment_id, dr.report_date, dr.status
+                FROM daily_reports dr
+                JOIN fleet f ON f.id = dr.equipment_id
+                WHERE dr.report_date >= :start
+                    AND dr.report_date < :end
+            ),
+            bookings AS (
+                SELECT es.equipment_id, es.start_datetime, es.end_datetime
+                FROM equipment_schedules es
+                JOIN fleet f ON f.id = es.equipment_id
+                WHERE es.recurrence_rule IS NULL
+                    AND es.status <> 'cancelled'
+                    AND es.start_datetime < :due_end
+                    AND es.end_datetime > :start
+                UNION ALL
+                SELECT * FROM UNNEST(
+                    CAST(:series_equipment_ids AS INTEGER[]),
+                    CAST(:series_starts AS TIMESTAMPTZ[]),
+                    CAST(:series_ends AS TIMESTAMPTZ[])
+                )
+            ),
+            scheduled AS (
+                SELECT DISTINCT b.equipment_id, d::date AS day
+                FROM bookings b
+                CROSS JOIN LATERAL generate_series(
+                    date_trunc('day', GREATEST(b.start_datetime, :start)),
+                    LEAST(b.end_datetime, :due_end) - INTERVAL '1 microsecond',
+                    INTERVAL '1 day'
+                ) d
+            ),
+            reported AS (
+                SELECT DISTINCT equipment_id, report_date::date AS day
+                FROM window_reports
+                WHERE status = ANY(:counted_statuses)
+            )
+            SELECT
+                (SELECT COUNT(*) FROM window_reports) AS report_count,
+                (SELECT COUNT(*) FROM window_reports WHERE status = ANY(:counted_statuses)) AS completed_count,
+                (SELECT COUNT(*) FROM scheduled) AS scheduled_days,
+                (SELECT COUNT(*) FROM scheduled s JOIN reported r USING (equipment_id, day)) AS reported_days
+        """), {
+            **params,
+            'due_end': due_end,
+            'series_equipment_ids': [row.equipment_id for row, _, _ in occurrences],
+            'series_starts': [start for _, start, _ in occurrences],
+            'series_ends': [end for _, _, end in occurrences]
+        }).fetchone()
+
+
+def _percent(part: Any, whole: Any, empty: float = 0.0) -> float:
+    """part / whole as a percentage, or `empty` when there is nothing to measure"""
+    whole = float(whole or 0)
+    if whole <= 0:
+        return empty
+    return float(part or 0) / whole * 100
@@ -0,0 +1,306 @@
+"""
+Usage snapshot
+Columnar copy of counted daily report facts in memory-mapped NumPy files, shared read-only by every worker
+"""
+
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Column name -> dtype; day counts days since 1970-01-01 (UTC), project indexes the manifest's project list
+SNAPSHOT_COLUMNS: Dict[str, np.dtype] = {
+    'equipment_id': np.dtype(np.int32),
+    'day': np.dtype(np.int32),
+    'hours': np.dtype(np.float32),
+    'fuel': np.dtype(np.float32),
+    'distance': np.dtype(np.float32),
+    'project': np.dtype(np.int32),
+    'operator': np.dtype(np.int32)
+}
+
+# Rows fetched per round trip while building
+SNAPSHOT_FETCH_SIZE = 20000
+
+# Names the published version directory
+_CURRENT_FILE = "CURRENT"
+_LOCK_FILE = ".lock"
+
+_EPOCH = date(1970, 1, 1)
+
+# Submitted and approved reports, the statuses ReportsService counts as work done
+_SNAPSHOT_SQL = """
+    SELECT
+        dr.equipment_id,
+        CAST(dr.report_date AT TIME ZONE 'UTC' AS DATE) - DATE '1970-01-01' AS day,
+        COALESCE(dr.hours_worked, 0) AS hours,
+        COALESCE(dr.fuel_consumed, 0) AS fuel,
+        COALESCE(dr.distance_traveled, 0) AS distance,
+        dr.project_name,
+        dr.operator_id
+    FROM daily_reports dr
+    WHERE dr.status IN ('submitted', 'approved')
+"""
+
+
+def snapshot_directory() -> Path:
+    """Root of the snapshot versions on this host"""
+    return Path(settings.UPLOAD_DIRECTORY) / "reports" / "snapshot"
+
+
+def epoch_day(day: date) -> int:
+    """Day number as stored in the day column"""
+    return (day - _EPOCH).days
+
+
+def usage_watermark(db: Session) -> str:
+    """Latest daily report update; a snapshot built at this watermark is current"""
+    return _read_watermark(db)[0]
+
+
+def _read_watermark(db: Session) -> Tuple[str, datetime]:
+    """usage_watermark and the database clock it was read at"""
+    row = db.execute(text("SELECT MAX(updated_at) AS watermark, clock_timestamp() AS read_at FROM daily_reports")).fetchone()
+    return (row.watermark.isoformat() if row.watermark else "-"), row.read_at
+
+
+class UsageSnapshot:
+    """
+    One published snapshot version, opened read-only.
+
+    Columns are np.load(mmap_mode='r') views, so every process on the host
+    maps the same page-cache pages instead of holding its own copy. Rows
+    are sorted by (day, equipment_id), so a date window is one contiguous
+    slice found by binary search.
+
+    updated_at is stamped at transaction start, so a report committed just
+    after the rows were read can carry an updated_at below the watermark.
+    A snapshot is only settled once its rows were read at least
+    REPORTS_SNAPSHOT_SETTLE_SECONDS after its watermark; until then it is
+    not served and the refresher rebuilds it.
+    """
+
+    def __init__(self, path: Path):
+        manifest = json.loads((path / "manifest.json").read_text())
+        self.version: str = manifest['version']
+        self.watermark: str = manifest['watermark']
+        self.built_at: str = manifest['built_at']
+        self.settled: bool = manifest.get('settled', False)
+        self.projects: List[str] = manifest['projects']
+        self.rows: int = manifest['rows']
+        self.columns: Dict[str, np.ndarray] = {
+            name: (
+                np.load(path / f"{name}.npy", mmap_mode='r') if self.rows
+                else np.empty(0, dtype=dtype)
+            )
+            for name, dtype in SNAPSHOT_COLUMNS.items()
+        }
+
+    def window(self, start: date, end: date) -> slice:
+        """Rows with start <= day < end"""
+        low, high = np.searchsorted(self.columns['day'], [epoch_day(start), epoch_day(end)])
+        return slice(int(low), int(high))
+
+    def usage_by_equipment(self, start: date, end: date) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Hours and fuel summed per equipment over start <= day < end.
+
+        Returns:
+            Equipment IDs with reports in the window, and their hours and fuel_consumed sums
+        """
+        rows = self.window(start, end)
+        equipment_id = self.columns['equipment_id'][rows]
+        if not len(equipment_id):
+            return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+        counts = np.bincount(equipment_id)
+        hours = np.bincount(equipment_id, weights=self.columns['hours'][rows], minlength=len(counts))
+        fuel = np.bincount(equipment_id, weights=self.columns['fuel'][rows], minlength=len(counts))
+        present = np.flatnonzero(counts)
+        return present, hours[present], fuel[present]
+
+
+_loaded: Optional[UsageSnapshot] = None
+_loaded_lock = threading.Lock()
+
+
+def current_snapshot() -> Optional[UsageSnapshot]:
+    """The published snapshot, re-mapped when a newer version was published; None before the first build"""
+    global _loaded
+    root = snapshot_directory()
+    try:
+        version = (root / _CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return None
+    with _loaded_lock:
+        if _loaded is None or _loaded.version != version:
+            try:
+                _loaded = UsageSnapshot(root / version)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not open usage snapshot {version}: {e}")
+                return None
+        return _loaded
+
+
+def fresh_snapshot(db: Session) -> Optional[UsageSnapshot]:
+    """The published snapshot if it is settled and no daily report changed since it was built, else None"""
+    snapshot = current_snapshot()
+    if snapshot is None or not snapshot.settled or snapshot.watermark != usage_watermark(db):
+        return None
+    return snapshot
+
+
+def build_snapshot(db: Session, watermark: str, read_at: datetime) -> str:
+    """
+    Build a snapshot version from daily_reports and publish it.
+
+    Rows are streamed in batches into column chunks and sorted once in
+    NumPy. The version is written to a hidden directory, renamed into
+    place and then named in CURRENT with an atomic replace, so readers
+    never see a partial snapshot. Older versions but the one replaced are
+    removed; processes still mapping them keep their pages until they
+    re-map.
+
+    Args:
+        db: Database session
+        watermark: usage_watermark read before the rows
+        read_at: Database time the watermark was read at
+
+    Returns:
+        The published version
+    """
+    root = snapshot_directory()
+    version = f"{int(time.time() * 1000)}-{os.getpid()}"
+    staging = root / f".{version}"
+    staging.mkdir(parents=True)
+
+    chunks: Dict[str, List[np.ndarray]] = {name: [] for name in SNAPSHOT_COLUMNS}
+    projects: Dict[str, int] = {}
+    result = db.execute(
+        text(_SNAPSHOT_SQL).execution_options(stream_results=True, yield_per=SNAPSHOT_FETCH_SIZE)
+    )
+    for rows in result.partitions():
+        equipment_id, day, hours, fuel, distance, project, operator = zip(*rows)
+        chunks['equipment_id'].append(np.array(equipment_id, dtype=np.int32))
+        chunks['day'].append(np.array(day, dtype=np.int32))
+        chunks['hours'].append(np.array(hours, dtype=np.float32))
+        chunks['fuel'].append(np.array(fuel, dtype=np.float32))
+        chunks['distance'].append(np.array(distance, dtype=np.float32))
+        chunks['project'].append(np.fromiter(
+            (projects.setdefault(name, len(projects)) for name in project), dtype=np.int32, count=len(rows)
+        ))
+        chunks['operator'].append(np.array(operator, dtype=np.int32))
+
+    columns = {
+        name: np.concatenate(chunks[name]) if chunks[name] else np.empty(0, dtype=dtype)
+        for name, dtype in SNAPSHOT_COLUMNS.items()
+    }
+    order = np.lexsort((columns['equipment_id'], columns['day']))
+    for name, column in columns.items():
+        np.save(staging / f"{name}.npy", column[order])
+    (staging / "manifest.json").write_text(json.dumps({
+        'version': version,
+        'watermark': watermark,
+        'built_at': datetime.now(timezone.utc).isoformat(),
+        'settled': watermark == "-" or (
+            read_at - datetime.fromisoformat(watermark)
+        ).total_seconds() >= settings.REPORTS_SNAPSHOT_SETTLE_SECONDS,
+        'rows': int(len(order)),
+        'projects': list(projects)
+    }))
+
+    staging.rename(root / version)
+    current = root / _CURRENT_FILE
+    try:
+        previous = current.read_text().strip()
+    except FileNotFoundError:
+        previous = None
+    pointer = root / f".{_CURRENT_FILE}.{version}"
+    pointer.write_text(version)
+    os.replace(pointer, current)
+
+    for entry in root.iterdir():
+        if entry.is_dir() and entry.name not in (version, previous):
+            shutil.rmtree(entry, ignore_errors=True)
+    return version
+
+
+def refresh_snapshot(db: Session) -> bool:
+    """
+    Rebuild the snapshot if daily reports changed since it was built, or it is not settled yet.
+
+    A non-blocking file lock lets one process per host build while the
+    others skip the round.
+
+    Returns:
+        True when a new version was published
+    """
+    root = snapshot_directory()
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / _LOCK_FILE, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        watermark, read_at = _read_watermark(db)
+        snapshot = current_snapshot()
+        if snapshot is not None and snapshot.settled and snapshot.watermark == watermark:
+            return False
+        version = build_snapshot(db, watermark, read_at)
+        logger.info(f"Published usage snapshot {version}")
+        return True
+
+
+class UsageSnapshotRefresher:
+    """
+    Runs refresh_snapshot at startup and then every interval in a daemon thread.
+
+    Every API process runs one; the snapshot lock lets only one of them
+    build on each tick, and the others map the result on first use.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="usage-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def _run(self) -> None:
+        while True:
+            db = SessionLocal()
+            try:
+                refresh_snapshot(db)
+            except Exception as e:
+                logger.error(f"Usage snapshot refresh failed: {e}")
+            finally:
+                db.close()
+            if self._stop.wait(self.interval_seconds):
+                return
+
+
+snapshot_refresher = UsageSnapshotRefresher(settings.REPORTS_SNAPSHOT_REFRESH_SECONDS)
@@ -0,0 +1,50 @@
+"""
+Report file writers
+Render a ReportTable to a file, reporting progress as rows are written
+"""
+
+from typing import BinaryIO, Callable, Dict, NamedTuple
+import csv
+import io
+
+from app.api.v1.reports.builders import ReportTable
+from app.api.v1.reports.pdf import write_pdf
+
+# Called with the number of rows written so far
+RowProgress = Callable[[int], None]
+
+# Rows written between progress callbacks
+PROGRESS_EVERY_ROWS = 1000
+
+
+class ReportFormat(NamedTuple):
+    extension: str
+    media_type: str
+    write: Callable[[ReportTable, BinaryIO, RowProgress], None]
+
+
+def write_csv(table: ReportTable, output: BinaryIO, progress: RowProgress) -> None:
+    """Title, period and summary rows, a blank row, then the table"""
+    stream = io.TextIOWrapper(output, encoding="utf-8", newline="", write_through=True)
+    try:
+        writer = csv.writer(stream)
+        writer.writerow([table.title])
+        writer.writerow(["Period", table.period])
+        for label, value in table.summary:
+            writer.writerow([label, value])
+        writer.writerow([])
+        writer.writerow(table.columns)
+        for written, row in enumerate(table.rows, start=1):
+            writer.writerow(row)
+            if written % PROGRESS_EVERY_ROWS == 0:
+                progress(written)
+        progress(len(table.rows))
+    finally:
+        stream.detach()
+
+
+# Upper-cased ReportRequest.format -> writer
+REPORT_FORMATS: Dict[str, ReportFormat] = {
+    'CSV': ReportFormat('csv', 'text/csv', write_csv),
+    'PDF': ReportFormat('pdf', 'application/pdf', write_pdf)
+}
@@ -0,0 +1,40 @@
+# Equipment Scheduling Caches
+# Redis caches for per-equipment scheduling reads, invalidated on schedule writes
+
+from typing import Optional
+
+from app.core.cache import VersionedCache
+from app.core.config import settings
+
+# All scheduling caches share per-equipment invalidation scopes
+SCOPE_NAMESPACE = "scheduling"
+
+statistics_cache = VersionedCache(
+    "scheduling:statistics",
+    ttl_seconds=settings.SCHEDULING_CACHE_TTL_SECONDS,
+    scope_namespace=SCOPE_NAMESPACE
+)
+
+# Occupied intervals per equipment and day, plus the equipment name
+availability_cache = VersionedCache(
+    "scheduling:availability",
+    ttl_seconds=settings.SCHEDULING_CACHE_TTL_SECONDS,
+    scope_namespace=SCOPE_NAMESPACE
+)
+
+
+def equipment_scope(equipment_id: int) -> str:
+    """Invalidation scope for everything cached about one piece of equipment"""
+    return f"equipment:{equipment_id}"
+
+
+def invalidate_equipment(*equipment_ids: Optional[int]) -> None:
+    """
+    Invalidate cached scheduling data for equipment after a schedule write.
+
+    Bumps the shared scope generation, which covers every scheduling cache.
+    Call after the write is committed.
+    """
+    statistics_cache.invalidate(
+        *(equipment_scope(eid) for eid in set(equipment_ids) if eid is not None)
+    )
@@ -0,0 +1,384 @@
+# Equipment Scheduling Working Calendars - Shift hours and holidays as slot bitsets
+# Calendars compile into packed 15-minute bit arrays so availability is bitwise arithmetic
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import json
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .cache import invalidate_equipment
+from .schemas import WorkingCalendarCreate, WorkingCalendarResponse, WorkingCalendarUpdate
+
+# Bitset resolution
+SLOT_MINUTES = 15
+SLOT_SECONDS = SLOT_MINUTES * 60
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Calendar of each equipment: its own, else its company's default
+_EQUIPMENT_CALENDAR_SQL = """
+    SELECT
+        e.id, e.name,
+        wc.id AS calendar_id, wc.timezone, wc.weekly_hours, wc.holidays,
+        wc.updated_at AS calendar_updated_at
+    FROM equipment e
+    LEFT JOIN LATERAL (
+        SELECT c.id, c.timezone, c.weekly_hours, c.holidays, c.updated_at
+        FROM working_calendars c
+        WHERE c.id = e.working_calendar_id
+            OR (e.working_calendar_id IS NULL AND c.company_id = e.company_id AND c.is_default)
+        LIMIT 1
+    ) wc ON TRUE
+    WHERE e.id = ANY(:equipment_ids)
+"""
+
+_CALENDAR_COLUMNS_SQL = """
+    id, company_id, name, site_location, timezone, weekly_hours, holidays,
+    is_default, created_at, updated_at
+"""
+
+
+class SlotGrid:
+    """
+    Fixed 15-minute slots covering a window.
+
+    The origin is the window start floored to the slot resolution in UTC, so
+    grids of different windows line up and bitsets can be combined directly.
+    """
+
+    def __init__(self, start: datetime, end: datetime):
+        self.start_ts = start.timestamp()
+        self.end_ts = end.timestamp()
+        self.origin_ts = int(self.start_ts // SLOT_SECONDS) * SLOT_SECONDS
+        self.n_slots = max(int(np.ceil((self.end_ts - self.origin_ts) / SLOT_SECONDS)), 0)
+        self.reference = start
+
+    def slot_range(self, starts_ts: np.ndarray, ends_ts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Slots touched by each interval, widened to whole slots and clipped to the grid"""
+        first = np.floor((starts_ts - self.origin_ts) / SLOT_SECONDS)
+        last = np.ceil((ends_ts - self.origin_ts) / SLOT_SECONDS)
+        return (
+            np.clip(first, 0, self.n_slots).astype(np.int64),
+            np.clip(last, 0, self.n_slots).astype(np.int64)
+        )
+
+    def to_datetimes(self, first: np.ndarray, last: np.ndarray) -> List[Tuple[datetime, datetime]]:
+        """Slot runs as datetimes in the window's timezone, trimmed to the window"""
+        starts = np.maximum(self.origin_ts + first * SLOT_SECONDS, self.start_ts)
+        ends = np.minimum(self.origin_ts + last * SLOT_SECONDS, self.end_ts)
+        tz = self.reference.tzinfo
+        return [
+            (_from_timestamp(start, tz), _from_timestamp(end, tz))
+            for start, end in zip(starts.tolist(), ends.tolist())
+            if end > start
+        ]
+
+
+def _from_timestamp(value: float, tz: Any) -> datetime:
+    if tz is None:
+        return datetime.fromtimestamp(value)
+    return datetime.fromtimestamp(value, timezone.utc).astimezone(tz)
+
+
+def _slot_of_day(value: str) -> int:
+    hours, minutes = value.split(":")
+    return (int(hours) * 60 + int(minutes)) // SLOT_MINUTES
+
+
+class WorkingCalendar:
+    """
+    Compiled working calendar.
+
+    Weekly shift hours become a 7 x 96 boolean template; placing it on a
+    slot grid copies one template row per local day, so compiling a window
+    costs one array slice per day rather than work per slot.
+    """
+
+    def __init__(self, calendar_id: int, timezone_name: str,
+                 weekly_hours: Sequence[Sequence[Any]], holidays: Sequence[Any]):
+        self.id = calendar_id
+        self.tz = ZoneInfo(timezone_name)
+        self.week = np.zeros((7, SLOTS_PER_DAY), dtype=bool)
+        for weekday, start, end in weekly_hours:
+            self.week[int(weekday), _slot_of_day(start):_slot_of_day(end)] = True
+        self.holidays = {
+            day if isinstance(day, date) else date.fromisoformat(day) for day in holidays
+        }
+
+    def working_bits(self, grid: SlotGrid) -> np.ndarray:
+        """
+        Packed bitset of working slots on a grid.
+
+        Each local day is placed using its UTC offset at noon, so on daylight
+        saving transition days shift hours before the switch may land one
+        hour off.
+        """
+        working = np.zeros(grid.n_slots, dtype=bool)
+        first_day = datetime.fromtimestamp(grid.origin_ts, self.tz).date() - timedelta(days=1)
+        last_day = datetime.fromtimestamp(grid.origin_ts + grid.n_slots * SLOT_SECONDS, self.tz).date()
+
+        day = first_day
+        while day <= last_day:
+            if day not in self.holidays:
+                noon = datetime.combine(day, time(12), tzinfo=self.tz)
+                midnight_ts = (
+                    datetime.combine(day, time.min, tzinfo=timezone.utc).timestamp()
+                    - noon.utcoffset().total_seconds()
+                )
+                offset = int(round((midnight_ts - grid.origin_ts) / SLOT_SECONDS))
+                lo, hi = max(offset, 0), min(offset + SLOTS_PER_DAY, grid.n_slots)
+                if lo < hi:
+                    working[lo:hi] = self.week[day.weekday(), lo - offset:hi - offset]
+            day += timedelta(days=1)
+        return np.packbits(working)
+
+
+# Compiled calendars of this worker keyed by (id, updated_at)
+_compiled: Dict[Tuple[int, str], WorkingCalendar] = {}
+
+
+def compile_calendar(calendar: Optional[Dict[str, Any]]) -> Optional[WorkingCalendar]:
+    """Compiled form of a cached calendar entry, reused while the calendar is unchanged"""
+    if calendar is None:
+        return None
+    key = (calendar['id'], calendar['updated_at'])
+    compiled = _compiled.get(key)
+    if compiled is None:
+        if len(_compiled) >= 256:
+            _compiled.clear()
+        compiled = WorkingCalendar(
+            calendar['id'], calendar['timezone'], calendar['weekly_hours'], calendar['holidays']
+        )
+        _compiled[key] = compiled
+    return compiled
+
+
+def occupancy_bits(
+    grid: SlotGrid,
+    rows: np.ndarray,
+    starts_ts: np.ndarray,
+    ends_ts: np.ndarray,
+    n_rows: int
+) -> np.ndarray:
+    """
+    Packed occupancy bitsets, one row per equipment.
+
+    Every interval adds +1 at its first slot and -1 after its last in a
+    difference array; a cumulative sum along each row marks busy slots.
+    Partially covered slots count as busy.
+
+    Args:
+        grid: Slot grid of the window
+        rows: Row (equipment position) of each interval
+        starts_ts: Interval starts as UNIX timestamps
+        ends_ts: Interval ends as UNIX timestamps
+        n_rows: Number of rows
+
+    Returns:
+        uint8 array of shape (n_rows, packed width)
+    """
+    first, last = grid.slot_range(starts_ts, ends_ts)
+    width = grid.n_slots + 1
+    delta = np.zeros(n_rows * width, dtype=np.int32)
+    np.add.at(delta, rows * width + first, 1)
+    np.add.at(delta, rows * width + last, -1)
+    busy = np.cumsum(delta.reshape(n_rows, width), axis=1)[:, :grid.n_slots] > 0
+    return np.packbits(busy, axis=1)
+
+
+def free_bits(working: np.ndarray, busy: np.ndarray) -> np.ndarray:
+    """Working AND NOT busy, row by row"""
+    return np.bitwise_and(working, np.invert(busy))
+
+
+def common_bits(free: np.ndarray) -> np.ndarray:
+    """Slots free on every row"""
+    return np.bitwise_and.reduce(free, axis=0)
+
+
+def count_bits(bits: np.ndarray, n_slots: int) -> int:
+    return int(np.unpackbits(bits, axis=-1, count=n_slots).sum())
+
+
+def bit_runs(bits: np.ndarray, n_slots: int) -> Tuple[np.ndarray, np.ndarray]:
+    """First and past-the-end slot of each run of set bits in a 1-D bitset"""
+    flags = np.unpackbits(bits, count=n_slots).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], flags, [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def load_equipment_calendars(db: Session, equipment_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Name and calendar (None when unrestricted) of each equipment, in one query.
+
+    Calendars are returned as plain dicts so they can sit in the
+    availability cache.
+    """
+    rows = db.execute(text(_EQUIPMENT_CALENDAR_SQL), {'equipment_ids': list(equipment_ids)}).fetchall()
+    return {
+        row.id: {
+            'name': row.name,
+            'calendar': None if row.calendar_id is None else {
+                'id': row.calendar_id,
+                'timezone': row.timezone,
+                'weekly_hours': row.weekly_hours,
+                'holidays': [day.isoformat() for day in row.holidays or []],
+                'updated_at': row.calendar_updated_at.isoformat() if row.calendar_updated_at else ''
+            }
+        }
+        for row in rows
+    }
+
+
+class WorkingCalendarService:
+    """Create, read and update working calendars"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_calendar(self, calendar_id: int) -> Optional[WorkingCalendarResponse]:
+        row = self.db.execute(
+            text(f"SELECT {_CALENDAR_COLUMNS_SQL} FROM working_calendars WHERE id = :calendar_id"),
+            {'calendar_id': calendar_id}
+        ).fetchone()
+        return self._to_response(row) if row else None
+
+    def create_calendar(self, data: WorkingCalendarCreate) -> WorkingCalendarResponse:
+        values = self._validated(data.model_dump())
+        if values['is_default']:
+            self._clear_default(values['company_id'])
+
+        row = self.db.execute(text(f"""
+            INSERT INTO working_calendars (
+                company_id, name, site_location, timezone, weekly_hours, holidays, is_default
+            ) VALUES (
+                :company_id, :name, :site_location, :timezone,
+                CAST(:weekly_hours AS JSONB), CAST(:holidays AS DATE[]), :is_default
+            )
+            RETURNING {_CALENDAR_COLUMNS_SQL}
+        """), values).fetchone()
+        self.db.commit()
+
+        if row.is_default:
+            # Equipment falling back to the previous default moves to this one
+            invalidate_equipment(*self._following(row))
+        return self._to_response(row)
+
+    def update_calendar(self, calendar_id: int, data: WorkingCalendarUpdate) -> Optional[WorkingCalendarResponse]:
+        """
+        Apply changes to a calendar.
+
+        Availability entries of every equipment following the calendar,
+        before or after the change, are invalidated.
+        """
+        current = self.db.execute(
+            text(f"SELECT {_CALENDAR_COLUMNS_SQL} FROM working_calendars WHERE id = :calendar_id FOR UPDATE"),
+            {'calendar_id': calendar_id}
+        ).fetchone()
+        if current is None:
+            return None
+
+        merged = {
+            'company_id': current.company_id,
+            'name': current.name,
+            'site_location': current.site_location,
+            'timezone': current.timezone,
+            'weekly_hours': current.weekly_hours,
+            'holidays': list(current.holidays or []),
+            'is_default': current.is_default
+        }
+        merged.update(
+            (key, value) for key, value in data.model_dump(exclude_unset=True).items()
+            if value is not None or key == 'site_location'
+        )
+        values = self._validated(merged)
+        if values['is_default'] and not current.is_default:
+            self._clear_default(current.company_id)
+        affected = self._following(current)
+
+        row = self.db.execute(text(f"""
+            UPDATE working_calendars
+            SET name = :name,
+                site_location = :site_location,
+                timezone = :timezone,
+                weekly_hours = CAST(:weekly_hours AS JSONB),
+                holidays = CAST(:holidays AS DATE[]),
+                is_default = :is_default,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = :calendar_id
+            RETURNING {_CALENDAR_COLUMNS_SQL}
+        """), {**values, 'calendar_id': calendar_id}).fetchone()
+        affected |= self._following(row)
+        self.db.commit()
+
+        invalidate_equipment(*affected)
+        return self._to_response(row)
+
+    @staticmethod
+    def _validated(values: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            ZoneInfo(values['timezone'])
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown timezone: {values['timezone']}")
+
+        periods = []
+        for period in values['weekly_hours']:
+            if isinstance(period, dict):
+                period = (period['weekday'], period['start'], period['end'])
+            weekday, start, end = period
+            if _slot_of_day(end) <= _slot_of_day(start):
+                raise ValueError(f"Shift on weekday {weekday} must end after it starts ({start}-{end})")
+            periods.append([int(weekday), start, end])
+
+        return {
+            **values,
+            'weekly_hours': json.dumps(sorted(periods)),
+            'holidays': sorted({
+                day if isinstance(day, date) else date.fromisoformat(str(day))
+                for day in values['holidays']
+            })
+        }
+
+    def _clear_default(self, company_id: int) -> None:
+        self.db.execute(text("""
+            UPDATE working_calendars
+            SET is_default = FALSE, updated_at = CURRENT_TIMESTAMP
+            WHERE company_id = :company_id AND is_default
+        """), {'company_id': company_id})
+
+    def _following(self, calendar: Any) -> set:
+        """Equipment currently resolving to a calendar"""
+        ids = set(self.db.execute(
+            text("SELECT id FROM equipment WHERE working_calendar_id = :calendar_id"),
+            {'calendar_id': calendar.id}
+        ).scalars())
+        if calendar.is_default:
+            ids |= self._company_fallbacks(calendar.company_id)
+        return ids
+
+    def _company_fallbacks(self, company_id: int) -> set:
+        return set(self.db.execute(
+            text("SELECT id FROM equipment WHERE company_id = :company_id AND working_calendar_id IS NULL"),
+            {'company_id': company_id}
+        ).scalars())
+
+    @staticmethod
+    def _to_response(row: Any) -> WorkingCalendarResponse:
+        return WorkingCalendarResponse(
+            id=row.id,
+            company_id=row.company_id,
+            name=row.name,
+            site_location=row.site_location,
+            timezone=row.timezone,
+            weekly_hours=[
+                {'weekday': weekday, 'start': start, 'end': end}
+                for weekday, start, end in row.weekly_hours
+            ],
+            holidays=list(row.holidays or []),
+            is_default=row.is_default,
+            created_at=row.created_at,
+            updated_at=row.updated_at
+        )
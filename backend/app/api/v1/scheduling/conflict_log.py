@@ -0,0 +1,170 @@
+# Equipment Scheduling Conflict Log - Write-behind audit of detected conflicts
+# Conflicts are buffered in memory and written to schedule_conflicts_log in batches
+
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, List, Optional, Tuple
+import logging
+import threading
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# conflict_type stored for each severity of ScheduleConflict
+CONFLICT_TYPES = {
+    'error': 'overlap',
+    'warning': 'adjacent',
+    'info': 'nearby'
+}
+
+# (equipment_id, conflicting_schedule_id, attempted_start, attempted_end, conflict_type, severity, detected_at)
+ConflictLogEntry = Tuple[int, Optional[int], datetime, datetime, str, str, datetime]
+
+
+class ConflictLogWriter:
+    """
+    Buffered writer for schedule_conflicts_log.
+
+    record() only appends to an in-memory buffer, so conflict detection never
+    waits on the log. A daemon thread flushes the buffer every
+    flush_interval_seconds, or as soon as batch_size entries are waiting,
+    using one multi-row INSERT per batch. When the database is unreachable
+    entries stay buffered up to max_buffered, after which the oldest are
+    dropped.
+    """
+
+    def __init__(self, flush_interval_seconds: float, batch_size: int, max_buffered: int):
+        self.flush_interval_seconds = flush_interval_seconds
+        self.batch_size = batch_size
+        self._buffer: Deque[ConflictLogEntry] = deque(maxlen=max_buffered)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._dropped = 0
+
+    def record(
+        self,
+        equipment_id: int,
+        conflicting_schedule_id: Optional[int],
+        attempted_start: datetime,
+        attempted_end: datetime,
+        severity: str
+    ) -> None:
+        """Queue a detected conflict for logging"""
+        entry = (
+            equipment_id, conflicting_schedule_id, attempted_start, attempted_end,
+            CONFLICT_TYPES[severity], severity, datetime.now(timezone.utc)
+        )
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._dropped += 1
+            self._buffer.append(entry)
+            pending = len(self._buffer)
+            self._ensure_started()
+
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_started(self) -> None:
+        # Started lazily so each forked worker process runs its own flusher
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="schedule-conflict-log", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write all buffered entries.
+
+        Returns:
+            Number of entries written
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [
+                        self._buffer.popleft()
+                        for _ in range(min(self.batch_size, len(self._buffer)))
+                    ]
+                    dropped, self._dropped = self._dropped, 0
+                if dropped:
+                    logger.warning(f"Dropped {dropped} schedule conflict log entries (buffer full)")
+                if not batch:
+                    return written
+
+                try:
+                    self._insert(batch)
+                except Exception as e:
+                    logger.warning(f"Failed to write {len(batch)} schedule conflict log entries: {e}")
+                    # Put the batch back in order and retry on the next interval. It
+                    # is older than everything buffered since, so when it no longer
+                    # fits its oldest entries are the ones dropped
+                    with self._lock:
+                        overflow = max(0, len(self._buffer) + len(batch) - self._buffer.maxlen)
+                        self._dropped += overflow
+                        self._buffer.extendleft(reversed(batch[overflow:]))
+                    return written
+                written += len(batch)
+
+    @staticmethod
+    def _insert(batch: List[ConflictLogEntry]) -> None:
+        columns = list(zip(*batch))
+        db = SessionLocal()
+        try:
+            db.execute(text("""
+                INSERT INTO schedule_conflicts_log (
+                    equipment_id, conflicting_schedule_id, attempted_start,
+                    attempted_end, conflict_type, severity, created_at
+                )
+                SELECT * FROM UNNEST(
+                    CAST(:equipment_ids AS INTEGER[]),
+                    CAST(:conflicting_schedule_ids AS INTEGER[]),
+                    CAST(:attempted_starts AS TIMESTAMPTZ[]),
+                    CAST(:attempted_ends AS TIMESTAMPTZ[]),
+                    CAST(:conflict_types AS VARCHAR[]),
+                    CAST(:severities AS VARCHAR[]),
+                    CAST(:detected_ats AS TIMESTAMPTZ[])
+                )
+            """), {
+                'equipment_ids': list(columns[0]),
+                'conflicting_schedule_ids': list(columns[1]),
+                'attempted_starts': list(columns[2]),
+                'attempted_ends': list(columns[3]),
+                'conflict_types': list(columns[4]),
+                'severities': list(columns[5]),
+                'detected_ats': list(columns[6])
+            })
+            db.commit()
+        finally:
+            db.close()
+        logger.debug(f"Wrote {len(batch)} schedule conflict log entries")
+
+    def stop(self) -> None:
+        """Stop the flusher thread and write whatever is still buffered"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_seconds + 5)
+        self.flush()
+
+
+conflict_log_writer = ConflictLogWriter(
+    flush_interval_seconds=settings.SCHEDULING_CONFLICT_LOG_FLUSH_SECONDS,
+    batch_size=settings.SCHEDULING_CONFLICT_LOG_BATCH_SIZE,
+    max_buffered=settings.SCHEDULING_CONFLICT_LOG_MAX_BUFFERED
+)
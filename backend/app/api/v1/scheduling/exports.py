@@ -0,0 +1,102 @@
+# Equipment Scheduling Exports - Raw schedule rows for CSV and Excel exports
+# Rows are read from a server-side cursor in batches and encoded as they arrive
+
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = 2000
+
+SCHEDULE_EXPORT_COLUMNS = [
+    "Schedule ID", "Equipment ID", "Equipment", "Project ID", "Project",
+    "Operator ID", "Operator", "Start", "End", "Status", "Recurrence Rule",
+    "Recurrence Until", "Notes", "Created By", "Created At", "Updated At", "Version"
+]
+
+
+def schedule_list_filters(
+    equipment_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    operator_id: Optional[int] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    WHERE clause and parameters of the schedule list filters, over alias es.
+
+    Shared by the list endpoint and the exports so both select the same rows.
+    """
+    conditions = []
+    params: Dict[str, Any] = {}
+
+    if equipment_id:
+        conditions.append("es.equipment_id = :equipment_id")
+        params['equipment_id'] = equipment_id
+
+    if project_id:
+        conditions.append("es.project_id = :project_id")
+        params['project_id'] = project_id
+
+    if operator_id:
+        conditions.append("es.operator_id = :operator_id")
+        params['operator_id'] = operator_id
+
+    if status:
+        conditions.append("es.status = :status")
+        params['status'] = status
+
+    # Recurring series are listed once and match while any occurrence can fall in the range
+    if start_date:
+        conditions.append("""(
+            (es.recurrence_rule IS NULL AND es.start_datetime >= :start_date)
+            OR (es.recurrence_rule IS NOT NULL AND COALESCE(es.recurrence_until, 'infinity') > :start_date)
+        )""")
+        params['start_date'] = start_date
+
+    if end_date:
+        conditions.append("""(
+            (es.recurrence_rule IS NULL AND es.end_datetime <= :end_date)
+            OR (es.recurrence_rule IS NOT NULL AND es.start_datetime < :end_date)
+        )""")
+        params['end_date'] = end_date
+
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    return where_clause, params
+
+
+def iter_schedule_rows(where_clause: str, params: Dict[str, Any]) -> Iterator[List[Sequence[Any]]]:
+    """
+    Batches of export rows in SCHEDULE_EXPORT_COLUMNS order.
+
+    Opens its own session because rows are produced while the response
+    streams; the server-side cursor keeps memory flat however many rows match.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            text(f"""
+                SELECT
+                    es.id, es.equipment_id, e.name AS equipment_name,
+                    es.project_id, p.name AS project_name,
+                    es.operator_id, u.first_name || ' ' || u.last_name AS operator_name,
+                    es.start_datetime, es.end_datetime, es.status,
+                    es.recurrence_rule, es.recurrence_until, es.notes,
+                    es.created_by, es.created_at, es.updated_at, es.version
+                FROM equipment_schedules es
+                JOIN equipment e ON es.equipment_id = e.id
+                LEFT JOIN projects p ON es.project_id = p.id
+                LEFT JOIN users u ON es.operator_id = u.id
+                WHERE {where_clause}
+                ORDER BY es.start_datetime DESC, es.id DESC
+            """).execution_options(stream_results=True, yield_per=EXPORT_FETCH_SIZE),
+            params
+        )
+        for rows in result.partitions():
+            yield [tuple(row) for row in rows]
+    finally:
+        db.close()
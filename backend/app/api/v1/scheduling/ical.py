@@ -0,0 +1,212 @@
+# Equipment Scheduling iCalendar Feeds - RFC 5545 feeds per equipment, project and operator
+# Feeds are streamed from a server-side cursor and validated with ETags
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator, List, Optional, Tuple
+import hashlib
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from .recurrence import WEEKDAY_CODES, rule_from_row
+
+# Feed scope -> equipment_schedules column it filters on
+FEED_SCOPES = {
+    'equipment': 'equipment_id',
+    'project': 'project_id',
+    'operator': 'operator_id'
+}
+
+_PRODID = "-//Bitcorp ERP//Equipment Scheduling//EN"
+
+_STATUS = {
+    'scheduled': 'CONFIRMED',
+    'active': 'CONFIRMED',
+    'completed': 'CONFIRMED',
+    'cancelled': 'CANCELLED'
+}
+
+# Schedules still relevant to a feed: one-offs by end, series by their last occurrence
+_IN_FEED_WINDOW_SQL = """
+    CASE WHEN es.recurrence_rule IS NULL THEN es.end_datetime
+         ELSE COALESCE(es.recurrence_until, 'infinity') END >= :window_start
+"""
+
+# Display name of the entity behind each feed scope
+_NAME_QUERIES = {
+    'equipment': "SELECT name FROM equipment WHERE id = :entity_id",
+    'project': "SELECT name FROM projects WHERE id = :entity_id",
+    'operator': "SELECT first_name || ' ' || last_name AS name FROM users WHERE id = :entity_id"
+}
+
+# Rows fetched per round trip from the server-side cursor
+_FETCH_SIZE = 500
+
+
+def feed_window_start() -> datetime:
+    """Oldest schedule end included in feeds, at day resolution so ETags change daily"""
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=settings.SCHEDULING_ICAL_PAST_DAYS)
+
+
+def feed_etag(db: Session, scope: str, entity_id: int) -> Tuple[str, Optional[datetime]]:
+    """
+    ETag and Last-Modified of a feed, from one aggregate over its schedules.
+
+    The row count is part of the tag so deleted schedules also change it.
+    """
+    column = FEED_SCOPES[scope]
+    window_start = feed_window_start()
+    row = db.execute(text(f"""
+        SELECT COUNT(*) AS schedule_count, MAX(es.updated_at) AS last_modified
+        FROM equipment_schedules es
+        WHERE es.{column} = :entity_id
+            AND {_IN_FEED_WINDOW_SQL}
+    """), {'entity_id': entity_id, 'window_start': window_start}).fetchone()
+
+    last_modified = row.last_modified
+    stamp = last_modified.timestamp() if last_modified else 0
+    digest = hashlib.sha1(
+        f"{scope}:{entity_id}:{row.schedule_count}:{stamp}:{window_start.date()}".encode()
+    ).hexdigest()[:20]
+    return f'W/"{digest}"', last_modified
+
+
+def feed_name(db: Session, scope: str, entity_id: int) -> Optional[str]:
+    """Name of the equipment, project or operator behind a feed, or None if it does not exist"""
+    row = db.execute(text(_NAME_QUERIES[scope]), {'entity_id': entity_id}).fetchone()
+    return row.name if row else None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers the current ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates
+    )
+
+
+def _utc(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets as RFC 5545 requires"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a UTF-8 sequence
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74  # Continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _rrule(row: Any) -> List[str]:
+    """RRULE and EXDATE lines of a recurring schedule, with UNTIL in UTC"""
+    rule = rule_from_row(row)
+    if rule is None:
+        return []
+    parts = [f"FREQ={rule.frequency.value}", f"INTERVAL={rule.interval}"]
+    if rule.by_weekday:
+        parts.append("BYDAY=" + ",".join(WEEKDAY_CODES[day] for day in rule.by_weekday))
+    if rule.count is not None:
+        parts.append(f"COUNT={rule.count}")
+    if rule.until is not None:
+        parts.append(f"UNTIL={_utc(rule.until)}")
+    lines = ["RRULE:" + ";".join(parts)]
+    if rule.exceptions:
+        lines.append("EXDATE:" + ",".join(_utc(exception) for exception in rule.exceptions))
+    return lines
+
+
+def _event(row: Any) -> str:
+    summary = row.equipment_name + (f" - {row.project_name}" if row.project_name else "")
+    description = [f"Status: {row.status}"]
+    if row.operator_name:
+        description.append(f"Operator: {row.operator_name}")
+    if row.notes:
+        description.append(row.notes)
+
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:schedule-{row.id}@bitcorp-erp",
+        f"DTSTAMP:{_utc(row.updated_at)}",
+        f"LAST-MODIFIED:{_utc(row.updated_at)}",
+        f"SEQUENCE:{row.version - 1}",
+        f"DTSTART:{_utc(row.start_datetime)}",
+        f"DTEND:{_utc(row.end_datetime)}",
+        *_rrule(row),
+        f"SUMMARY:{_escape(summary)}",
+        f"DESCRIPTION:{_escape(chr(10).join(description))}",
+        f"STATUS:{_STATUS.get(row.status, 'CONFIRMED')}",
+        "END:VEVENT"
+    ]
+    return "".join(_fold(line) for line in lines)
+
+
+def iter_feed(scope: str, entity_id: int, calendar_name: str) -> Iterator[str]:
+    """
+    Stream a feed as iCalendar text.
+
+    Opens its own session because the body is produced after the request
+    handler returns; rows are pulled from a server-side cursor in batches so
+    memory stays flat regardless of feed size.
+    """
+    column = FEED_SCOPES[scope]
+    yield "".join(_fold(line) for line in [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{_PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(calendar_name)}",
+        "REFRESH-INTERVAL;VALUE=DURATION:PT15M"
+    ])
+
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            text(f"""
+                SELECT
+                    es.id, es.start_datetime, es.end_datetime, es.status, es.notes,
+                    es.updated_at, es.version,
+                    es.recurrence_rule, es.recurrence_until, es.recurrence_exceptions,
+                    e.name AS equipment_name,
+                    p.name AS project_name,
+                    u.email AS operator_name
+                FROM equipment_schedules es
+                JOIN equipment e ON es.equipment_id = e.id
+                LEFT JOIN projects p ON es.project_id = p.id
+                LEFT JOIN users u ON es.operator_id = u.id
+                WHERE es.{column} = :entity_id
+                    AND {_IN_FEED_WINDOW_SQL}
+                ORDER BY es.start_datetime, es.id
+            """).execution_options(stream_results=True, yield_per=_FETCH_SIZE),
+            {'entity_id': entity_id, 'window_start': feed_window_start()}
+        )
+        for rows in result.partitions():
+            yield "".join(_event(row) for row in rows)
+    finally:
+        db.close()
+
+    yield "END:VCALENDAR\r\n"
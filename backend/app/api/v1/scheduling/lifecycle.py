@@ -0,0 +1,229 @@
+# Equipment Scheduling Lifecycle - Time-driven status transitions
+# Advances due schedules and equipment status in batches and publishes the changes
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import logging
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.cache import publish_event
+from app.core.config import settings
+from app.core.database import SessionLocal
+from .cache import invalidate_equipment
+from .recurrence import expand_rows
+from .rollups import ScheduleRollupService
+
+logger = logging.getLogger(__name__)
+
+# Redis channel carrying schedule and equipment status changes
+EVENTS_CHANNEL = "scheduling:events"
+
+# End of the last occurrence for series, of the schedule itself otherwise
+_FINISHES_AT_SQL = """
+    CASE WHEN es.recurrence_rule IS NULL THEN es.end_datetime
+         ELSE COALESCE(es.recurrence_until, 'infinity') END
+"""
+
+
+class ScheduleLifecycleService:
+    """
+    Moves schedules through scheduled -> active -> completed as time passes.
+
+    Each run applies set-based UPDATEs to the open schedules that are due,
+    found through partial indexes on scheduled/active rows, and derives
+    equipment in_use/available status in one more UPDATE. Replaces the
+    row-level update_equipment_status_from_schedule trigger.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def advance(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Apply all due transitions and commit.
+
+        Returns:
+            Transition events, or None when another process holds the run lock
+        """
+        got_lock = self.db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext('schedule_lifecycle'))")
+        ).scalar()
+        if not got_lock:
+            self.db.rollback()
+            return None
+
+        state = self.db.execute(text("""
+            SELECT processed_through, CURRENT_TIMESTAMP AS now
+            FROM schedule_lifecycle_state
+            WHERE id = 1
+        """)).fetchone()
+        if state is None:
+            raise RuntimeError("schedule_lifecycle_state is missing; apply migrations/006_schedule_lifecycle.sql")
+
+        # Due rows are found by status and time alone, through the open-schedule
+        # partial indexes. A watermark on updated_at would miss bookings whose
+        # transaction started before a run's now but committed after it.
+        params = {'now': state.now}
+
+        completed = self.db.execute(text("""
+            WITH due AS (
+                SELECT es.id, es.status AS from_status
+                FROM equipment_schedules es
+                WHERE es.status IN ('scheduled', 'active')
+                    AND (
+                        (es.recurrence_rule IS NULL AND es.end_datetime <= :now)
+                        OR (es.recurrence_rule IS NOT NULL AND COALESCE(es.recurrence_until, 'infinity') <= :now)
+                    )
+                FOR UPDATE
+            )
+            UPDATE equipment_schedules es
+            SET status = 'completed',
+                version = version + 1,
+                updated_at = CURRENT_TIMESTAMP
+            FROM due
+            WHERE es.id = due.id
+            RETURNING es.id, es.equipment_id, es.start_datetime, due.from_status, es.status AS to_status
+        """), params).fetchall()
+
+        activated = self.db.execute(text(f"""
+            UPDATE equipment_schedules es
+            SET status = 'active',
+                version = version + 1,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE es.status = 'scheduled'
+                AND es.start_datetime <= :now
+                AND {_FINISHES_AT_SQL} > :now
+            RETURNING es.id, es.equipment_id, es.start_datetime,
+                      'scheduled' AS from_status, es.status AS to_status
+        """), params).fetchall()
+
+        equipment_changes = self._update_equipment_status(state.now)
+
+        transitions = list(completed) + list(activated)
+        ScheduleRollupService(self.db).refresh_for_intervals(*(row.start_datetime for row in transitions))
+
+        self.db.execute(
+            text("UPDATE schedule_lifecycle_state SET processed_through = :now WHERE id = 1"),
+            {'now': state.now}
+        )
+        self.db.commit()
+
+        events = [
+            {
+                'type': 'schedule_status_changed',
+                'schedule_id': row.id,
+                'equipment_id': row.equipment_id,
+                'from_status': row.from_status,
+                'to_status': row.to_status,
+                'at': state.now.isoformat()
+            }
+            for row in transitions
+        ] + [
+            {
+                'type': 'equipment_status_changed',
+                'equipment_id': row.id,
+                'to_status': row.status,
+                'at': state.now.isoformat()
+            }
+            for row in equipment_changes
+        ]
+
+        if events:
+            invalidate_equipment(
+                *(row.equipment_id for row in transitions),
+                *(row.id for row in equipment_changes)
+            )
+            for event in events:
+                publish_event(EVENTS_CHANNEL, event)
+            logger.info(
+                f"Schedule lifecycle: {len(activated)} activated, {len(completed)} completed, "
+                f"{len(equipment_changes)} equipment status changes"
+            )
+        return events
+
+    def _update_equipment_status(self, now: datetime) -> List[Any]:
+        """
+        Set schedulable equipment in_use while an active booking runs, available otherwise.
+
+        Only rows whose status actually changes are written. Occurrences of
+        active series are expanded here since the database only stores the
+        first one.
+        """
+        series = self.db.execute(text("""
+            SELECT es.equipment_id, es.start_datetime, es.end_datetime,
+                   es.recurrence_rule, es.recurrence_until, es.recurrence_exceptions
+            FROM equipment_schedules es
+            WHERE es.status = 'active'
+                AND es.recurrence_rule IS NOT NULL
+        """)).fetchall()
+        series_in_use = sorted({
+            row.equipment_id
+            for row, start, end in expand_rows(series, now, now + timedelta(microseconds=1))
+            if start <= now < end
+        })
+
+        return self.db.execute(text("""
+            WITH in_use AS (
+                SELECT DISTINCT es.equipment_id
+                FROM equipment_schedules es
+                WHERE es.status = 'active'
+                    AND es.recurrence_rule IS NULL
+                    AND es.start_datetime <= :now
+                    AND es.end_datetime > :now
+                UNION
+                SELECT UNNEST(CAST(:series_in_use AS INTEGER[]))
+            )
+            UPDATE equipment e
+            SET status = CASE WHEN in_use.equipment_id IS NULL THEN 'available' ELSE 'in_use' END,
+                updated_at = CURRENT_TIMESTAMP
+            FROM equipment target
+            LEFT JOIN in_use ON in_use.equipment_id = target.id
+            WHERE e.id = target.id
+                AND e.is_active = TRUE
+                AND e.status IN ('available', 'in_use')
+                AND (e.status = 'in_use') IS DISTINCT FROM (in_use.equipment_id IS NOT NULL)
+            RETURNING e.id, e.status
+        """), {'now': now, 'series_in_use': series_in_use}).fetchall()
+
+
+class ScheduleLifecycleWorker:
+    """
+    Runs ScheduleLifecycleService every interval in a daemon thread.
+
+    Every API process runs one; the advisory lock taken in advance() lets
+    only one of them do the work on each tick.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="schedule-lifecycle", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            db = SessionLocal()
+            try:
+                ScheduleLifecycleService(db).advance()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Schedule lifecycle run failed: {e}")
+            finally:
+                db.close()
+
+
+lifecycle_worker = ScheduleLifecycleWorker(settings.SCHEDULING_LIFECYCLE_INTERVAL_SECONDS)
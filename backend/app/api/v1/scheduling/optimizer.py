@@ -0,0 +1,306 @@
+# Equipment Scheduling Optimizer - Fleet assignment for batches of requests
+# Greedy construction plus ruin-and-recreate local search over integer time slots
+
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+import multiprocessing
+import random
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Placements later in a request's window lose up to this share of its weight,
+# so earlier starts win ties without outweighing any extra assignment
+LATENESS_PENALTY = 0.01
+
+
+class AssignmentProblem:
+    """
+    Fleet assignment problem expressed in integer time slots.
+
+    Plain NumPy arrays and lists only, so it pickles cheaply into worker
+    processes.
+
+    Args:
+        unit_types: Equipment type index of each unit
+        unit_busy: Sorted, non-overlapping (start, end) slots already booked per unit
+        request_types: Equipment type index each request needs
+        durations: Duration of each request in slots
+        earliest: Earliest start slot of each request
+        latest: Latest start slot of each request
+        priorities: Priority (1-5) of each request
+    """
+
+    def __init__(
+        self,
+        unit_types: np.ndarray,
+        unit_busy: List[List[Tuple[int, int]]],
+        request_types: np.ndarray,
+        durations: np.ndarray,
+        earliest: np.ndarray,
+        latest: np.ndarray,
+        priorities: np.ndarray
+    ):
+        self.unit_types = unit_types
+        self.unit_busy = unit_busy
+        self.request_types = request_types
+        self.durations = durations
+        self.earliest = earliest
+        self.latest = latest
+        self.priorities = priorities
+        # Urgent requests outweigh several lower-priority ones
+        self.weights = 2.0 ** (priorities - 1)
+
+
+class AssignmentSolution:
+    """Unit index and start slot per request (-1 when unassigned) with its objective"""
+
+    def __init__(self, units: np.ndarray, starts: np.ndarray, objective: float,
+                 greedy_objective: float, iterations: int, timed_out: bool):
+        self.units = units
+        self.starts = starts
+        self.objective = objective
+        self.greedy_objective = greedy_objective
+        self.iterations = iterations
+        self.timed_out = timed_out
+
+
+class _Timeline:
+    """Sorted, non-overlapping bookings of one unit; owner -1 marks existing schedules"""
+
+    __slots__ = ('starts', 'ends', 'owners')
+
+    def __init__(self, busy: Sequence[Tuple[int, int]]):
+        self.starts = [start for start, _ in busy]
+        self.ends = [end for _, end in busy]
+        self.owners = [-1] * len(busy)
+
+    def earliest_fit(self, earliest: int, latest: int, duration: int) -> Optional[Tuple[int, int]]:
+        """First start in [earliest, latest] with room for duration, and the idle gap before it"""
+        t = earliest
+        i = bisect_right(self.ends, t)
+        while True:
+            if t > latest:
+                return None
+            if i == len(self.starts) or self.starts[i] >= t + duration:
+                previous_end = self.ends[i - 1] if i > 0 else t
+                return t, t - previous_end
+            t = max(t, self.ends[i])
+            i += 1
+
+    def add(self, start: int, end: int, owner: int) -> None:
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.owners.insert(i, owner)
+
+    def remove(self, start: int, owner: int) -> None:
+        i = bisect_right(self.starts, start) - 1
+        while self.owners[i] != owner:
+            i -= 1
+        del self.starts[i], self.ends[i], self.owners[i]
+
+    def owners_between(self, start: int, end: int) -> List[int]:
+        """Requests booked on this unit overlapping [start, end)"""
+        i = bisect_right(self.ends, start)
+        found = []
+        while i < len(self.starts) and self.starts[i] < end:
+            if self.owners[i] >= 0:
+                found.append(self.owners[i])
+            i += 1
+        return found
+
+
+class _Search:
+    """Mutable assignment state shared by the greedy and local search phases"""
+
+    def __init__(self, problem: AssignmentProblem):
+        self.problem = problem
+        self.timelines = [_Timeline(busy) for busy in problem.unit_busy]
+        n = len(problem.durations)
+        self.units = np.full(n, -1, dtype=np.int64)
+        self.starts = np.zeros(n, dtype=np.int64)
+        self.units_by_type: Dict[int, List[int]] = {}
+        for unit, unit_type in enumerate(problem.unit_types.tolist()):
+            self.units_by_type.setdefault(unit_type, []).append(unit)
+
+    def value(self, request: int) -> float:
+        """Objective contribution of a request in its current placement"""
+        if self.units[request] < 0:
+            return 0.0
+        p = self.problem
+        window = max(int(p.latest[request] - p.earliest[request]), 1)
+        lateness = (self.starts[request] - p.earliest[request]) / window
+        return float(p.weights[request] * (1.0 - LATENESS_PENALTY * lateness))
+
+    def objective(self) -> float:
+        return sum(self.value(r) for r in range(len(self.units)))
+
+    def place(self, request: int) -> bool:
+        """Book a request at the earliest start over all units of its type, tightest gap first"""
+        p = self.problem
+        duration = int(p.durations[request])
+        best = None
+        for unit in self.units_by_type.get(int(p.request_types[request]), ()):
+            fit = self.timelines[unit].earliest_fit(
+                int(p.earliest[request]), int(p.latest[request]), duration
+            )
+            if fit is not None and (best is None or fit < best[:2]):
+                best = (fit[0], fit[1], unit)
+        if best is None:
+            return False
+        start, _, unit = best
+        self.timelines[unit].add(start, start + duration, request)
+        self.units[request] = unit
+        self.starts[request] = start
+        return True
+
+    def unplace(self, request: int) -> None:
+        unit = self.units[request]
+        self.timelines[unit].remove(int(self.starts[request]), request)
+        self.units[request] = -1
+
+    def restore(self, request: int, unit: int, start: int) -> None:
+        self.timelines[unit].add(start, start + int(self.problem.durations[request]), request)
+        self.units[request] = unit
+        self.starts[request] = start
+
+
+def _greedy_order(problem: AssignmentProblem) -> np.ndarray:
+    """Highest priority first, then tightest windows, then longest jobs"""
+    slack = problem.latest - problem.earliest
+    return np.lexsort((-problem.durations, slack, -problem.priorities))
+
+
+def solve_assignment(
+    problem: AssignmentProblem,
+    seed: int,
+    time_limit_seconds: float,
+    max_iterations: int,
+    ruin_size: int = 8
+) -> AssignmentSolution:
+    """
+    Assign requests to units with greedy construction and local search.
+
+    Each local search step ruins a neighborhood (bookings on one unit near a
+    random booking, plus a sample of unassigned requests of the same type),
+    recreates it greedily in a perturbed order and keeps the result unless
+    the objective got worse. Given the same seed the search is repeatable
+    as long as it finishes max_iterations within the time limit.
+
+    Args:
+        problem: Problem to solve
+        seed: Random seed for the local search
+        time_limit_seconds: Wall-clock budget, including the greedy phase
+        max_iterations: Local search step budget
+        ruin_size: Requests removed and reinserted per step
+
+    Returns:
+        Best assignment found
+    """
+    deadline = time.monotonic() + time_limit_seconds
+    rng = random.Random(seed)
+    search = _Search(problem)
+    p = problem
+
+    for request in _greedy_order(p).tolist():
+        search.place(request)
+
+    objective = search.objective()
+    greedy_objective = objective
+    duration_span = int(np.median(p.durations)) if len(p.durations) else 0
+
+    iterations = 0
+    timed_out = False
+    while iterations < max_iterations:
+        if iterations % 16 == 0 and time.monotonic() > deadline:
+            timed_out = True
+            break
+        iterations += 1
+
+        assigned = np.flatnonzero(search.units >= 0)
+        unassigned = np.flatnonzero(search.units < 0)
+        if len(unassigned) == 0 or len(assigned) == 0:
+            break
+
+        # Neighborhood around a booking whose type still has unmet demand
+        target = int(unassigned[rng.randrange(len(unassigned))])
+        request_type = int(p.request_types[target])
+        candidates = [
+            r for r in assigned[p.request_types[assigned] == request_type].tolist()
+            if search.starts[r] < p.latest[target] + p.durations[target]
+            and search.starts[r] + p.durations[r] > p.earliest[target]
+        ]
+        if not candidates:
+            continue
+        anchor = candidates[rng.randrange(len(candidates))]
+        unit = int(search.units[anchor])
+        start = int(search.starts[anchor])
+        removed = search.timelines[unit].owners_between(
+            start - duration_span, start + int(p.durations[anchor]) + duration_span
+        )[:ruin_size]
+
+        pool_unassigned = unassigned[p.request_types[unassigned] == request_type].tolist()
+        rng.shuffle(pool_unassigned)
+        pool = removed + [target] + [r for r in pool_unassigned[:ruin_size] if r != target]
+
+        before = {r: (int(search.units[r]), int(search.starts[r])) for r in pool}
+        value_before = sum(search.value(r) for r in pool)
+        for r in removed:
+            search.unplace(r)
+
+        # Perturbed priority order: weight scaled by a random factor
+        keys = [p.weights[r] * (0.5 + rng.random()) for r in pool]
+        for r in [r for _, r in sorted(zip(keys, pool), reverse=True)]:
+            search.place(r)
+
+        value_after = sum(search.value(r) for r in pool)
+        if value_after + 1e-9 >= value_before:
+            objective += value_after - value_before
+            continue
+
+        # Worse: undo the step
+        for r in pool:
+            if search.units[r] >= 0:
+                search.unplace(r)
+        for r, (old_unit, old_start) in before.items():
+            if old_unit >= 0:
+                search.restore(r, old_unit, old_start)
+
+    return AssignmentSolution(
+        units=search.units.copy(),
+        starts=search.starts.copy(),
+        objective=objective,
+        greedy_objective=greedy_objective,
+        iterations=iterations,
+        timed_out=timed_out
+    )
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_optimizer_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by optimizer requests of this API worker"""
+    global _pool
+    if _pool is None:
+        # Spawned, not forked: a fork could copy a lock held by one of the API process's threads
+        _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_optimizer_pool() -> None:
+    """Stop the pool without waiting; pending optimizer requests fail and can be retried"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def best_solution(solutions: Sequence[AssignmentSolution]) -> AssignmentSolution:
+    """Highest objective, earliest worker first on ties so results stay deterministic"""
+    return max(enumerate(solutions), key=lambda item: (item[1].objective, -item[0]))[1]
@@ -0,0 +1,237 @@
+# Equipment Scheduling Recurrence - RRULE-style series expansion
+# Recurring schedules are stored as one row and expanded lazily inside query windows
+
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta, timezone
+
+from .schemas import RecurrenceFrequency, RecurrenceRule
+
+WEEKDAY_CODES = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+# Timestamp format used for UNTIL in stored rules; a trailing Z marks UTC
+_UNTIL_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def format_rrule(rule: RecurrenceRule, first_start: datetime) -> str:
+    """
+    Serialize a rule to the RRULE subset stored in equipment_schedules.
+
+    Weekly rules always carry BYDAY so stored rows do not depend on the
+    weekday of their first occurrence. An aware UNTIL is written in UTC with
+    a Z suffix, as RFC 5545 does; a naive one (naive series) as wall-clock
+    time.
+    """
+    parts = [f"FREQ={rule.frequency.value}", f"INTERVAL={rule.interval}"]
+    if rule.frequency == RecurrenceFrequency.WEEKLY:
+        weekdays = rule.by_weekday or [first_start.weekday()]
+        parts.append("BYDAY=" + ",".join(WEEKDAY_CODES[day] for day in weekdays))
+    if rule.count is not None:
+        parts.append(f"COUNT={rule.count}")
+    if rule.until is not None:
+        if rule.until.tzinfo is not None:
+            parts.append(f"UNTIL={rule.until.astimezone(timezone.utc).strftime(_UNTIL_FORMAT)}Z")
+        else:
+            parts.append(f"UNTIL={rule.until.strftime(_UNTIL_FORMAT)}")
+    return ";".join(parts)
+
+
+def parse_rrule(
+    value: str,
+    first_start: datetime,
+    exceptions: Optional[Sequence[datetime]] = None
+) -> RecurrenceRule:
+    """
+    Parse a stored RRULE string.
+
+    UNTIL is returned in the timezone of the first occurrence. A UTC UNTIL
+    (Z suffix) is converted; a wall-clock UNTIL, as written for naive
+    series and by earlier versions, takes that timezone as is.
+
+    Raises:
+        ValueError: If the rule uses unsupported parts
+    """
+    fields = dict(part.split("=", 1) for part in value.split(";") if part)
+    unsupported = set(fields) - {"FREQ", "INTERVAL", "BYDAY", "COUNT", "UNTIL"}
+    if unsupported:
+        raise ValueError(f"Unsupported recurrence rule parts: {', '.join(sorted(unsupported))}")
+
+    until = None
+    if "UNTIL" in fields:
+        if fields["UNTIL"].endswith("Z"):
+            until = convert_timezone(
+                datetime.strptime(fields["UNTIL"][:-1], _UNTIL_FORMAT).replace(tzinfo=timezone.utc),
+                first_start
+            )
+        else:
+            until = datetime.strptime(fields["UNTIL"], _UNTIL_FORMAT).replace(tzinfo=first_start.tzinfo)
+
+    return RecurrenceRule(
+        frequency=RecurrenceFrequency(fields["FREQ"]),
+        interval=int(fields.get("INTERVAL", 1)),
+        by_weekday=[WEEKDAY_CODES.index(code) for code in fields["BYDAY"].split(",")] if "BYDAY" in fields else [],
+        until=until,
+        count=int(fields["COUNT"]) if "COUNT" in fields else None,
+        exceptions=list(exceptions or [])
+    )
+
+
+def _occurrence_pattern(rule: RecurrenceRule, first_start: datetime) -> Tuple[timedelta, List[timedelta]]:
+    """
+    Describe a rule as a repeating period and the occurrence offsets within it.
+
+    The period starts at the first occurrence's day for daily rules and at the
+    Monday of its week for weekly rules, at the first occurrence's time of day.
+    """
+    if rule.frequency == RecurrenceFrequency.DAILY:
+        return timedelta(days=rule.interval), [timedelta(0)]
+
+    weekdays = rule.by_weekday or [first_start.weekday()]
+    return timedelta(weeks=rule.interval), [timedelta(days=day - first_start.weekday()) for day in weekdays]
+
+
+def _last_start_by_count(rule: RecurrenceRule, first_start: datetime) -> Optional[datetime]:
+    """Start of the final occurrence implied by COUNT, computed without iterating"""
+    if rule.count is None:
+        return None
+
+    period, offsets = _occurrence_pattern(rule, first_start)
+    # Offsets before the first occurrence fall in the first period but are not part of the series
+    skipped = sum(1 for offset in offsets if offset < timedelta(0))
+    index = rule.count - 1 + skipped
+    return first_start + period * (index // len(offsets)) + offsets[index % len(offsets)]
+
+
+def series_end(rule: RecurrenceRule, first_start: datetime, first_end: datetime) -> Optional[datetime]:
+    """
+    End of the last occurrence of a series, or None for open-ended series.
+
+    Stored as recurrence_until so window queries can prune finished series.
+    Skipped occurrences are ignored, which only makes the bound looser.
+    """
+    last_start = _last_allowed_start(rule, first_start)
+    if last_start is None:
+        return None
+
+    # The last occurrence starts within one period before the bound
+    period, _ = _occurrence_pattern(rule, first_start)
+    window_start = last_start - period - (first_end - first_start)
+    last_end = first_end
+    for _, occurrence_end in expand_occurrences(
+        rule, first_start, first_end, window_start, last_start + timedelta(microseconds=1),
+        include_exceptions=True
+    ):
+        last_end = occurrence_end
+    return last_end
+
+
+def _last_allowed_start(rule: RecurrenceRule, first_start: datetime) -> Optional[datetime]:
+    """Latest occurrence start permitted by UNTIL and COUNT"""
+    return min(
+        (b for b in (rule.until, _last_start_by_count(rule, first_start)) if b is not None),
+        default=None
+    )
+
+
+def expand_occurrences(
+    rule: RecurrenceRule,
+    first_start: datetime,
+    first_end: datetime,
+    window_start: datetime,
+    window_end: datetime,
+    include_exceptions: bool = False
+) -> Iterator[Tuple[datetime, datetime]]:
+    """
+    Yield (start, end) of the occurrences that overlap a window.
+
+    Expansion jumps straight to the first period touching the window, so the
+    cost depends on the window size rather than on the age of the series.
+
+    Args:
+        rule: Recurrence rule
+        first_start: Start of the first occurrence
+        first_end: End of the first occurrence
+        window_start: Window start (occurrences ending after it are included)
+        window_end: Window end (occurrences starting before it are included)
+        include_exceptions: Also yield occurrences listed in rule.exceptions
+    """
+    duration = first_end - first_start
+    period, offsets = _occurrence_pattern(rule, first_start)
+
+    last_start = _last_allowed_start(rule, first_start)
+    skipped = set() if include_exceptions else {e.timestamp() for e in rule.exceptions}
+
+    # First period whose occurrences can still end after window_start
+    earliest = window_start - duration - max(offsets)
+    period_index = max(0, (earliest - first_start) // period)
+
+    while True:
+        period_start = first_start + period * period_index
+        if period_start + min(offsets) >= window_end:
+            return
+        for offset in offsets:
+            start = period_start + offset
+            if start < first_start:
+                continue
+            if last_start is not None and start > last_start:
+                return
+            if start >= window_end:
+                return
+            end = start + duration
+            if end > window_start and start.timestamp() not in skipped:
+                yield start, end
+        period_index += 1
+
+
+def align_timezone(value: datetime, reference: datetime) -> datetime:
+    """
+    Make a datetime comparable with a database value.
+
+    Naive request datetimes are interpreted in the reference's timezone, the
+    same way PostgreSQL reads naive parameters in the session timezone.
+    """
+    if value.tzinfo is None and reference.tzinfo is not None:
+        return value.replace(tzinfo=reference.tzinfo)
+    if value.tzinfo is not None and reference.tzinfo is None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def convert_timezone(value: datetime, reference: datetime) -> datetime:
+    """Express a datetime in the reference's timezone, naive meaning local time"""
+    if value.tzinfo is not None and reference.tzinfo is not None:
+        return value.astimezone(reference.tzinfo)
+    return align_timezone(value, reference)
+
+
+def rule_from_row(row: Any) -> Optional[RecurrenceRule]:
+    """Recurrence rule of an equipment_schedules row, or None for one-off schedules"""
+    if getattr(row, 'recurrence_rule', None) is None:
+        return None
+    return parse_rrule(row.recurrence_rule, row.start_datetime, row.recurrence_exceptions)
+
+
+def expand_rows(
+    rows: Iterable[Any],
+    window_start: datetime,
+    window_end: datetime
+) -> Iterator[Tuple[Any, datetime, datetime]]:
+    """
+    Yield (row, start, end) for every occurrence of the rows inside a window.
+
+    One-off schedules are passed through unchanged; recurring series are
+    expanded lazily. Rows need start_datetime, end_datetime and the
+    recurrence columns.
+    """
+    for row in rows:
+        rule = rule_from_row(row)
+        if rule is None:
+            yield row, row.start_datetime, row.end_datetime
+            continue
+        for start, end in expand_occurrences(
+            rule,
+            row.start_datetime,
+            row.end_datetime,
+            align_timezone(window_start, row.start_datetime),
+            align_timezone(window_end, row.start_datetime)
+        ):
+            yield row, start, end
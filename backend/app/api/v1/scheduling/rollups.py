@@ -0,0 +1,187 @@
+# Equipment Scheduling Rollups - Pre-aggregated dashboard metrics
+# Maintains per-day, per-status, per-equipment-type aggregates of equipment_schedules
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Iterable, Optional, Dict, Any
+from datetime import date, datetime, timedelta
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleRollupService:
+    """
+    Maintains the schedule_daily_rollups table behind the dashboard overview.
+
+    Rollup rows are keyed by the day a schedule starts, in the session time
+    zone. Writes recompute the affected days inside the caller's transaction;
+    a catch-up refresh picks up the days a trigger recorded in
+    schedule_rollup_changes, which covers writes made outside the service,
+    days schedules moved away from, and deletes.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh_days(self, days: Iterable[date]) -> None:
+        """
+        Recompute rollup rows for the given days from equipment_schedules.
+
+        Does not commit; callers refresh inside the transaction that changed
+        the schedules so the rollup never diverges from committed data.
+
+        Args:
+            days: Schedule start days to recompute
+        """
+        days = sorted(set(days))
+        if not days:
+            return
+
+        # Serialize concurrent refreshes of the same day; locks are taken in
+        # day order so refreshes of overlapping day sets cannot deadlock
+        self.db.execute(text("""
+            SELECT pg_advisory_xact_lock(hashtext('schedule_daily_rollups:' || day))
+            FROM unnest(CAST(:days AS DATE[])) AS day
+        """), {'days': days})
+
+        self.db.execute(
+            text("DELETE FROM schedule_daily_rollups WHERE day = ANY(:days)"),
+            {'days': days}
+        )
+        self.db.execute(text("""
+            INSERT INTO schedule_daily_rollups (
+                day, status, equipment_type, schedule_count,
+                scheduled_hours, equipment_ids, refreshed_at
+            )
+            SELECT
+                es.start_datetime::date,
+                es.status,
+                e.equipment_type,
+                COUNT(*),
+                SUM(EXTRACT(EPOCH FROM (es.end_datetime - es.start_datetime)) / 3600.0),
+                ARRAY_AGG(DISTINCT es.equipment_id),
+                CURRENT_TIMESTAMP
+            FROM equipment_schedules es
+            JOIN equipment e ON es.equipment_id = e.id
+            WHERE es.start_datetime >= :first_day
+                AND es.start_datetime < :after_last_day
+                AND es.start_datetime::date = ANY(:days)
+            GROUP BY es.start_datetime::date, es.status, e.equipment_type
+        """), {
+            'days': days,
+            'first_day': days[0],
+            'after_last_day': days[-1] + timedelta(days=1)
+        })
+
+        logger.debug(f"Refreshed schedule rollups for {len(days)} days")
+
+    def refresh_for_intervals(self, *start_datetimes: Optional[datetime]) -> None:
+        """
+        Recompute rollups for the days on which the given schedules start.
+
+        Days are taken in SQL, in the session time zone the rollups are
+        grouped by, rather than from each datetime's own offset.
+        """
+        starts = [dt for dt in start_datetimes if dt is not None]
+        if not starts:
+            return
+        days = self.db.execute(text("""
+            SELECT DISTINCT CAST(start_datetime AS DATE) AS day
+            FROM unnest(CAST(:starts AS TIMESTAMPTZ[])) AS start_datetime
+        """), {'starts': starts})
+        self.refresh_days(row.day for row in days)
+
+    def catch_up(self, max_staleness_seconds: Optional[int] = None) -> Optional[datetime]:
+        """
+        Bring rollups up to date with schedules changed since the last catch-up.
+
+        Skipped when the previous catch-up is younger than the staleness budget.
+
+        Args:
+            max_staleness_seconds: Maximum acceptable age of the rollups
+
+        Returns:
+            Timestamp up to which all schedule changes are reflected
+        """
+        if max_staleness_seconds is None:
+            max_staleness_seconds = settings.SCHEDULING_ROLLUP_MAX_STALENESS_SECONDS
+
+        state = self.db.execute(text("""
+            SELECT refreshed_through, CURRENT_TIMESTAMP AS now
+            FROM schedule_rollup_state
+            WHERE id = 1
+            FOR UPDATE
+        """)).fetchone()
+
+        if state is None:
+            raise RuntimeError("schedule_rollup_state is missing; apply migrations/001_schedule_daily_rollups.sql")
+
+        if (state.refreshed_through is not None
+                and (state.now - state.refreshed_through).total_seconds() < max_staleness_seconds):
+            self.db.commit()  # Release the state row lock
+            return state.refreshed_through
+
+        # Changes committed after this point stay queued for the next catch-up
+        days = {row.day for row in self.db.execute(text("""
+            WITH changed AS (
+                DELETE FROM schedule_rollup_changes RETURNING start_datetime
+            )
+            SELECT DISTINCT CAST(start_datetime AS DATE) AS day FROM changed
+        """))}
+        if state.refreshed_through is None:
+            # First run: rebuild every day that has schedules
+            days.update(row.day for row in self.db.execute(
+                text("SELECT DISTINCT start_datetime::date AS day FROM equipment_schedules")
+            ))
+        self.refresh_days(days)
+
+        self.db.execute(
+            text("UPDATE schedule_rollup_state SET refreshed_through = :now WHERE id = 1"),
+            {'now': state.now}
+        )
+        self.db.commit()
+
+        logger.info(f"Schedule rollup catch-up refreshed {len(days)} days")
+        return state.now
+
+    def get_overview(self, start_day: date, end_day: date) -> Dict[str, Any]:
+        """
+        Aggregate dashboard metrics for schedules starting between two days.
+
+        Args:
+            start_day: First day included
+            end_day: Last day included
+
+        Returns:
+            Overview metrics summed from the rollup table
+        """
+        overview_query = text("""
+            SELECT
+                COALESCE(SUM(schedule_count), 0) AS total_schedules,
+                COALESCE(SUM(CASE WHEN status = 'active' THEN schedule_count END), 0) AS active_schedules,
+                COALESCE(SUM(CASE WHEN status = 'scheduled' THEN schedule_count END), 0) AS upcoming_schedules,
+                SUM(scheduled_hours) / NULLIF(SUM(schedule_count), 0) AS avg_duration_hours,
+                (
+                    SELECT COUNT(DISTINCT equipment_id)
+                    FROM schedule_daily_rollups r, UNNEST(r.equipment_ids) AS equipment_id
+                    WHERE r.day BETWEEN :start_day AND :end_day
+                ) AS equipment_scheduled
+            FROM schedule_daily_rollups
+            WHERE day BETWEEN :start_day AND :end_day
+        """)
+
+        row = self.db.execute(overview_query, {
+            'start_day': start_day,
+            'end_day': end_day
+        }).fetchone()
+
+        return {
+            "total_schedules": int(row.total_schedules),
+            "equipment_scheduled": int(row.equipment_scheduled or 0),
+            "active_schedules": int(row.active_schedules),
+            "upcoming_schedules": int(row.upcoming_schedules),
+            "average_duration_hours": round(float(row.avg_duration_hours or 0), 2)
+        }
@@ -1,19 +1,33 @@
 # Equipment Scheduling API Router
 # REST API endpoints for equipment scheduling system
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from app.core.database import get_db
+from app.core.deps import get_current_user
+from app.models.user import User
 from .schemas import (
     ScheduleCreate, ScheduleUpdate, ScheduleResponse, ScheduleListResponse,
     ConflictCheckRequest, ConflictCheckResponse, EquipmentAvailability,
     ScheduleStatistics, SmartScheduleRequest, SmartScheduleResponse,
-    BulkScheduleCreate, BulkScheduleResponse, ScheduleStatus
+    BulkScheduleCreate, BulkScheduleResponse, ScheduleStatus,
+    ScheduleTimelineResponse, ConflictAnalyticsResponse, AvailableOperatorsResponse,
+    FleetOptimizationRequest, FleetOptimizationResponse, FleetStateResponse,
+    WorkingCalendarCreate, WorkingCalendarUpdate, WorkingCalendarResponse,
+    CrewSearchRequest, CrewSearchResponse, CrewBookingRequest, CrewBookingResponse
 )
-from .service import SchedulingService
+from .service import SchedulingService, ScheduleVersionConflict
+from .recurrence import expand_rows, rule_from_row
+from .rollups import ScheduleRollupService
+from .cache import invalidate_equipment
+from .calendars import WorkingCalendarService
+from .ical import etag_matches, feed_etag, feed_name, iter_feed
+from .exports import SCHEDULE_EXPORT_COLUMNS, iter_schedule_rows, schedule_list_filters
+from app.core.exports import EXPORT_FORMATS
 
 router = APIRouter()
 
@@ -91,37 +105,12 @@ async def list_schedules(
     
     Supports filtering by equipment, project, operator, status, and date ranges.
     """
-    # Build dynamic query based on filters
-    from sqlalchemy import text, and_
-    
-    conditions = []
-    params = {}
-    
-    if equipment_id:
-        conditions.append("es.equipment_id = :equipment_id")
-        params['equipment_id'] = equipment_id
-    
-    if project_id:
-        conditions.append("es.project_id = :project_id")
-        params['project_id'] = project_id
-    
-    if operator_id:
-        conditions.append("es.operator_id = :operator_id")
-        params['operator_id'] = operator_id
-    
-    if status:
-        conditions.append("es.status = :status")
-        params['status'] = status.value
-    
-    if start_date:
-        conditions.append("es.start_datetime >= :start_date")
-        params['start_date'] = start_date
-    
-    if end_date:
-        conditions.append("es.end_datetime <= :end_date")
-        params['end_date'] = end_date
+    from sqlalchemy import text
     
-    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    where_clause, params = schedule_list_filters(
+        equipment_id, project_id, operator_id,
+        status.value if status else None, start_date, end_date
+    )
     
     # Count total records
     count_query = text(f"""
@@ -168,9 +157,11 @@ async def list_schedules(
             created_by=row.created_by,
             created_at=row.created_at,
             updated_at=row.updated_at,
+            version=row.version,
             equipment_name=row.equipment_name,
             project_name=row.project_name,
-            operator_name=row.operator_name
+            operator_name=row.operator_name,
+            recurrence=rule_from_row(row)
         ))
     
     total_pages = (total + per_page - 1) // per_page
@@ -195,13 +186,37 @@ async def update_schedule(
     """
     Update an existing schedule.
     
-    Performs conflict detection if date/time changes are made.
+    Send the ``version`` returned with the schedule; if the schedule has
+    changed since, the update is rejected with 409 and must be retried on
+    fresh data. Performs conflict detection if equipment or date/time
+    changes are made.
     """
-    # TODO: Implement schedule update logic with conflict detection
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Schedule update functionality coming soon"
-    )
+    try:
+        service = SchedulingService(db)
+        schedule = await service.update_schedule(schedule_id, schedule_data)
+    except ScheduleVersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update schedule: {str(e)}"
+        )
+    
+    if not schedule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Schedule with ID {schedule_id} not found"
+        )
+    
+    return schedule
 
 
 @router.delete("/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -217,10 +232,11 @@ async def cancel_schedule(
     from sqlalchemy import text
     
     # Check if schedule exists
-    check_query = text("SELECT id FROM equipment_schedules WHERE id = :schedule_id")
+    check_query = text("SELECT id, equipment_id, start_datetime FROM equipment_schedules WHERE id = :schedule_id")
     result = db.execute(check_query, {'schedule_id': schedule_id})
+    schedule_row = result.fetchone()
     
-    if not result.fetchone():
+    if not schedule_row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Schedule with ID {schedule_id} not found"
@@ -229,12 +245,14 @@ async def cancel_schedule(
     # Cancel the schedule
     cancel_query = text("""
         UPDATE equipment_schedules 
-        SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP
+        SET status = 'cancelled', version = version + 1, updated_at = CURRENT_TIMESTAMP
         WHERE id = :schedule_id
     """)
     
     db.execute(cancel_query, {'schedule_id': schedule_id})
+    ScheduleRollupService(db).refresh_for_intervals(schedule_row.start_datetime)
     db.commit()
+    invalidate_equipment(schedule_row.equipment_id)
 
 
 @router.post("/conflicts/check", response_model=ConflictCheckResponse)
@@ -253,7 +271,9 @@ async def check_schedule_conflicts(
             conflict_request.equipment_id,
             conflict_request.start_datetime,
             conflict_request.end_datetime,
-            conflict_request.exclude_schedule_id
+            conflict_request.exclude_schedule_id,
+            conflict_request.operator_id,
+            record=False
         )
         
         has_conflicts = len(conflicts) > 0
@@ -277,6 +297,63 @@ async def check_schedule_conflicts(
         )
 
 
+@router.get("/conflicts/analytics", response_model=ConflictAnalyticsResponse)
+async def get_conflict_analytics(
+    start_date: datetime = Query(..., description="Analysis start date"),
+    end_date: datetime = Query(..., description="Analysis end date"),
+    equipment_type: Optional[str] = Query(None, description="Filter by equipment type"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum equipment returned"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get conflict frequency per equipment.
+    
+    Counts conflicts recorded in the conflict log by severity, most
+    conflicted equipment first.
+    """
+    if end_date <= start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must be after start_date"
+        )
+    
+    try:
+        service = SchedulingService(db)
+        return await service.get_conflict_analytics(
+            start_date, end_date, equipment_type, limit
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get conflict analytics: {str(e)}"
+        )
+
+
+@router.get("/operators/available", response_model=AvailableOperatorsResponse)
+async def get_available_operators(
+    start_datetime: datetime = Query(..., description="Window start"),
+    end_datetime: datetime = Query(..., description="Window end"),
+    db: Session = Depends(get_db)
+):
+    """
+    List active operators that are not booked at any time in a window.
+    """
+    if end_datetime <= start_datetime:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_datetime must be after start_datetime"
+        )
+    
+    try:
+        service = SchedulingService(db)
+        return await service.get_available_operators(start_datetime, end_datetime)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get available operators: {str(e)}"
+        )
+
+
 @router.get("/equipment/{equipment_id}/availability", response_model=EquipmentAvailability)
 async def get_equipment_availability(
     equipment_id: int,
@@ -364,6 +441,82 @@ async def get_smart_schedule_suggestions(
         )
 
 
+@router.post("/optimize", response_model=FleetOptimizationResponse)
+async def optimize_fleet_assignment(
+    optimization_request: FleetOptimizationRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Assign a batch of scheduling requests across the fleet.
+    
+    Each request names an equipment type, duration, window and priority.
+    Returns the proposed equipment and start time per request; create the
+    schedules to book them.
+    """
+    try:
+        service = SchedulingService(db)
+        return await service.optimize_fleet_assignment(optimization_request)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to optimize fleet assignment: {str(e)}"
+        )
+
+
+@router.post("/crews/search", response_model=CrewSearchResponse)
+async def search_crew_windows(
+    request: CrewSearchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Find the earliest windows in which a whole crew is free together.
+    
+    Give either exact **equipment_ids** or **requirements** (equipment type
+    and quantity, e.g. one excavator, two dump trucks and a roller). Windows
+    respect each unit's bookings and working calendar; nothing is booked.
+    """
+    try:
+        service = SchedulingService(db)
+        return await service.find_crew_windows(request)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search crew windows: {str(e)}"
+        )
+
+
+@router.post("/crews/book", response_model=CrewBookingResponse, status_code=status.HTTP_201_CREATED)
+async def book_crew(
+    request: CrewBookingRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Book several units (and their operators) for the same window.
+    
+    All schedules are created in one transaction; if any member conflicts,
+    none are created.
+    """
+    try:
+        service = SchedulingService(db)
+        return await service.book_crew(request, current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to book crew: {str(e)}"
+        )
+
+
 @router.post("/bulk", response_model=BulkScheduleResponse)
 async def create_bulk_schedules(
     bulk_request: BulkScheduleCreate,
@@ -394,19 +547,28 @@ async def get_equipment_schedules(
     """
     Get all schedules for a specific piece of equipment.
     
-    Useful for equipment-centric views and timeline displays.
+    Useful for equipment-centric views and timeline displays. When both dates
+    are given, recurring series are expanded into one entry per occurrence in
+    the range (sharing the series ID); otherwise each series is returned once.
     """
     from sqlalchemy import text
     
     conditions = ["es.equipment_id = :equipment_id"]
     params = {'equipment_id': equipment_id}
+    expand_series = start_date is not None and end_date is not None
     
     if start_date:
-        conditions.append("es.start_datetime >= :start_date")
+        conditions.append("""(
+            (es.recurrence_rule IS NULL AND es.start_datetime >= :start_date)
+            OR (es.recurrence_rule IS NOT NULL AND COALESCE(es.recurrence_until, 'infinity') > :start_date)
+        )""")
         params['start_date'] = start_date
     
     if end_date:
-        conditions.append("es.end_datetime <= :end_date")
+        conditions.append("""(
+            (es.recurrence_rule IS NULL AND es.end_datetime <= :end_date)
+            OR (es.recurrence_rule IS NOT NULL AND es.start_datetime < :end_date)
+        )""")
         params['end_date'] = end_date
     
     if status:
@@ -431,25 +593,35 @@ async def get_equipment_schedules(
     
     result = db.execute(query, params)
     
+    if expand_series:
+        occurrences = expand_rows(result, start_date, end_date)
+    else:
+        occurrences = ((row, row.start_datetime, row.end_datetime) for row in result)
+    
     schedules = []
-    for row in result:
+    for row, occurrence_start, occurrence_end in occurrences:
         schedules.append(ScheduleResponse(
             id=row.id,
             equipment_id=row.equipment_id,
             project_id=row.project_id,
             operator_id=row.operator_id,
-            start_datetime=row.start_datetime,
-            end_datetime=row.end_datetime,
+            start_datetime=occurrence_start,
+            end_datetime=occurrence_end,
             status=row.status,
             notes=row.notes,
             created_by=row.created_by,
             created_at=row.created_at,
             updated_at=row.updated_at,
+            version=row.version,
             equipment_name=row.equipment_name,
             project_name=row.project_name,
-            operator_name=row.operator_name
+            operator_name=row.operator_name,
+            recurrence=rule_from_row(row)
         ))
     
+    if expand_series:
+        schedules.sort(key=lambda schedule: schedule.start_datetime)
+    
     return schedules
 
 
@@ -462,31 +634,16 @@ async def get_scheduling_overview(
     """
     Get high-level scheduling overview for dashboard display.
     
-    Returns key metrics and alerts for the specified time period.
+    Returns key metrics and alerts for the specified time period, served from
+    the daily scheduling rollups. ``freshness`` is the time up to which all
+    schedule changes are reflected in the metrics.
     """
-    from sqlalchemy import text
-    
     end_date = datetime.now()
     start_date = end_date - timedelta(days=date_range_days)
     
-    overview_query = text("""
-        SELECT 
-            COUNT(*) as total_schedules,
-            COUNT(DISTINCT equipment_id) as equipment_scheduled,
-            COUNT(CASE WHEN status = 'active' THEN 1 END) as active_schedules,
-            COUNT(CASE WHEN status = 'scheduled' THEN 1 END) as upcoming_schedules,
-            AVG(EXTRACT(EPOCH FROM (end_datetime - start_datetime)) / 3600.0) as avg_duration_hours
-        FROM equipment_schedules
-        WHERE start_datetime >= :start_date
-            AND start_datetime <= :end_date
-    """)
-    
-    result = db.execute(overview_query, {
-        'start_date': start_date,
-        'end_date': end_date
-    })
-    
-    row = result.fetchone()
+    rollups = ScheduleRollupService(db)
+    freshness = rollups.catch_up()
+    metrics = rollups.get_overview(start_date.date(), end_date.date())
     
     return {
         "date_range": {
@@ -494,12 +651,250 @@ async def get_scheduling_overview(
             "end": end_date,
             "days": date_range_days
         },
-        "metrics": {
-            "total_schedules": row.total_schedules or 0,
-            "equipment_scheduled": row.equipment_scheduled or 0,
-            "active_schedules": row.active_schedules or 0,
-            "upcoming_schedules": row.upcoming_schedules or 0,
-            "average_duration_hours": round(row.avg_duration_hours or 0, 2)
-        },
+        "metrics": metrics,
+        "freshness": freshness,
         "alerts": []  # TODO: Implement alert logic for conflicts, overdue schedules, etc.
     }
+
+
+@router.get("/fleet/state", response_model=FleetStateResponse)
+async def get_fleet_state(
+    at: datetime = Query(..., description="Point in time to inspect"),
+    equipment_type: Optional[str] = Query(None, description="Filter by equipment type"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get what every machine was doing at a point in time.
+    
+    Returns each equipment's running schedule, operator, project and last
+    reported hourmeter as of the given timestamp.
+    """
+    try:
+        service = SchedulingService(db)
+        return await service.get_fleet_state(at, equipment_type)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get fleet state: {str(e)}"
+        )
+
+
+@router.get(
+    "/dashboard/timeline",
+    response_class=StreamingResponse,
+    responses={200: {"model": ScheduleTimelineResponse}}
+)
+async def get_schedule_timeline(
+    start_date: datetime = Query(..., description="Timeline window start"),
+    end_date: datetime = Query(..., description="Timeline window end"),
+    equipment_ids: Optional[List[int]] = Query(None, description="Equipment IDs to include (all if omitted)"),
+    include_cancelled: bool = Query(False, description="Include cancelled schedules"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a compact timeline of schedules for the Gantt board.
+    
+    Returns equipment, project and operator lookup tables plus columnar
+    schedule arrays that reference them by index. Times are Unix epoch
+    seconds. Schedules are read from a server-side cursor into the columns,
+    and the JSON body is encoded in chunks as it is sent.
+    """
+    if end_date <= start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must be after start_date"
+        )
+    
+    try:
+        service = SchedulingService(db)
+        timeline = await service.get_timeline(
+            start_date, end_date, equipment_ids, include_cancelled
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to build timeline: {str(e)}"
+        )
+    
+    return StreamingResponse(
+        SchedulingService.iter_timeline_json(timeline),
+        media_type="application/json"
+    )
+
+
+@router.get("/export/{export_format}", response_class=StreamingResponse)
+async def export_schedules(
+    export_format: str,
+    equipment_id: Optional[int] = Query(None, description="Filter by equipment ID"),
+    project_id: Optional[int] = Query(None, description="Filter by project ID"),
+    operator_id: Optional[int] = Query(None, description="Filter by operator ID"),
+    status_filter: Optional[ScheduleStatus] = Query(None, alias="status", description="Filter by schedule status"),
+    start_date: Optional[datetime] = Query(None, description="Filter schedules starting after this date"),
+    end_date: Optional[datetime] = Query(None, description="Filter schedules ending before this date")
+):
+    """
+    Export schedules as CSV or Excel (xlsx).
+    
+    Takes the same filters as the schedule list but returns every matching
+    row in one streamed file, read from a server-side cursor.
+    """
+    export = EXPORT_FORMATS.get(export_format.lower())
+    if export is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid export format. Must be one of: {list(EXPORT_FORMATS)}"
+        )
+    
+    where_clause, params = schedule_list_filters(
+        equipment_id, project_id, operator_id,
+        status_filter.value if status_filter else None, start_date, end_date
+    )
+    file_name = f"equipment_schedules_{datetime.now(timezone.utc).strftime('%Y%m%d')}.{export_format.lower()}"
+    return StreamingResponse(
+        export.encode(SCHEDULE_EXPORT_COLUMNS, iter_schedule_rows(where_clause, params), "Schedules"),
+        media_type=export.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
+
+
+def _calendar_feed(scope: str, entity_id: int, if_none_match: Optional[str], db: Session) -> Response:
+    """Serve an iCalendar feed, or 304 when the client's copy is current"""
+    etag, last_modified = feed_etag(db, scope, entity_id)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    if last_modified is not None:
+        headers["Last-Modified"] = last_modified.astimezone(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    name = feed_name(db, scope, entity_id)
+    if name is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{scope.capitalize()} {entity_id} not found"
+        )
+    
+    headers["Content-Disposition"] = f'inline; filename="{scope}-{entity_id}.ics"'
+    return StreamingResponse(
+        iter_feed(scope, entity_id, f"{name} schedule"),
+        media_type="text/calendar; charset=utf-8",
+        headers=headers
+    )
+
+
+@router.get("/calendars/equipment/{equipment_id}.ics", response_class=StreamingResponse)
+async def get_equipment_calendar(
+    equipment_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    iCalendar feed of an equipment's schedules for calendar apps.
+    
+    Supports conditional GET: send the last ETag in If-None-Match to get
+    304 Not Modified when nothing changed.
+    """
+    return _calendar_feed("equipment", equipment_id, if_none_match, db)
+
+
+@router.get("/calendars/projects/{project_id}.ics", response_class=StreamingResponse)
+async def get_project_calendar(
+    project_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    iCalendar feed of a project's equipment schedules.
+    
+    Supports conditional GET with If-None-Match.
+    """
+    return _calendar_feed("project", project_id, if_none_match, db)
+
+
+@router.get("/calendars/operators/{operator_id}.ics", response_class=StreamingResponse)
+async def get_operator_calendar(
+    operator_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    iCalendar feed of an operator's assignments.
+    
+    Supports conditional GET with If-None-Match.
+    """
+    return _calendar_feed("operator", operator_id, if_none_match, db)
+
+
+@router.post("/working-calendars", response_model=WorkingCalendarResponse, status_code=status.HTTP_201_CREATED)
+async def create_working_calendar(
+    calendar_data: WorkingCalendarCreate,
+    db: Session = Depends(get_db)
+):
+    """
+    Create a working calendar for a company or site.
+    
+    - **weekly_hours**: Shift periods per weekday on 15-minute boundaries
+    - **holidays**: Whole non-working days
+    - **is_default**: Applies to company equipment without a calendar of its own
+    """
+    try:
+        return WorkingCalendarService(db).create_calendar(calendar_data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create working calendar: {str(e)}"
+        )
+
+
+@router.get("/working-calendars/{calendar_id}", response_model=WorkingCalendarResponse)
+async def get_working_calendar(
+    calendar_id: int,
+    db: Session = Depends(get_db)
+):
+    """Get a working calendar by ID"""
+    calendar = WorkingCalendarService(db).get_calendar(calendar_id)
+    if not calendar:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Working calendar with ID {calendar_id} not found"
+        )
+    return calendar
+
+
+@router.put("/working-calendars/{calendar_id}", response_model=WorkingCalendarResponse)
+async def update_working_calendar(
+    calendar_id: int,
+    calendar_data: WorkingCalendarUpdate,
+    db: Session = Depends(get_db)
+):
+    """
+    Update a working calendar.
+    
+    Availability of every equipment following the calendar reflects the
+    change immediately.
+    """
+    try:
+        calendar = WorkingCalendarService(db).update_calendar(calendar_id, calendar_data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update working calendar: {str(e)}"
+        )
+    
+    if not calendar:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Working calendar with ID {calendar_id} not found"
+        )
+    
+    return calendar
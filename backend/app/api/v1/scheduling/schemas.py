@@ -3,7 +3,7 @@
 
 from pydantic import BaseModel, Field, ConfigDict, validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from enum import Enum
 
 
@@ -28,6 +28,48 @@ class SlotType(str, Enum):
     SCHEDULED = "scheduled"
 
 
+class RecurrenceFrequency(str, Enum):
+    """Supported recurrence frequencies (RRULE FREQ)"""
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+
+
+# Recurring schedule rule
+class RecurrenceRule(BaseModel):
+    """RRULE-style recurrence for schedules repeated as a single series"""
+    frequency: RecurrenceFrequency = Field(..., description="Repeat daily or weekly")
+    interval: int = Field(1, ge=1, le=52, description="Repeat every N days or weeks")
+    by_weekday: List[int] = Field(default=[], description="Weekdays for weekly rules (0=Monday, 6=Sunday); defaults to the start weekday")
+    until: Optional[datetime] = Field(None, description="Last allowed occurrence start")
+    count: Optional[int] = Field(None, ge=1, le=10000, description="Total number of occurrences")
+    exceptions: List[datetime] = Field(default=[], description="Occurrence start times that are skipped")
+
+    @validator('by_weekday')
+    def validate_weekdays(cls, v, values):
+        """Ensure weekdays are valid and only used with weekly rules"""
+        if any(day < 0 or day > 6 for day in v):
+            raise ValueError('Weekdays must be between 0 (Monday) and 6 (Sunday)')
+        if v and values.get('frequency') != RecurrenceFrequency.WEEKLY:
+            raise ValueError('by_weekday is only supported for weekly recurrence')
+        return sorted(set(v))
+
+    @validator('count')
+    def validate_single_bound(cls, v, values):
+        """UNTIL and COUNT are mutually exclusive, as in RFC 5545"""
+        if v is not None and values.get('until') is not None:
+            raise ValueError('Specify either until or count, not both')
+        return v
+
+
+def _in_timezone_of(value: datetime, reference: datetime) -> datetime:
+    """Express value in reference's timezone; naive values are taken to be in it already"""
+    if reference.tzinfo is None:
+        return value.astimezone().replace(tzinfo=None) if value.tzinfo is not None else value
+    if value.tzinfo is None:
+        return value.replace(tzinfo=reference.tzinfo)
+    return value.astimezone(reference.tzinfo)
+
+
 # Base schedule schema
 class ScheduleBase(BaseModel):
     """Base schedule data structure"""
@@ -37,6 +79,7 @@ class ScheduleBase(BaseModel):
     start_datetime: datetime = Field(..., description="Schedule start date and time")
     end_datetime: datetime = Field(..., description="Schedule end date and time")
     notes: Optional[str] = Field(None, max_length=1000, description="Additional notes")
+    recurrence: Optional[RecurrenceRule] = Field(None, description="Repeat this schedule as a series; start/end describe the first occurrence")
 
     @validator('end_datetime')
     def validate_date_range(cls, v, values):
@@ -45,6 +88,35 @@ class ScheduleBase(BaseModel):
             raise ValueError('End datetime must be after start datetime')
         return v
 
+    @validator('recurrence')
+    def validate_recurrence(cls, v, values):
+        """
+        Ensure occurrences do not overlap each other and the series ends after it starts.
+
+        until and exceptions are expressed in the first occurrence's timezone,
+        naive values being read in it, so they compare with the start and
+        with stored series.
+        """
+        if v is None or 'start_datetime' not in values or 'end_datetime' not in values:
+            return v
+        first_start = values['start_datetime']
+        v = v.model_copy(update={
+            'until': _in_timezone_of(v.until, first_start) if v.until is not None else None,
+            'exceptions': [_in_timezone_of(exception, first_start) for exception in v.exceptions]
+        })
+        if v.frequency == RecurrenceFrequency.DAILY:
+            min_gap_days = v.interval
+        else:
+            days = v.by_weekday or [values['start_datetime'].weekday()]
+            gaps = [b - a for a, b in zip(days, days[1:])]
+            gaps.append(7 * v.interval - days[-1] + days[0])
+            min_gap_days = min(gaps)
+        if values['end_datetime'] - values['start_datetime'] > timedelta(days=min_gap_days):
+            raise ValueError('Recurring occurrences must not overlap each other')
+        if v.until is not None and v.until < values['start_datetime']:
+            raise ValueError('Recurrence until must not be before the first occurrence')
+        return v
+
 
 # Schedule creation schema
 class ScheduleCreate(ScheduleBase):
@@ -53,9 +125,10 @@ class ScheduleCreate(ScheduleBase):
     @validator('start_datetime')
     def validate_future_start(cls, v):
         """Ensure schedule starts in the future (with some tolerance)"""
-        if v < datetime.now():
+        now = datetime.now(v.tzinfo)  # Naive starts compare with local time
+        if v < now:
             # Allow scheduling up to 1 hour in the past for flexibility
-            if (datetime.now() - v).total_seconds() > 3600:
+            if (now - v).total_seconds() > 3600:
                 raise ValueError('Schedule start time cannot be more than 1 hour in the past')
         return v
 
@@ -63,6 +136,8 @@ class ScheduleCreate(ScheduleBase):
 # Schedule update schema
 class ScheduleUpdate(BaseModel):
     """Schema for updating existing schedules"""
+    version: int = Field(..., ge=1, description="Schedule version this edit is based on")
+    equipment_id: Optional[int] = Field(None, description="Move the schedule to other equipment")
     project_id: Optional[int] = Field(None, description="Associated project ID")
     operator_id: Optional[int] = Field(None, description="Assigned operator ID")
     start_datetime: Optional[datetime] = Field(None, description="Schedule start date and time")
@@ -81,6 +156,7 @@ class ScheduleResponse(ScheduleBase):
     created_by: int = Field(..., description="User ID who created the schedule")
     created_at: datetime = Field(..., description="Schedule creation timestamp")
     updated_at: datetime = Field(..., description="Last update timestamp")
+    version: int = Field(1, description="Optimistic concurrency version; send it back when updating")
     
     # Optional related entity information (populated by joins)
     equipment_name: Optional[str] = Field(None, description="Equipment name")
@@ -93,6 +169,7 @@ class ScheduleConflict(BaseModel):
     """Schedule conflict information"""
     conflicting_schedule_id: int = Field(..., description="ID of conflicting schedule")
     equipment_id: int = Field(..., description="Equipment ID with conflict")
+    operator_id: Optional[int] = Field(None, description="Operator double-booked by this conflict")
     conflict_start: datetime = Field(..., description="Overlap start time")
     conflict_end: datetime = Field(..., description="Overlap end time")
     overlap_hours: float = Field(..., description="Number of overlapping hours")
@@ -100,6 +177,49 @@ class ScheduleConflict(BaseModel):
     message: str = Field(..., description="Human-readable conflict description")
 
 
+# Conflict frequency analytics
+class EquipmentConflictFrequency(BaseModel):
+    """Logged conflicts for one piece of equipment"""
+    equipment_id: int = Field(..., description="Equipment ID")
+    equipment_name: str = Field(..., description="Equipment name")
+    equipment_type: Optional[str] = Field(None, description="Equipment type")
+    total_conflicts: int = Field(..., description="Conflicts detected in the period")
+    error_count: int = Field(..., description="Direct overlaps detected")
+    warning_count: int = Field(..., description="Adjacent schedules detected")
+    info_count: int = Field(..., description="Nearby schedules detected")
+    conflicting_schedules: int = Field(..., description="Distinct existing schedules involved")
+    days_with_conflicts: int = Field(..., description="Days on which conflicts were detected")
+    conflicts_per_day: float = Field(..., description="Average conflicts per day of the period")
+    last_conflict_at: datetime = Field(..., description="When the latest conflict was detected")
+
+
+class ConflictAnalyticsResponse(BaseModel):
+    """Conflict frequency per equipment from the conflict log"""
+    date_range_start: datetime = Field(..., description="Analysis date range start")
+    date_range_end: datetime = Field(..., description="Analysis date range end")
+    total_conflicts: int = Field(..., description="Conflicts detected across all equipment")
+    equipment_with_conflicts: int = Field(..., description="Equipment with at least one conflict")
+    equipment: List[EquipmentConflictFrequency] = Field(..., description="Equipment, most conflicted first")
+
+
+# Operator availability
+class AvailableOperator(BaseModel):
+    """Operator with no booking in the requested window"""
+    operator_id: int = Field(..., description="Operator user ID")
+    name: str = Field(..., description="Operator full name")
+    employee_id: str = Field(..., description="Employee ID")
+    equipment_skills: List[str] = Field(default_factory=list, description="Equipment types the operator can run")
+
+
+class AvailableOperatorsResponse(BaseModel):
+    """Operators free for a time window"""
+    window_start: datetime = Field(..., description="Window start")
+    window_end: datetime = Field(..., description="Window end")
+    total_operators: int = Field(..., description="Active operators on the roster")
+    available_count: int = Field(..., description="Operators free for the whole window")
+    operators: List[AvailableOperator] = Field(..., description="Free operators")
+
+
 # Equipment availability time slot
 class TimeSlot(BaseModel):
     """Available or scheduled time slot"""
@@ -121,6 +241,8 @@ class EquipmentAvailability(BaseModel):
     total_available_hours: float = Field(..., description="Total available hours in range")
     total_scheduled_hours: float = Field(..., description="Total scheduled hours in range")
     utilization_percentage: float = Field(..., description="Equipment utilization percentage")
+    calendar_id: Optional[int] = Field(None, description="Working calendar applied (None = round the clock)")
+    working_hours: Optional[float] = Field(None, description="Working hours in range under the calendar")
 
 
 # Conflict check request
@@ -130,6 +252,7 @@ class ConflictCheckRequest(BaseModel):
     start_datetime: datetime = Field(..., description="Proposed start time")
     end_datetime: datetime = Field(..., description="Proposed end time")
     exclude_schedule_id: Optional[int] = Field(None, description="Schedule ID to exclude from conflict check")
+    operator_id: Optional[int] = Field(None, description="Also check this operator for double-booking")
 
 
 # Conflict check response
@@ -180,6 +303,11 @@ class ScheduleStatistics(BaseModel):
     utilization_rate: float = Field(..., description="Equipment utilization rate (0-100)")
     most_common_project: Optional[str] = Field(None, description="Most frequently scheduled project")
     peak_usage_day: Optional[str] = Field(None, description="Day of week with highest usage")
+    peak_usage_hour: Optional[int] = Field(None, ge=0, le=23, description="Hour of day with highest usage")
+    usage_histogram: List[List[float]] = Field(
+        default_factory=lambda: [[0.0] * 24 for _ in range(7)],
+        description="Scheduled hours by day of week (Monday first) and hour of day, 7x24"
+    )
 
 
 # Smart scheduling suggestions
@@ -202,6 +330,8 @@ class SmartScheduleRequest(BaseModel):
     date_range_end: datetime = Field(..., description="Latest acceptable end time")
     project_id: Optional[int] = Field(None, description="Associated project ID")
     priority: int = Field(1, ge=1, le=5, description="Scheduling priority (1=low, 5=urgent)")
+    slot_granularity_minutes: int = Field(15, ge=5, le=1440, description="Spacing between candidate start times in minutes")
+    max_suggestions: int = Field(5, ge=1, le=50, description="Maximum number of suggestions to return")
 
 
 class SmartScheduleResponse(BaseModel):
@@ -212,3 +342,235 @@ class SmartScheduleResponse(BaseModel):
     suggestions: List[ScheduleSuggestion] = Field(..., description="List of suggested time slots")
     best_suggestion: Optional[ScheduleSuggestion] = Field(None, description="Highest confidence suggestion")
     alternative_equipment: List[int] = Field(default=[], description="Alternative equipment IDs if no good slots found")
+
+
+# Fleet assignment optimization
+class FleetRequestItem(BaseModel):
+    """One booking request to place somewhere in the fleet"""
+    reference: str = Field(..., max_length=100, description="Client reference echoed in the result")
+    equipment_type: str = Field(..., description="Required equipment type")
+    desired_duration_hours: float = Field(..., gt=0, description="Desired duration in hours")
+    date_range_start: datetime = Field(..., description="Earliest acceptable start time")
+    date_range_end: datetime = Field(..., description="Latest acceptable end time")
+    project_id: Optional[int] = Field(None, description="Associated project ID")
+    priority: int = Field(1, ge=1, le=5, description="Scheduling priority (1=low, 5=urgent)")
+
+
+class FleetOptimizationRequest(BaseModel):
+    """Batch of requests to assign across the fleet"""
+    requests: List[FleetRequestItem] = Field(..., min_length=1, max_length=5000, description="Requests to assign")
+    slot_granularity_minutes: int = Field(15, ge=5, le=1440, description="Start time granularity in minutes")
+    time_limit_seconds: float = Field(5.0, gt=0, le=60, description="Optimization time budget")
+    max_iterations: int = Field(20000, ge=0, le=1000000, description="Local search steps per worker")
+    seed: int = Field(0, ge=0, description="Random seed; equal inputs and seed give equal results")
+
+
+class FleetAssignment(BaseModel):
+    """Equipment and start time chosen for one request"""
+    reference: str = Field(..., description="Client reference of the request")
+    equipment_id: int = Field(..., description="Assigned equipment ID")
+    equipment_name: str = Field(..., description="Assigned equipment name")
+    start_datetime: datetime = Field(..., description="Assigned start time")
+    end_datetime: datetime = Field(..., description="Assigned end time")
+    project_id: Optional[int] = Field(None, description="Associated project ID")
+    priority: int = Field(..., description="Request priority")
+
+
+class FleetOptimizationResponse(BaseModel):
+    """Proposed fleet assignment; nothing is booked until schedules are created"""
+    assignments: List[FleetAssignment] = Field(..., description="Assigned requests")
+    unassigned: List[str] = Field(..., description="References of requests that could not be placed")
+    assigned_count: int = Field(..., description="Number of assigned requests")
+    unassigned_count: int = Field(..., description="Number of unassigned requests")
+    objective: float = Field(..., description="Priority-weighted score of the assignment")
+    greedy_objective: float = Field(..., description="Score of the greedy starting assignment")
+    iterations: int = Field(..., description="Local search steps taken by the best worker")
+    timed_out: bool = Field(..., description="Whether the time limit cut the search short")
+
+
+
+# Crew (multi-equipment) booking
+class CrewRequirement(BaseModel):
+    """Number of units of one equipment type a crew needs"""
+    equipment_type: str = Field(..., description="Required equipment type")
+    quantity: int = Field(1, ge=1, le=50, description="Units of this type needed together")
+
+
+class CrewSearchRequest(BaseModel):
+    """Search for windows where a whole crew is free together"""
+    equipment_ids: Optional[List[int]] = Field(None, min_length=1, max_length=50, description="Exact units that must work together")
+    requirements: Optional[List[CrewRequirement]] = Field(None, min_length=1, max_length=20, description="Units needed per equipment type")
+    desired_duration_hours: float = Field(..., gt=0, description="Desired duration in hours")
+    date_range_start: datetime = Field(..., description="Earliest acceptable start time")
+    date_range_end: datetime = Field(..., description="Latest acceptable end time")
+    max_windows: int = Field(5, ge=1, le=50, description="Maximum number of windows to return")
+
+    @validator('date_range_end')
+    def validate_date_range(cls, v, values):
+        """Ensure the search range ends after it starts"""
+        if 'date_range_start' in values and v <= values['date_range_start']:
+            raise ValueError('Date range end must be after date range start')
+        return v
+
+    @validator('requirements', always=True)
+    def validate_crew(cls, v, values):
+        """Ensure the crew is given either as units or as type quantities"""
+        if (v is None) == (values.get('equipment_ids') is None):
+            raise ValueError('Specify either equipment_ids or requirements')
+        if v is not None and len({r.equipment_type for r in v}) != len(v):
+            raise ValueError('Each equipment type may appear only once in requirements')
+        return v
+
+
+class CrewMemberOption(BaseModel):
+    """Unit proposed for a crew window"""
+    equipment_id: int = Field(..., description="Equipment ID")
+    equipment_name: str = Field(..., description="Equipment name")
+    equipment_type: str = Field(..., description="Equipment type")
+
+
+class CrewWindow(BaseModel):
+    """Window in which every member of the crew is free"""
+    start_datetime: datetime = Field(..., description="Window start")
+    end_datetime: datetime = Field(..., description="Window end")
+    members: List[CrewMemberOption] = Field(..., description="Units to book together")
+
+
+class CrewSearchResponse(BaseModel):
+    """Earliest common free windows for a crew"""
+    requested_duration: float = Field(..., description="Requested duration in hours")
+    candidate_count: int = Field(..., description="Units considered")
+    windows: List[CrewWindow] = Field(..., description="Windows, earliest first")
+
+
+class CrewMember(BaseModel):
+    """Unit (and optional operator) to book as part of a crew"""
+    equipment_id: int = Field(..., description="Equipment ID")
+    operator_id: Optional[int] = Field(None, description="Assigned operator ID")
+
+
+class CrewBookingRequest(BaseModel):
+    """Book several units for the same window, all or nothing"""
+    members: List[CrewMember] = Field(..., min_length=1, max_length=50, description="Units to book")
+    start_datetime: datetime = Field(..., description="Schedule start date and time")
+    end_datetime: datetime = Field(..., description="Schedule end date and time")
+    project_id: Optional[int] = Field(None, description="Associated project ID")
+    notes: Optional[str] = Field(None, max_length=1000, description="Additional notes")
+
+    @validator('end_datetime')
+    def validate_date_range(cls, v, values):
+        """Ensure end datetime is after start datetime"""
+        if 'start_datetime' in values and v <= values['start_datetime']:
+            raise ValueError('End datetime must be after start datetime')
+        return v
+
+    @validator('members')
+    def validate_members(cls, v):
+        """Ensure no unit or operator is booked twice within the crew"""
+        if len({m.equipment_id for m in v}) != len(v):
+            raise ValueError('Each equipment may appear only once in a crew')
+        operators = [m.operator_id for m in v if m.operator_id is not None]
+        if len(set(operators)) != len(operators):
+            raise ValueError('An operator cannot run two crew members at once')
+        return v
+
+
+class CrewBookingResponse(BaseModel):
+    """Schedules created for a crew"""
+    schedules: List[ScheduleResponse] = Field(..., description="One schedule per crew member")
+
+# Point-in-time fleet state
+class FleetStateEntry(BaseModel):
+    """What one piece of equipment was doing at a point in time"""
+    equipment_id: int = Field(..., description="Equipment ID")
+    equipment_name: str = Field(..., description="Equipment name")
+    equipment_type: Optional[str] = Field(None, description="Equipment type")
+    schedule_id: Optional[int] = Field(None, description="Schedule running at that time")
+    schedule_start: Optional[datetime] = Field(None, description="Start of the running occurrence")
+    schedule_end: Optional[datetime] = Field(None, description="End of the running occurrence")
+    operator_id: Optional[int] = Field(None, description="Assigned operator ID")
+    operator_name: Optional[str] = Field(None, description="Assigned operator name")
+    project_id: Optional[int] = Field(None, description="Associated project ID")
+    project_name: Optional[str] = Field(None, description="Associated project name")
+    last_hourmeter: Optional[float] = Field(None, description="Latest hourmeter reported up to that time")
+    last_report_date: Optional[datetime] = Field(None, description="Date of the report with that reading")
+
+
+class FleetStateResponse(BaseModel):
+    """Fleet state at a point in time"""
+    at: datetime = Field(..., description="Point in time")
+    total_equipment: int = Field(..., description="Equipment included")
+    scheduled_equipment: int = Field(..., description="Equipment with a schedule running at that time")
+    equipment: List[FleetStateEntry] = Field(..., description="State per equipment")
+
+
+# Compact timeline (Gantt board) payload
+class TimelineEntity(BaseModel):
+    """Lookup table entry referenced by index from timeline columns"""
+    id: int = Field(..., description="Entity ID")
+    name: Optional[str] = Field(None, description="Display name")
+
+
+class TimelineEquipment(TimelineEntity):
+    """Equipment lookup entry for the timeline"""
+    equipment_type: Optional[str] = Field(None, description="Equipment type")
+
+
+class TimelineColumns(BaseModel):
+    """Columnar schedule data; index i of every array describes one schedule"""
+    schedule_id: List[int] = Field(..., description="Schedule IDs")
+    equipment_idx: List[int] = Field(..., description="Index into the equipment lookup")
+    project_idx: List[Optional[int]] = Field(..., description="Index into the projects lookup")
+    operator_idx: List[Optional[int]] = Field(..., description="Index into the operators lookup")
+    start: List[int] = Field(..., description="Schedule start as Unix epoch seconds")
+    end: List[int] = Field(..., description="Schedule end as Unix epoch seconds")
+    status: List[ScheduleStatus] = Field(..., description="Schedule status")
+
+
+class ScheduleTimelineResponse(BaseModel):
+    """Deduplicated lookups plus columnar schedules for a time window"""
+    date_range_start: datetime = Field(..., description="Window start")
+    date_range_end: datetime = Field(..., description="Window end")
+    equipment: List[TimelineEquipment] = Field(..., description="Equipment lookup table")
+    projects: List[TimelineEntity] = Field(..., description="Project lookup table")
+    operators: List[TimelineEntity] = Field(..., description="Operator lookup table")
+    schedules: TimelineColumns = Field(..., description="Columnar schedule data")
+
+
+# Working calendars (shift hours per company or site)
+SHIFT_TIME_PATTERN = r"^(([01][0-9]|2[0-3]):(00|15|30|45)|24:00)$"
+
+
+class WorkingHoursPeriod(BaseModel):
+    """One shift period on a weekday, on 15-minute boundaries"""
+    weekday: int = Field(..., ge=0, le=6, description="Weekday (0 = Monday)")
+    start: str = Field(..., pattern=SHIFT_TIME_PATTERN, description="Shift start (HH:MM)")
+    end: str = Field(..., pattern=SHIFT_TIME_PATTERN, description="Shift end (HH:MM, 24:00 = midnight)")
+
+
+class WorkingCalendarCreate(BaseModel):
+    """Schema for creating a working calendar"""
+    company_id: int = Field(..., description="Owning company ID")
+    name: str = Field(..., max_length=255, description="Calendar name")
+    site_location: Optional[str] = Field(None, max_length=500, description="Site the calendar applies to")
+    timezone: str = Field("UTC", description="IANA timezone of the shift hours")
+    weekly_hours: List[WorkingHoursPeriod] = Field(..., description="Weekly shift periods")
+    holidays: List[date] = Field(default_factory=list, description="Non-working days")
+    is_default: bool = Field(False, description="Company-wide default for equipment without a calendar")
+
+
+class WorkingCalendarUpdate(BaseModel):
+    """Schema for updating a working calendar"""
+    name: Optional[str] = Field(None, max_length=255)
+    site_location: Optional[str] = Field(None, max_length=500)
+    timezone: Optional[str] = None
+    weekly_hours: Optional[List[WorkingHoursPeriod]] = None
+    holidays: Optional[List[date]] = None
+    is_default: Optional[bool] = None
+
+
+class WorkingCalendarResponse(WorkingCalendarCreate):
+    """Schema for working calendar responses"""
+    id: int = Field(..., description="Calendar ID")
+    created_at: Optional[datetime] = Field(None, description="Creation timestamp")
+    updated_at: Optional[datetime] = Field(None, description="Last update timestamp")
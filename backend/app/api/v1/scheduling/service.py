@@ -3,21 +3,77 @@
 
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, text
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Iterator
+from datetime import date, datetime, time, timedelta, timezone
+from collections import Counter
+from itertools import groupby
+import asyncio
+import json
 import logging
 
+import numpy as np
+
+from app.core.config import settings
 from app.models.equipment import Equipment
 from app.models.user import User
+from .cache import availability_cache, statistics_cache, equipment_scope, invalidate_equipment
+from .calendars import (
+    SLOT_MINUTES, SLOT_SECONDS, SlotGrid, bit_runs, compile_calendar, count_bits, free_bits,
+    load_equipment_calendars, occupancy_bits
+)
+from .conflict_log import conflict_log_writer
+from .optimizer import AssignmentProblem, best_solution, get_optimizer_pool, solve_assignment
+from .recurrence import (
+    align_timezone, convert_timezone, expand_occurrences, expand_rows, format_rrule,
+    rule_from_row, series_end
+)
+from .rollups import ScheduleRollupService
 from .schemas import (
     ScheduleCreate, ScheduleUpdate, ScheduleResponse, ScheduleConflict,
     ConflictSeverity, EquipmentAvailability, TimeSlot, SlotType,
     ConflictCheckResponse, ScheduleStatistics, ScheduleSuggestion,
-    SmartScheduleRequest, SmartScheduleResponse
+    SmartScheduleRequest, SmartScheduleResponse,
+    ConflictAnalyticsResponse, EquipmentConflictFrequency,
+    AvailableOperator, AvailableOperatorsResponse,
+    FleetOptimizationRequest, FleetOptimizationResponse, FleetAssignment,
+    FleetStateEntry, FleetStateResponse,
+    CrewSearchRequest, CrewSearchResponse, CrewWindow, CrewMemberOption,
+    CrewBookingRequest, CrewBookingResponse
 )
 
 logger = logging.getLogger(__name__)
 
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# A Monday midnight; histogram hour indices are counted from here
+_USAGE_EPOCH = datetime(2001, 1, 1)
+
+# Schedule rows fetched per round trip while building a timeline
+TIMELINE_FETCH_SIZE = 5000
+
+
+# Matches one-off schedules and recurring series that can overlap [:start_date, :end_date)
+WINDOW_OVERLAP_SQL = """
+    es.start_datetime < :end_date
+    AND (
+        es.end_datetime > :start_date
+        OR (es.recurrence_rule IS NOT NULL
+            AND COALESCE(es.recurrence_until, 'infinity') > :start_date)
+    )
+"""
+
+# Columns needed to expand recurring series
+RECURRENCE_COLUMNS_SQL = "es.recurrence_rule, es.recurrence_until, es.recurrence_exceptions"
+
+
+def _wall_clock_hours(value: datetime) -> float:
+    """Hours since _USAGE_EPOCH using the datetime's own wall-clock time"""
+    return (value.replace(tzinfo=None) - _USAGE_EPOCH).total_seconds() / 3600.0
+
+
+class ScheduleVersionConflict(Exception):
+    """Raised when a schedule changed after the version an update was based on"""
+
 
 class SchedulingService:
     """
@@ -54,24 +110,52 @@ class SchedulingService:
         """
         logger.info(f"Creating schedule for equipment {schedule_data.equipment_id}")
         
-        # Verify equipment exists and is available for scheduling
+        # Verify equipment exists and is available for scheduling; the row lock
+        # serializes bookings of it with update_schedule and book_crew
         equipment = self.db.query(Equipment).filter(
             and_(
                 Equipment.id == schedule_data.equipment_id,
                 Equipment.is_active.is_(True),
                 Equipment.status.in_(['available', 'in_use'])
             )
-        ).first()
+        ).with_for_update().first()
         
         if not equipment:
             raise ValueError(f"Equipment {schedule_data.equipment_id} not found or not available for scheduling")
         
+        recurrence = schedule_data.recurrence
+        recurrence_rule = None
+        recurrence_until = None
+        
         # Check for conflicts
-        conflicts = await self.check_conflicts(
-            schedule_data.equipment_id,
-            schedule_data.start_datetime,
-            schedule_data.end_datetime
-        )
+        if recurrence:
+            recurrence_rule = format_rrule(recurrence, schedule_data.start_datetime)
+            recurrence_until = series_end(recurrence, schedule_data.start_datetime, schedule_data.end_datetime)
+            # Open-ended series are checked up to the recurrence horizon; bookings
+            # made later are checked against the series itself
+            horizon = recurrence_until or (
+                schedule_data.start_datetime + timedelta(days=settings.SCHEDULING_RECURRENCE_HORIZON_DAYS)
+            )
+            occurrences = list(expand_occurrences(
+                recurrence, schedule_data.start_datetime, schedule_data.end_datetime,
+                schedule_data.start_datetime, horizon
+            ))
+            conflicts = await self.check_conflicts_for_occurrences(
+                schedule_data.equipment_id, occurrences
+            )
+        else:
+            occurrences = [(schedule_data.start_datetime, schedule_data.end_datetime)]
+            conflicts = await self.check_conflicts(
+                schedule_data.equipment_id,
+                schedule_data.start_datetime,
+                schedule_data.end_datetime
+            )
+        
+        if schedule_data.operator_id is not None:
+            self._lock_operator(schedule_data.operator_id)
+            conflicts.extend(await self.check_operator_conflicts_for_occurrences(
+                schedule_data.operator_id, occurrences
+            ))
         
         # Block creation if hard conflicts exist
         error_conflicts = [c for c in conflicts if c.severity == ConflictSeverity.ERROR]
@@ -83,11 +167,13 @@ class SchedulingService:
         schedule_query = text("""
             INSERT INTO equipment_schedules (
                 equipment_id, project_id, operator_id, start_datetime, 
-                end_datetime, status, notes, created_by
+                end_datetime, status, notes, created_by,
+                recurrence_rule, recurrence_until, recurrence_exceptions
             ) VALUES (
                 :equipment_id, :project_id, :operator_id, :start_datetime,
-                :end_datetime, 'scheduled', :notes, :created_by
-            ) RETURNING id, created_at, updated_at
+                :end_datetime, 'scheduled', :notes, :created_by,
+                :recurrence_rule, :recurrence_until, CAST(:recurrence_exceptions AS TIMESTAMPTZ[])
+            ) RETURNING id, created_at, updated_at, version
         """)
         
         result = self.db.execute(schedule_query, {
@@ -97,11 +183,16 @@ class SchedulingService:
             'start_datetime': schedule_data.start_datetime,
             'end_datetime': schedule_data.end_datetime,
             'notes': schedule_data.notes,
-            'created_by': created_by
+            'created_by': created_by,
+            'recurrence_rule': recurrence_rule,
+            'recurrence_until': recurrence_until,
+            'recurrence_exceptions': recurrence.exceptions if recurrence else []
         })
         
         schedule_row = result.fetchone()
+        ScheduleRollupService(self.db).refresh_for_intervals(schedule_data.start_datetime)
         self.db.commit()
+        invalidate_equipment(schedule_data.equipment_id)
         
         # Return populated schedule response
         return ScheduleResponse(
@@ -116,7 +207,9 @@ class SchedulingService:
             created_by=created_by,
             created_at=schedule_row.created_at,
             updated_at=schedule_row.updated_at,
-            equipment_name=equipment.name
+            version=schedule_row.version,
+            equipment_name=equipment.name,
+            recurrence=recurrence
         )
     
     async def get_schedule(self, schedule_id: int) -> Optional[ScheduleResponse]:
@@ -160,17 +253,194 @@ class SchedulingService:
             created_by=row.created_by,
             created_at=row.created_at,
             updated_at=row.updated_at,
+            version=row.version,
             equipment_name=row.equipment_name,
             project_name=row.project_name,
-            operator_name=row.operator_name
+            operator_name=row.operator_name,
+            recurrence=rule_from_row(row)
         )
     
+    async def update_schedule(
+        self,
+        schedule_id: int,
+        schedule_data: ScheduleUpdate
+    ) -> Optional[ScheduleResponse]:
+        """
+        Update a schedule using optimistic concurrency.
+        
+        The update is applied with a single UPDATE guarded by the version the
+        client read, so concurrent edits of the schedule fail fast instead of
+        waiting on its row lock. Conflict detection only runs when the
+        equipment, operator or time range changed, only over time the
+        schedule did not already occupy, and under the equipment and operator
+        locks other bookings take.
+        
+        Args:
+            schedule_id: Schedule ID to update
+            schedule_data: Fields to change plus the version they are based on
+            
+        Returns:
+            Updated schedule with full details, or None if not found
+            
+        Raises:
+            ScheduleVersionConflict: If the schedule was modified concurrently
+            ValueError: If equipment not found or conflicts detected
+        """
+        current = self.db.execute(text(f"""
+            SELECT es.id, es.equipment_id, es.operator_id, es.start_datetime,
+                   es.end_datetime, es.status, es.version, {RECURRENCE_COLUMNS_SQL}
+            FROM equipment_schedules es
+            WHERE es.id = :schedule_id
+        """), {'schedule_id': schedule_id}).fetchone()
+        
+        if not current:
+            return None
+        
+        if current.version != schedule_data.version:
+            raise ScheduleVersionConflict(
+                f"Schedule {schedule_id} was modified (version {current.version}, update based on {schedule_data.version})"
+            )
+        
+        changes = schedule_data.model_dump(exclude_unset=True, exclude={'version'})
+        # Explicit nulls only clear optional columns
+        for column in ('equipment_id', 'start_datetime', 'end_datetime', 'status'):
+            if changes.get(column, 0) is None:
+                del changes[column]
+        if not changes:
+            return await self.get_schedule(schedule_id)
+        
+        if 'status' in changes:
+            changes['status'] = changes['status'].value
+        for column in ('start_datetime', 'end_datetime'):
+            if column in changes:
+                changes[column] = align_timezone(changes[column], current.start_datetime)
+        
+        equipment_id = changes.get('equipment_id', current.equipment_id)
+        operator_id = changes.get('operator_id', current.operator_id)
+        start_datetime = changes.get('start_datetime', current.start_datetime)
+        end_datetime = changes.get('end_datetime', current.end_datetime)
+        new_status = changes.get('status', current.status)
+        
+        if end_datetime <= start_datetime:
+            raise ValueError("End datetime must be after start datetime")
+        
+        if equipment_id != current.equipment_id:
+            equipment = self.db.query(Equipment).filter(
+                and_(
+                    Equipment.id == equipment_id,
+                    Equipment.is_active.is_(True),
+                    Equipment.status.in_(['available', 'in_use'])
+                )
+            ).first()
+            if not equipment:
+                raise ValueError(f"Equipment {equipment_id} not found or not available for scheduling")
+        
+        conflicts = await self._recheck_conflicts(
+            current, equipment_id, operator_id, start_datetime, end_datetime, new_status
+        )
+        error_conflicts = [c for c in conflicts if c.severity == ConflictSeverity.ERROR]
+        if error_conflicts:
+            conflict_messages = [c.message for c in error_conflicts]
+            raise ValueError(f"Schedule conflicts detected: {'; '.join(conflict_messages)}")
+        
+        # Keep the series bound in step with a moved first occurrence
+        rule = rule_from_row(current)
+        if rule is not None and ('start_datetime' in changes or 'end_datetime' in changes):
+            changes['recurrence_until'] = series_end(rule, start_datetime, end_datetime)
+        
+        assignments = ", ".join(f"{column} = :{column}" for column in changes)
+        update_query = text(f"""
+            UPDATE equipment_schedules
+            SET {assignments},
+                version = version + 1,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = :schedule_id AND version = :version
+            RETURNING id
+        """)
+        
+        updated = self.db.execute(update_query, {
+            **changes,
+            'schedule_id': schedule_id,
+            'version': schedule_data.version
+        }).fetchone()
+        
+        if not updated:
+            self.db.rollback()
+            raise ScheduleVersionConflict(f"Schedule {schedule_id} was modified concurrently")
+        
+        ScheduleRollupService(self.db).refresh_for_intervals(current.start_datetime, start_datetime)
+        self.db.commit()
+        invalidate_equipment(current.equipment_id, equipment_id)
+        
+        logger.info(f"Updated schedule {schedule_id} to version {schedule_data.version + 1}")
+        return await self.get_schedule(schedule_id)
+    
+    async def _recheck_conflicts(
+        self,
+        current: Any,
+        equipment_id: int,
+        operator_id: Optional[int],
+        start_datetime: datetime,
+        end_datetime: datetime,
+        status: str
+    ) -> List[ScheduleConflict]:
+        """
+        Re-run conflict detection for an edited schedule only where needed.
+        
+        An unchanged booking, or one that no longer blocks the equipment,
+        needs no check. A one-off schedule that keeps its equipment (or
+        operator) is checked only over time its previous interval did not
+        cover, since that interval was already conflict-free.
+        """
+        if status not in ('scheduled', 'active'):
+            return []
+        
+        moved = equipment_id != current.equipment_id
+        reassigned = operator_id != current.operator_id
+        reinstated = current.status not in ('scheduled', 'active')
+        retimed = (start_datetime, end_datetime) != (current.start_datetime, current.end_datetime)
+        rule = rule_from_row(current)
+        
+        def proposed(full: bool) -> List[Tuple[datetime, datetime]]:
+            if rule is not None:
+                horizon = series_end(rule, start_datetime, end_datetime) or (
+                    start_datetime + timedelta(days=settings.SCHEDULING_RECURRENCE_HORIZON_DAYS)
+                )
+                return list(expand_occurrences(
+                    rule, start_datetime, end_datetime, start_datetime, horizon
+                ))
+            if full:
+                return [(start_datetime, end_datetime)]
+            return [
+                (piece_start, piece_end)
+                for piece_start, piece_end in (
+                    (start_datetime, min(end_datetime, current.start_datetime)),
+                    (max(start_datetime, current.end_datetime), end_datetime)
+                )
+                if piece_start < piece_end
+            ]
+        
+        conflicts = []
+        if moved or reinstated or retimed:
+            self._lock_equipment(equipment_id)
+            conflicts.extend(await self.check_conflicts_for_occurrences(
+                equipment_id, proposed(moved or reinstated), exclude_schedule_id=current.id
+            ))
+        if operator_id is not None and (reassigned or reinstated or retimed):
+            self._lock_operator(operator_id)
+            conflicts.extend(await self.check_operator_conflicts_for_occurrences(
+                operator_id, proposed(reassigned or reinstated), exclude_schedule_id=current.id
+            ))
+        return conflicts
+    
     async def check_conflicts(
         self,
         equipment_id: int,
         start_datetime: datetime,
         end_datetime: datetime,
-        exclude_schedule_id: Optional[int] = None
+        exclude_schedule_id: Optional[int] = None,
+        operator_id: Optional[int] = None,
+        record: bool = True
     ) -> List[ScheduleConflict]:
         """
         Advanced conflict detection with severity classification.
@@ -180,49 +450,512 @@ class SchedulingService:
             start_datetime: Proposed start time
             end_datetime: Proposed end time
             exclude_schedule_id: Schedule ID to exclude from conflict check
+            operator_id: Also check this operator for double-booking
+            record: Log detected conflicts; False for probes that book nothing
             
         Returns:
             List of detected conflicts with severity levels
         """
         logger.debug(f"Checking conflicts for equipment {equipment_id} from {start_datetime} to {end_datetime}")
         
-        # Use the database function we created
+        occurrences = [(start_datetime, end_datetime)]
+        conflicts = await self.check_conflicts_for_occurrences(
+            equipment_id, occurrences, exclude_schedule_id, record
+        )
+        if operator_id is not None:
+            conflicts.extend(await self.check_operator_conflicts_for_occurrences(
+                operator_id, occurrences, exclude_schedule_id
+            ))
+            conflicts.sort(key=lambda c: c.conflict_start)
+        return conflicts
+    
+    async def check_conflicts_for_occurrences(
+        self,
+        equipment_id: int,
+        occurrences: List[Tuple[datetime, datetime]],
+        exclude_schedule_id: Optional[int] = None,
+        record: bool = True
+    ) -> List[ScheduleConflict]:
+        """
+        Detect conflicts for several proposed intervals at once.
+        
+        One-off schedules are matched against all proposed intervals in a single
+        set-based query; recurring series are expanded only across the span of
+        the proposal. Severity follows check_schedule_conflicts: overlaps are
+        errors, touching schedules warnings and schedules within an hour info.
+        
+        Args:
+            equipment_id: Equipment to check conflicts for
+            occurrences: Proposed (start, end) intervals
+            exclude_schedule_id: Schedule ID to exclude from conflict check
+            record: Log detected conflicts; False for probes that book nothing
+            
+        Returns:
+            List of detected conflicts with severity levels
+        """
+        if not occurrences:
+            return []
+        
+        starts = [start for start, _ in occurrences]
+        ends = [end for _, end in occurrences]
+        
         conflict_query = text("""
-            SELECT * FROM check_schedule_conflicts(
-                :equipment_id, :start_datetime, :end_datetime, :exclude_schedule_id
-            )
+            SELECT
+                es.id as conflicting_schedule_id,
+                GREATEST(es.start_datetime, p.start_datetime) as conflict_start,
+                LEAST(es.end_datetime, p.end_datetime) as conflict_end,
+                ROUND(
+                    EXTRACT(EPOCH FROM (
+                        LEAST(es.end_datetime, p.end_datetime) -
+                        GREATEST(es.start_datetime, p.start_datetime)
+                    )) / 3600.0, 2
+                ) as overlap_hours,
+                CASE
+                    WHEN (es.start_datetime < p.end_datetime AND es.end_datetime > p.start_datetime) THEN 'error'
+                    WHEN (es.end_datetime = p.start_datetime OR es.start_datetime = p.end_datetime) THEN 'warning'
+                    ELSE 'info'
+                END as severity,
+                p.start_datetime as attempted_start,
+                p.end_datetime as attempted_end
+            FROM UNNEST(
+                CAST(:starts AS TIMESTAMPTZ[]), CAST(:ends AS TIMESTAMPTZ[])
+            ) AS p(start_datetime, end_datetime)
+            JOIN equipment_schedules es
+                ON es.equipment_id = :equipment_id
+                AND es.recurrence_rule IS NULL
+                AND es.status IN ('scheduled', 'active')
+                AND (CAST(:exclude_schedule_id AS INTEGER) IS NULL OR es.id != :exclude_schedule_id)
+                AND es.start_datetime <= p.end_datetime + INTERVAL '1 hour'
+                AND es.end_datetime >= p.start_datetime - INTERVAL '1 hour'
         """)
         
         result = self.db.execute(conflict_query, {
             'equipment_id': equipment_id,
-            'start_datetime': start_datetime,
-            'end_datetime': end_datetime,
+            'starts': starts,
+            'ends': ends,
             'exclude_schedule_id': exclude_schedule_id
         })
         
+        detected = [
+            (
+                self._build_conflict(
+                    equipment_id, row.conflicting_schedule_id, row.conflict_start,
+                    row.conflict_end, float(row.overlap_hours), row.severity
+                ),
+                row.attempted_start,
+                row.attempted_end
+            )
+            for row in result
+        ]
+        detected.extend(self._series_conflicts(
+            equipment_id, starts, ends, exclude_schedule_id
+        ))
+        
+        # Logged write-behind so the audit trail adds no latency here
+        if record:
+            for conflict, attempted_start, attempted_end in detected:
+                conflict_log_writer.record(
+                    equipment_id, conflict.conflicting_schedule_id,
+                    attempted_start, attempted_end, conflict.severity.value
+                )
+        
+        conflicts = [conflict for conflict, _, _ in detected]
+        conflicts.sort(key=lambda c: c.conflict_start)
+        
+        logger.info(f"Found {len(conflicts)} conflicts for equipment {equipment_id}")
+        return conflicts
+    
+    def _series_conflicts(
+        self,
+        equipment_id: int,
+        starts: List[datetime],
+        ends: List[datetime],
+        exclude_schedule_id: Optional[int]
+    ) -> List[Tuple[ScheduleConflict, datetime, datetime]]:
+        """
+        Conflicts between proposed intervals and occurrences of recurring series.
+        
+        Returns (conflict, proposed start, proposed end) for each conflict.
+        """
+        buffer = timedelta(hours=1)
+        span_start = min(starts) - buffer
+        span_end = max(ends) + buffer
+        
+        series_query = text(f"""
+            SELECT es.id, es.start_datetime, es.end_datetime, {RECURRENCE_COLUMNS_SQL}
+            FROM equipment_schedules es
+            WHERE es.equipment_id = :equipment_id
+                AND es.recurrence_rule IS NOT NULL
+                AND es.status IN ('scheduled', 'active')
+                AND (CAST(:exclude_schedule_id AS INTEGER) IS NULL OR es.id != :exclude_schedule_id)
+                AND es.start_datetime <= :span_end
+                AND COALESCE(es.recurrence_until, 'infinity') >= :span_start
+        """)
+        
+        series = self.db.execute(series_query, {
+            'equipment_id': equipment_id,
+            'exclude_schedule_id': exclude_schedule_id,
+            'span_start': span_start,
+            'span_end': span_end
+        }).fetchall()
+        if not series:
+            return []
+        
+        proposed_starts = np.array([s.timestamp() for s in starts])[:, None]
+        proposed_ends = np.array([e.timestamp() for e in ends])[:, None]
+        
         conflicts = []
-        for row in result:
-            # Create human-readable conflict message
-            if row.severity == 'error':
-                message = f"Direct overlap ({row.overlap_hours:.1f} hours) with schedule #{row.conflicting_schedule_id}"
-            elif row.severity == 'warning':
-                message = f"Adjacent to schedule #{row.conflicting_schedule_id} (potential timing conflict)"
-            else:
-                message = f"Near schedule #{row.conflicting_schedule_id} (consider buffer time)"
+        # Widen by a second so occurrences exactly one hour away are still found
+        for row, occ_start, occ_end in expand_rows(
+            series, span_start - timedelta(seconds=1), span_end + timedelta(seconds=1)
+        ):
+            s, e = occ_start.timestamp(), occ_end.timestamp()
+            overlap = (s < proposed_ends) & (e > proposed_starts)
+            touching = (e == proposed_starts) | (s == proposed_ends)
+            near = (np.abs(e - proposed_starts) <= 3600) | (np.abs(s - proposed_ends) <= 3600)
             
+            for i in np.nonzero((overlap | near)[:, 0])[0]:
+                conflict_start = max(occ_start, align_timezone(starts[i], occ_start))
+                conflict_end = min(occ_end, align_timezone(ends[i], occ_start))
+                severity = 'error' if overlap[i, 0] else 'warning' if touching[i, 0] else 'info'
+                conflicts.append((
+                    self._build_conflict(
+                        equipment_id, row.id, conflict_start, conflict_end,
+                        round((conflict_end - conflict_start).total_seconds() / 3600.0, 2), severity
+                    ),
+                    starts[i],
+                    ends[i]
+                ))
+        return conflicts
+    
+    def _lock_equipment(self, equipment_id: int) -> None:
+        """
+        Serialize bookings of one piece of equipment until the transaction ends.
+        
+        Takes the same equipment row lock as create_schedule and book_crew,
+        so two requests cannot both pass the conflict check for it. Lock it
+        before any operator.
+        """
+        self.db.execute(
+            text("SELECT id FROM equipment WHERE id = :equipment_id FOR UPDATE"),
+            {'equipment_id': equipment_id}
+        )
+    
+    def _lock_operator(self, operator_id: int) -> None:
+        """
+        Serialize bookings of one operator until the transaction ends.
+        
+        Operators are booked across many equipment rows, so two requests for
+        different equipment could otherwise both pass the operator check.
+        """
+        self.db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext('equipment_schedules:operator'), :operator_id)"),
+            {'operator_id': operator_id}
+        )
+    
+    async def check_operator_conflicts_for_occurrences(
+        self,
+        operator_id: int,
+        occurrences: List[Tuple[datetime, datetime]],
+        exclude_schedule_id: Optional[int] = None
+    ) -> List[ScheduleConflict]:
+        """
+        Detect an operator being booked on overlapping schedules.
+        
+        An operator can only run one machine at a time, so every overlap on
+        any equipment is an error; touching schedules are fine. One-off
+        schedules are matched in a single query on the operator window index.
+        
+        Args:
+            operator_id: Operator (user ID) to check
+            occurrences: Proposed (start, end) intervals
+            exclude_schedule_id: Schedule ID to exclude from conflict check
+            
+        Returns:
+            List of operator conflicts
+        """
+        if not occurrences:
+            return []
+        
+        starts = [start for start, _ in occurrences]
+        ends = [end for _, end in occurrences]
+        
+        operator_query = text("""
+            SELECT
+                es.id as conflicting_schedule_id,
+                es.equipment_id,
+                GREATEST(es.start_datetime, p.start_datetime) as conflict_start,
+                LEAST(es.end_datetime, p.end_datetime) as conflict_end
+            FROM UNNEST(
+                CAST(:starts AS TIMESTAMPTZ[]), CAST(:ends AS TIMESTAMPTZ[])
+            ) AS p(start_datetime, end_datetime)
+            JOIN equipment_schedules es
+                ON es.operator_id = :operator_id
+                AND es.recurrence_rule IS NULL
+                AND es.status IN ('scheduled', 'active')
+                AND (CAST(:exclude_schedule_id AS INTEGER) IS NULL OR es.id != :exclude_schedule_id)
+                AND es.start_datetime < p.end_datetime
+                AND es.end_datetime > p.start_datetime
+        """)
+        
+        found = [
+            (row.conflicting_schedule_id, row.equipment_id, row.conflict_start, row.conflict_end)
+            for row in self.db.execute(operator_query, {
+                'operator_id': operator_id,
+                'starts': starts,
+                'ends': ends,
+                'exclude_schedule_id': exclude_schedule_id
+            })
+        ]
+        
+        series_query = text(f"""
+            SELECT es.id, es.equipment_id, es.start_datetime, es.end_datetime, {RECURRENCE_COLUMNS_SQL}
+            FROM equipment_schedules es
+            WHERE es.operator_id = :operator_id
+                AND es.recurrence_rule IS NOT NULL
+                AND es.status IN ('scheduled', 'active')
+                AND (CAST(:exclude_schedule_id AS INTEGER) IS NULL OR es.id != :exclude_schedule_id)
+                AND {WINDOW_OVERLAP_SQL}
+        """)
+        series = self.db.execute(series_query, {
+            'operator_id': operator_id,
+            'exclude_schedule_id': exclude_schedule_id,
+            'start_date': min(starts),
+            'end_date': max(ends)
+        }).fetchall()
+        
+        if series:
+            proposed_starts = np.array([s.timestamp() for s in starts])
+            proposed_ends = np.array([e.timestamp() for e in ends])
+            for row, occ_start, occ_end in expand_rows(series, min(starts), max(ends)):
+                overlap = (occ_start.timestamp() < proposed_ends) & (occ_end.timestamp() > proposed_starts)
+                for i in np.nonzero(overlap)[0]:
+                    found.append((
+                        row.id, row.equipment_id,
+                        max(occ_start, align_timezone(starts[i], occ_start)),
+                        min(occ_end, align_timezone(ends[i], occ_start))
+                    ))
+        
+        conflicts = []
+        for schedule_id, conflict_equipment_id, conflict_start, conflict_end in found:
+            overlap_hours = round((conflict_end - conflict_start).total_seconds() / 3600.0, 2)
             conflicts.append(ScheduleConflict(
-                conflicting_schedule_id=row.conflicting_schedule_id,
-                equipment_id=equipment_id,
-                conflict_start=row.conflict_start,
-                conflict_end=row.conflict_end,
-                overlap_hours=row.overlap_hours,
-                severity=ConflictSeverity(row.severity),
-                message=message
+                conflicting_schedule_id=schedule_id,
+                equipment_id=conflict_equipment_id,
+                operator_id=operator_id,
+                conflict_start=conflict_start,
+                conflict_end=conflict_end,
+                overlap_hours=overlap_hours,
+                severity=ConflictSeverity.ERROR,
+                message=(
+                    f"Operator already assigned to schedule #{schedule_id} on equipment "
+                    f"#{conflict_equipment_id} ({overlap_hours:.1f} hours overlap)"
+                )
             ))
+        conflicts.sort(key=lambda c: c.conflict_start)
         
-        logger.info(f"Found {len(conflicts)} conflicts for equipment {equipment_id}")
+        if conflicts:
+            logger.info(f"Found {len(conflicts)} conflicts for operator {operator_id}")
         return conflicts
     
+    async def get_available_operators(
+        self,
+        start_datetime: datetime,
+        end_datetime: datetime
+    ) -> AvailableOperatorsResponse:
+        """
+        List active operators with no booking overlapping a window.
+        
+        Answered with one query over the whole roster: one-off bookings are
+        excluded in SQL through the operator window index, and the few
+        recurring series that could touch the window come back joined to
+        their operator for expansion.
+        
+        Args:
+            start_datetime: Window start
+            end_datetime: Window end
+            
+        Returns:
+            Free operators and roster counts
+        """
+        roster_query = text(f"""
+            SELECT
+                u.id AS operator_id,
+                u.first_name,
+                u.last_name,
+                op.employee_id,
+                op.equipment_skills,
+                es.start_datetime,
+                es.end_datetime,
+                {RECURRENCE_COLUMNS_SQL},
+                NOT EXISTS (
+                    SELECT 1
+                    FROM equipment_schedules b
+                    WHERE b.operator_id = u.id
+                        AND b.recurrence_rule IS NULL
+                        AND b.status IN ('scheduled', 'active')
+                        AND b.start_datetime < :end_date
+                        AND b.end_datetime > :start_date
+                ) AS free_of_one_off
+            FROM operator_profiles op
+            JOIN users u ON op.user_id = u.id
+            LEFT JOIN equipment_schedules es
+                ON es.operator_id = u.id
+                AND es.recurrence_rule IS NOT NULL
+                AND es.status IN ('scheduled', 'active')
+                AND {WINDOW_OVERLAP_SQL}
+            WHERE op.employment_status = 'active'
+                AND u.is_active = TRUE
+            ORDER BY u.last_name, u.first_name, u.id
+        """)
+        
+        rows = self.db.execute(roster_query, {
+            'start_date': start_datetime,
+            'end_date': end_datetime
+        }).fetchall()
+        
+        available = []
+        total = 0
+        for operator_id, operator_rows in groupby(rows, key=lambda row: row.operator_id):
+            operator_rows = list(operator_rows)
+            total += 1
+            first = operator_rows[0]
+            if not first.free_of_one_off:
+                continue
+            series = [row for row in operator_rows if row.recurrence_rule is not None]
+            if any(True for _ in expand_rows(series, start_datetime, end_datetime)):
+                continue
+            available.append(AvailableOperator(
+                operator_id=operator_id,
+                name=f"{first.first_name} {first.last_name}",
+                employee_id=first.employee_id,
+                equipment_skills=self._parse_skills(first.equipment_skills)
+            ))
+        
+        return AvailableOperatorsResponse(
+            window_start=start_datetime,
+            window_end=end_datetime,
+            total_operators=total,
+            available_count=len(available),
+            operators=available
+        )
+    
+    @staticmethod
+    def _parse_skills(value: Optional[str]) -> List[str]:
+        """Equipment skills stored as a JSON array in operator_profiles"""
+        if not value:
+            return []
+        try:
+            skills = json.loads(value)
+        except ValueError:
+            return []
+        return [str(skill) for skill in skills] if isinstance(skills, list) else []
+    
+    @staticmethod
+    def _build_conflict(
+        equipment_id: int,
+        conflicting_schedule_id: int,
+        conflict_start: datetime,
+        conflict_end: datetime,
+        overlap_hours: float,
+        severity: str
+    ) -> ScheduleConflict:
+        """Create a conflict with a human-readable message"""
+        if severity == 'error':
+            message = f"Direct overlap ({overlap_hours:.1f} hours) with schedule #{conflicting_schedule_id}"
+        elif severity == 'warning':
+            message = f"Adjacent to schedule #{conflicting_schedule_id} (potential timing conflict)"
+        else:
+            message = f"Near schedule #{conflicting_schedule_id} (consider buffer time)"
+        
+        return ScheduleConflict(
+            conflicting_schedule_id=conflicting_schedule_id,
+            equipment_id=equipment_id,
+            conflict_start=conflict_start,
+            conflict_end=conflict_end,
+            overlap_hours=overlap_hours,
+            severity=ConflictSeverity(severity),
+            message=message
+        )
+    
+    async def get_conflict_analytics(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        equipment_type: Optional[str] = None,
+        limit: int = 50
+    ) -> ConflictAnalyticsResponse:
+        """
+        Conflict frequency per equipment from schedule_conflicts_log.
+        
+        The log is written behind, so conflicts detected in the last few
+        seconds may not be counted yet.
+        
+        Args:
+            start_date: Analysis start date
+            end_date: Analysis end date
+            equipment_type: Only include equipment of this type
+            limit: Maximum number of equipment returned, most conflicted first
+            
+        Returns:
+            Totals for the period and per-equipment conflict counts
+        """
+        analytics_query = text("""
+            SELECT
+                l.equipment_id,
+                e.name AS equipment_name,
+                e.equipment_type,
+                COUNT(*) AS total_conflicts,
+                COUNT(*) FILTER (WHERE l.severity = 'error') AS error_count,
+                COUNT(*) FILTER (WHERE l.severity = 'warning') AS warning_count,
+                COUNT(*) FILTER (WHERE l.severity = 'info') AS info_count,
+                COUNT(DISTINCT l.conflicting_schedule_id) AS conflicting_schedules,
+                COUNT(DISTINCT l.created_at::date) AS days_with_conflicts,
+                MAX(l.created_at) AS last_conflict_at,
+                SUM(COUNT(*)) OVER () AS period_total,
+                COUNT(*) OVER () AS equipment_with_conflicts
+            FROM schedule_conflicts_log l
+            JOIN equipment e ON l.equipment_id = e.id
+            WHERE l.created_at >= :start_date
+                AND l.created_at < :end_date
+                AND (CAST(:equipment_type AS VARCHAR) IS NULL OR e.equipment_type = :equipment_type)
+            GROUP BY l.equipment_id, e.name, e.equipment_type
+            ORDER BY total_conflicts DESC, l.equipment_id
+            LIMIT :limit
+        """)
+        
+        rows = self.db.execute(analytics_query, {
+            'start_date': start_date,
+            'end_date': end_date,
+            'equipment_type': equipment_type,
+            'limit': limit
+        }).fetchall()
+        
+        period_days = max((end_date - start_date).total_seconds() / 86400.0, 1 / 24)
+        
+        return ConflictAnalyticsResponse(
+            date_range_start=start_date,
+            date_range_end=end_date,
+            total_conflicts=int(rows[0].period_total) if rows else 0,
+            equipment_with_conflicts=int(rows[0].equipment_with_conflicts) if rows else 0,
+            equipment=[
+                EquipmentConflictFrequency(
+                    equipment_id=row.equipment_id,
+                    equipment_name=row.equipment_name,
+                    equipment_type=row.equipment_type,
+                    total_conflicts=row.total_conflicts,
+                    error_count=row.error_count,
+                    warning_count=row.warning_count,
+                    info_count=row.info_count,
+                    conflicting_schedules=row.conflicting_schedules,
+                    days_with_conflicts=row.days_with_conflicts,
+                    conflicts_per_day=round(row.total_conflicts / period_days, 2),
+                    last_conflict_at=row.last_conflict_at
+                )
+                for row in rows
+            ]
+        )
+    
     async def get_equipment_availability(
         self,
         equipment_id: int,
@@ -232,6 +965,12 @@ class SchedulingService:
         """
         Calculate equipment availability and utilization for a date range.
         
+        Occupied intervals come from the per-day availability cache, so
+        repeated queries over the same equipment and days skip the database.
+        When the equipment follows a working calendar, available slots are
+        the calendar's working time minus bookings, computed on 15-minute
+        bitsets, and utilization is measured against working hours.
+        
         Args:
             equipment_id: Equipment ID to analyze
             start_date: Analysis period start
@@ -242,60 +981,202 @@ class SchedulingService:
         """
         logger.debug(f"Calculating availability for equipment {equipment_id} from {start_date} to {end_date}")
         
-        # Get equipment name
-        equipment = self.db.query(Equipment).filter(Equipment.id == equipment_id).first()
-        if not equipment:
-            raise ValueError(f"Equipment {equipment_id} not found")
-        
-        # Use the database function to get availability slots
-        availability_query = text("""
-            SELECT * FROM get_equipment_availability(
-                :equipment_id, :start_date, :end_date
-            ) ORDER BY time_slot_start
-        """)
-        
-        result = self.db.execute(availability_query, {
-            'equipment_id': equipment_id,
-            'start_date': start_date,
-            'end_date': end_date
-        })
+        profile, intervals = self._occupied_intervals(equipment_id, start_date, end_date)
+        calendar = compile_calendar(profile.get('calendar'))
         
         available_slots = []
         scheduled_slots = []
-        total_available_hours = 0.0
-        total_scheduled_hours = 0.0
-        
-        for row in result:
-            slot = TimeSlot(
-                time_slot_start=row.time_slot_start,
-                time_slot_end=row.time_slot_end,
-                duration_hours=row.duration_hours,
-                slot_type=SlotType(row.slot_type)
-            )
-            
-            if row.slot_type == 'available':
+        
+        for slot in self._build_time_slots(intervals, start_date, end_date):
+            if slot.slot_type == SlotType.AVAILABLE:
                 available_slots.append(slot)
-                total_available_hours += row.duration_hours
             else:
                 scheduled_slots.append(slot)
-                total_scheduled_hours += row.duration_hours
         
-        # Calculate utilization percentage
-        total_period_hours = (end_date - start_date).total_seconds() / 3600.0
-        utilization_percentage = (total_scheduled_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
+        total_scheduled_hours = sum(slot.duration_hours for slot in scheduled_slots)
+        working_hours = None
+        
+        if calendar is None:
+            total_available_hours = sum(slot.duration_hours for slot in available_slots)
+            total_period_hours = (end_date - start_date).total_seconds() / 3600.0
+            utilization_percentage = (total_scheduled_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
+        else:
+            # Free time is working time not covered by bookings, on the slot grid
+            grid = SlotGrid(start_date, end_date)
+            working = calendar.working_bits(grid)
+            busy = occupancy_bits(
+                grid,
+                np.zeros(len(intervals), dtype=np.int64),
+                np.array([start.timestamp() for start, _ in intervals], dtype=float),
+                np.array([end.timestamp() for _, end in intervals], dtype=float),
+                1
+            )[0]
+            first, last = bit_runs(free_bits(working, busy), grid.n_slots)
+            available_slots = [
+                TimeSlot(
+                    time_slot_start=slot_start,
+                    time_slot_end=slot_end,
+                    duration_hours=round((slot_end - slot_start).total_seconds() / 3600.0, 2),
+                    slot_type=SlotType.AVAILABLE
+                )
+                for slot_start, slot_end in grid.to_datetimes(first, last)
+            ]
+            total_available_hours = sum(slot.duration_hours for slot in available_slots)
+            working_slots = count_bits(working, grid.n_slots)
+            booked_slots = count_bits(np.bitwise_and(working, busy), grid.n_slots)
+            working_hours = working_slots * SLOT_MINUTES / 60.0
+            # Utilization of working time only; bookings outside shifts don't count
+            utilization_percentage = (booked_slots / working_slots * 100) if working_slots else 0.0
         
         return EquipmentAvailability(
             equipment_id=equipment_id,
-            equipment_name=equipment.name,
+            equipment_name=profile['name'],
             date_range_start=start_date,
             date_range_end=end_date,
             available_slots=available_slots,
             scheduled_slots=scheduled_slots,
             total_available_hours=total_available_hours,
             total_scheduled_hours=total_scheduled_hours,
-            utilization_percentage=round(utilization_percentage, 2)
+            utilization_percentage=round(utilization_percentage, 2),
+            calendar_id=calendar.id if calendar else None,
+            working_hours=working_hours
         )
     
+    def _occupied_intervals(
+        self,
+        equipment_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Tuple[Dict[str, Any], List[Tuple[datetime, datetime]]]:
+        """
+        Equipment profile (name and working calendar) and sorted occupied
+        intervals overlapping a window.
+        
+        Intervals are cached per calendar day of the window's timezone and
+        arbitrary windows are stitched from those day buckets; only missing
+        days are loaded, in one query. Entries live in the equipment's
+        invalidation scope, so any schedule write for it drops them.
+        """
+        end_date = convert_timezone(end_date, start_date)
+        first_day = start_date.date()
+        last_day = max((end_date - timedelta(microseconds=1)).date(), first_day)
+        days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+        
+        # Buckets of different timezones cover different hours, so keep them apart
+        tz_tag = start_date.strftime('%z') or 'local'
+        keys = ['profile'] + [f"day:{day.isoformat()}{tz_tag}" for day in days]
+        cached, versioned_keys = availability_cache.lookup_many(equipment_scope(equipment_id), keys)
+        fresh: List[Tuple[int, Any]] = []
+        
+        profile = cached[0]
+        if profile is None:
+            profile = load_equipment_calendars(self.db, [equipment_id]).get(equipment_id)
+            if profile is None:
+                raise ValueError(f"Equipment {equipment_id} not found")
+            fresh.append((0, profile))
+        
+        buckets = dict(zip(days, cached[1:]))
+        missing = [day for day in days if buckets[day] is None]
+        if missing:
+            loaded = self._load_day_buckets(equipment_id, missing, start_date)
+            for day in missing:
+                buckets[day] = loaded[day]
+                fresh.append((days.index(day) + 1, loaded[day]))
+        
+        if versioned_keys is not None:
+            availability_cache.store_many((versioned_keys[i], value) for i, value in fresh)
+        
+        # Intervals spanning several days sit in each of their buckets
+        stitched = {tuple(interval) for day in days for interval in buckets[day]}
+        intervals = []
+        for start_iso, end_iso in stitched:
+            start, end = datetime.fromisoformat(start_iso), datetime.fromisoformat(end_iso)
+            if end > align_timezone(start_date, end) and start < align_timezone(end_date, start):
+                intervals.append((start, end))
+        intervals.sort()
+        return profile, intervals
+    
+    def _load_day_buckets(
+        self,
+        equipment_id: int,
+        days: List[date],
+        reference: datetime
+    ) -> Dict[date, List[List[str]]]:
+        """
+        Occupied intervals for each of the given days.
+        
+        Days are calendar days in the reference's timezone. Intervals are
+        kept as ISO strings so they round-trip through the cache unchanged.
+        """
+        span_start = datetime.combine(days[0], time.min, tzinfo=reference.tzinfo)
+        span_end = datetime.combine(days[-1] + timedelta(days=1), time.min, tzinfo=reference.tzinfo)
+        
+        # Expand one-off schedules and recurring series inside the span
+        availability_query = text(f"""
+            SELECT es.start_datetime, es.end_datetime, {RECURRENCE_COLUMNS_SQL}
+            FROM equipment_schedules es
+            WHERE es.equipment_id = :equipment_id
+                AND es.status IN ('scheduled', 'active')
+                AND {WINDOW_OVERLAP_SQL}
+        """)
+        
+        rows = self.db.execute(availability_query, {
+            'equipment_id': equipment_id,
+            'start_date': span_start,
+            'end_date': span_end
+        }).fetchall()
+        
+        buckets: Dict[date, List[List[str]]] = {day: [] for day in days}
+        for _, start, end in expand_rows(rows, span_start, span_end):
+            interval = [start.isoformat(), end.isoformat()]
+            day = max(convert_timezone(start, reference).date(), days[0])
+            last = min((convert_timezone(end, reference) - timedelta(microseconds=1)).date(), days[-1])
+            while day <= last:
+                if day in buckets:
+                    buckets[day].append(interval)
+                day += timedelta(days=1)
+        return buckets
+    
+    @staticmethod
+    def _build_time_slots(
+        intervals: List[Tuple[datetime, datetime]],
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[TimeSlot]:
+        """
+        Split a window into available gaps and scheduled slots.
+        
+        Mirrors the get_equipment_availability database function: intervals
+        must be sorted by start, and overlapping schedules only extend the
+        occupied period.
+        """
+        if intervals:
+            start_date = align_timezone(start_date, intervals[0][0])
+            end_date = align_timezone(end_date, intervals[0][0])
+        
+        def make_slot(slot_start: datetime, slot_end: datetime, slot_type: SlotType) -> TimeSlot:
+            return TimeSlot(
+                time_slot_start=slot_start,
+                time_slot_end=slot_end,
+                duration_hours=round((slot_end - slot_start).total_seconds() / 3600.0, 2),
+                slot_type=slot_type
+            )
+        
+        slots = []
+        current = start_date
+        for start, end in intervals:
+            end = min(end, end_date)
+            if current < start:
+                slots.append(make_slot(current, start, SlotType.AVAILABLE))
+            if end > current:
+                slots.append(make_slot(max(current, start), end, SlotType.SCHEDULED))
+                current = end
+        
+        if current < end_date:
+            slots.append(make_slot(current, end_date, SlotType.AVAILABLE))
+        
+        return slots
+    
     async def get_schedule_statistics(
         self,
         equipment_id: int,
@@ -305,6 +1186,11 @@ class SchedulingService:
         """
         Generate comprehensive scheduling statistics for equipment.
         
+        Schedules overlapping the period are clipped to it, and their hours are
+        split across hour and day boundaries into a day-of-week by hour-of-day
+        histogram. Results are cached per equipment and window until a schedule
+        for the equipment changes.
+        
         Args:
             equipment_id: Equipment ID to analyze
             start_date: Analysis period start
@@ -313,40 +1199,42 @@ class SchedulingService:
         Returns:
             Detailed scheduling statistics
         """
+        cached, cache_key = statistics_cache.lookup(
+            equipment_scope(equipment_id),
+            f"{start_date.isoformat()}|{end_date.isoformat()}"
+        )
+        if cached is not None:
+            return ScheduleStatistics(**cached)
+        
         # Get equipment name
         equipment = self.db.query(Equipment).filter(Equipment.id == equipment_id).first()
         if not equipment:
             raise ValueError(f"Equipment {equipment_id} not found")
         
-        # Get schedule statistics
-        stats_query = text("""
-            SELECT 
-                COUNT(*) as total_schedules,
-                COALESCE(SUM(EXTRACT(EPOCH FROM (end_datetime - start_datetime)) / 3600.0), 0) as total_hours,
-                COALESCE(AVG(EXTRACT(EPOCH FROM (end_datetime - start_datetime)) / 3600.0), 0) as avg_duration,
-                p.name as most_common_project
+        # Fetch every schedule overlapping the period in a single query
+        stats_query = text(f"""
+            SELECT es.start_datetime, es.end_datetime, {RECURRENCE_COLUMNS_SQL},
+                   p.name as project_name
             FROM equipment_schedules es
             LEFT JOIN projects p ON es.project_id = p.id
             WHERE es.equipment_id = :equipment_id
-                AND es.start_datetime >= :start_date
-                AND es.end_datetime <= :end_date
                 AND es.status IN ('scheduled', 'active', 'completed')
-            GROUP BY p.name
-            ORDER BY COUNT(*) DESC
-            LIMIT 1
+                AND {WINDOW_OVERLAP_SQL}
         """)
         
-        result = self.db.execute(stats_query, {
-            'equipment_id': equipment_id,
-            'start_date': start_date,
-            'end_date': end_date
-        })
-        
-        row = result.fetchone()
+        rows = list(expand_rows(
+            self.db.execute(stats_query, {
+                'equipment_id': equipment_id,
+                'start_date': start_date,
+                'end_date': end_date
+            }),
+            start_date,
+            end_date
+        ))
         
-        if not row or row.total_schedules == 0:
+        if not rows:
             # No schedules found
-            return ScheduleStatistics(
+            statistics = ScheduleStatistics(
                 equipment_id=equipment_id,
                 equipment_name=equipment.name,
                 date_range_start=start_date,
@@ -358,23 +1246,350 @@ class SchedulingService:
                 most_common_project=None,
                 peak_usage_day=None
             )
+            statistics_cache.store(cache_key, statistics.model_dump(mode='json'))
+            return statistics
+        
+        starts = np.array([_wall_clock_hours(start) for _, start, _ in rows])
+        ends = np.array([_wall_clock_hours(end) for _, _, end in rows])
+        clipped_starts = np.maximum(starts, _wall_clock_hours(start_date))
+        clipped_ends = np.minimum(ends, _wall_clock_hours(end_date))
+        
+        histogram = self._usage_histogram(clipped_starts, clipped_ends)
+        total_hours = float(np.clip(clipped_ends - clipped_starts, 0, None).sum())
+        hours_by_day = histogram.sum(axis=1)
+        hours_by_hour = histogram.sum(axis=0)
+        
+        project_counts = Counter(row.project_name for row, _, _ in rows if row.project_name)
+        most_common_project = project_counts.most_common(1)[0][0] if project_counts else None
         
         # Calculate utilization rate
         total_period_hours = (end_date - start_date).total_seconds() / 3600.0
-        utilization_rate = (row.total_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
+        utilization_rate = (total_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
         
-        return ScheduleStatistics(
+        statistics = ScheduleStatistics(
             equipment_id=equipment_id,
             equipment_name=equipment.name,
             date_range_start=start_date,
             date_range_end=end_date,
-            total_schedules=row.total_schedules,
-            total_scheduled_hours=round(row.total_hours, 2),
-            average_schedule_duration=round(row.avg_duration, 2),
+            total_schedules=len(rows),
+            total_scheduled_hours=round(total_hours, 2),
+            average_schedule_duration=round(float((ends - starts).mean()), 2),
             utilization_rate=round(utilization_rate, 2),
-            most_common_project=row.most_common_project,
-            peak_usage_day=None  # TODO: Implement day-of-week analysis
+            most_common_project=most_common_project,
+            peak_usage_day=DAY_NAMES[int(hours_by_day.argmax())] if total_hours > 0 else None,
+            peak_usage_hour=int(hours_by_hour.argmax()) if total_hours > 0 else None,
+            usage_histogram=np.round(histogram, 2).tolist()
         )
+        statistics_cache.store(cache_key, statistics.model_dump(mode='json'))
+        return statistics
+    
+    @staticmethod
+    def _usage_histogram(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Spread intervals over a 7x24 (day of week, hour of day) histogram of hours.
+        
+        Intervals are given as wall-clock hours since a Monday midnight and are
+        split at every hour boundary they cross, so a schedule running from
+        Friday 22:00 to Saturday 02:00 contributes to both days.
+        """
+        keep = ends > starts
+        starts, ends = starts[keep], ends[keep]
+        if len(starts) == 0:
+            return np.zeros((7, 24))
+        
+        first_bin = np.floor(starts).astype(np.int64)
+        last_bin = np.ceil(ends).astype(np.int64)  # exclusive
+        base = int(first_bin.min())
+        n_bins = int(last_bin.max()) - base
+        
+        # Count intervals touching each hour bin, then remove the uncovered
+        # fractions of their first and last bins
+        touches = np.zeros(n_bins + 1)
+        np.add.at(touches, first_bin - base, 1.0)
+        np.add.at(touches, last_bin - base, -1.0)
+        coverage = np.cumsum(touches)[:n_bins]
+        np.add.at(coverage, first_bin - base, -(starts - first_bin))
+        np.add.at(coverage, last_bin - 1 - base, -(last_bin - ends))
+        
+        hour_of_week = (base + np.arange(n_bins)) % (7 * 24)
+        return np.bincount(hour_of_week, weights=coverage, minlength=7 * 24).reshape(7, 24)
+    
+    async def get_fleet_state(
+        self,
+        at: datetime,
+        equipment_type: Optional[str] = None
+    ) -> FleetStateResponse:
+        """
+        What every piece of equipment was doing at a point in time.
+        
+        One query for the whole fleet: per equipment, a lateral range
+        containment lookup on the GiST (equipment_id, tstzrange) indexes finds
+        the one-off schedule covering the instant plus any recurring series
+        that could, and another on the (equipment_id, report_date) index finds
+        the latest daily report, whose final hourmeter only counts once its
+        shift ended by the instant. Series candidates are expanded here to see
+        whether an occurrence covers the instant.
+        
+        Args:
+            at: Point in time
+            equipment_type: Only include equipment of this type
+            
+        Returns:
+            Running schedule, operator, project and last hourmeter per equipment
+        """
+        state_query = text(f"""
+            SELECT
+                e.id AS equipment_id,
+                e.name AS equipment_name,
+                e.equipment_type,
+                es.id AS schedule_id,
+                es.start_datetime,
+                es.end_datetime,
+                {RECURRENCE_COLUMNS_SQL},
+                es.operator_id,
+                u.first_name || ' ' || u.last_name AS operator_name,
+                es.project_id,
+                p.name AS project_name,
+                dr.report_date AS last_report_date,
+                dr.hourmeter AS last_hourmeter
+            FROM equipment e
+            LEFT JOIN LATERAL (
+                (
+                    SELECT s.id, s.start_datetime, s.end_datetime, s.operator_id, s.project_id,
+                           s.recurrence_rule, s.recurrence_until, s.recurrence_exceptions
+                    FROM equipment_schedules s
+                    WHERE s.equipment_id = e.id
+                        AND s.recurrence_rule IS NULL
+                        AND s.status IN ('scheduled', 'active', 'completed')
+                        AND tstzrange(s.start_datetime, s.end_datetime) @> CAST(:at AS TIMESTAMPTZ)
+                    ORDER BY s.start_datetime DESC
+                    LIMIT 1
+                )
+                UNION ALL
+                SELECT s.id, s.start_datetime, s.end_datetime, s.operator_id, s.project_id,
+                       s.recurrence_rule, s.recurrence_until, s.recurrence_exceptions
+                FROM equipment_schedules s
+                WHERE s.equipment_id = e.id
+                    AND s.recurrence_rule IS NOT NULL
+                    AND s.status IN ('scheduled', 'active', 'completed')
+                    AND tstzrange(s.start_datetime, s.recurrence_until) @> CAST(:at AS TIMESTAMPTZ)
+            ) es ON TRUE
+            LEFT JOIN users u ON es.operator_id = u.id
+            LEFT JOIN projects p ON es.project_id = p.id
+            LEFT JOIN LATERAL (
+                SELECT
+                    r.report_date,
+                    CASE WHEN r.shift_end <= :at
+                        THEN COALESCE(r.final_hourmeter, r.initial_hourmeter)
+                        ELSE r.initial_hourmeter
+                    END AS hourmeter
+                FROM daily_reports r
+                WHERE r.equipment_id = e.id
+                    AND r.report_date <= :at
+                ORDER BY r.report_date DESC
+                LIMIT 1
+            ) dr ON TRUE
+            WHERE e.is_active = TRUE
+                AND (CAST(:equipment_type AS VARCHAR) IS NULL OR e.equipment_type = :equipment_type)
+            ORDER BY e.id, es.recurrence_rule NULLS FIRST, es.start_datetime DESC
+        """)
+        
+        rows = self.db.execute(state_query, {
+            'at': at,
+            'equipment_type': equipment_type
+        }).fetchall()
+        
+        entries = []
+        for _, equipment_rows in groupby(rows, key=lambda row: row.equipment_id):
+            equipment_rows = list(equipment_rows)
+            first = equipment_rows[0]
+            running = None
+            for row in equipment_rows:
+                if row.schedule_id is None:
+                    continue
+                if row.recurrence_rule is None:
+                    running = (row, row.start_datetime, row.end_datetime)
+                    break
+                # Occurrence covering the instant, if any
+                covering = next(iter(expand_rows([row], at, at + timedelta(microseconds=1))), None)
+                if covering is not None:
+                    running = covering
+                    break
+            
+            entry = FleetStateEntry(
+                equipment_id=first.equipment_id,
+                equipment_name=first.equipment_name,
+                equipment_type=first.equipment_type,
+                last_hourmeter=first.last_hourmeter,
+                last_report_date=first.last_report_date
+            )
+            if running is not None:
+                row, start, end = running
+                entry.schedule_id = row.schedule_id
+                entry.schedule_start = start
+                entry.schedule_end = end
+                entry.operator_id = row.operator_id
+                entry.operator_name = row.operator_name
+                entry.project_id = row.project_id
+                entry.project_name = row.project_name
+            entries.append(entry)
+        
+        return FleetStateResponse(
+            at=at,
+            total_equipment=len(entries),
+            scheduled_equipment=sum(1 for entry in entries if entry.schedule_id is not None),
+            equipment=entries
+        )
+    
+    async def get_timeline(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        equipment_ids: Optional[List[int]] = None,
+        include_cancelled: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Build a compact timeline of schedules overlapping a time window.
+        
+        Related entities are returned once in lookup tables and schedules are
+        returned as parallel columns referencing them by index, so names are
+        never repeated per row. Schedules are read from a server-side cursor
+        in batches of TIMELINE_FETCH_SIZE and folded into the columns as they
+        arrive, so only the compact columns are held, never the result set.
+        
+        Args:
+            start_date: Window start
+            end_date: Window end
+            equipment_ids: Restrict to these equipment IDs (all equipment if omitted)
+            include_cancelled: Whether cancelled schedules are included
+            
+        Returns:
+            Dictionary matching ScheduleTimelineResponse
+        """
+        conditions = [WINDOW_OVERLAP_SQL]
+        params: Dict[str, Any] = {'start_date': start_date, 'end_date': end_date}
+        
+        if equipment_ids:
+            conditions.append("es.equipment_id = ANY(:equipment_ids)")
+            params['equipment_ids'] = list(equipment_ids)
+        
+        if not include_cancelled:
+            conditions.append("es.status != 'cancelled'")
+        
+        # Only narrow columns are fetched; names are resolved once per entity below
+        schedule_query = text(f"""
+            SELECT es.id, es.equipment_id, es.project_id, es.operator_id,
+                   es.start_datetime, es.end_datetime, es.status, {RECURRENCE_COLUMNS_SQL}
+            FROM equipment_schedules es
+            WHERE {' AND '.join(conditions)}
+            ORDER BY es.equipment_id, es.start_datetime
+        """)
+        
+        equipment_index = self._index_ids(equipment_ids or [])
+        project_index: Dict[int, int] = {}
+        operator_index: Dict[int, int] = {}
+        schedules: Dict[str, List[Any]] = {
+            column: [] for column in (
+                'schedule_id', 'equipment_idx', 'project_idx', 'operator_idx', 'start', 'end', 'status'
+            )
+        }
+        
+        result = self.db.execute(
+            schedule_query.execution_options(stream_results=True, yield_per=TIMELINE_FETCH_SIZE),
+            params
+        )
+        # Recurring series become one column entry per occurrence in the window
+        for row, start, end in expand_rows(result, start_date, end_date):
+            schedules['schedule_id'].append(row.id)
+            schedules['equipment_idx'].append(self._index_of(equipment_index, row.equipment_id))
+            schedules['project_idx'].append(self._index_of(project_index, row.project_id))
+            schedules['operator_idx'].append(self._index_of(operator_index, row.operator_id))
+            schedules['start'].append(int(start.timestamp()))
+            schedules['end'].append(int(end.timestamp()))
+            schedules['status'].append(row.status)
+        
+        equipment_names = self._fetch_lookup(
+            "SELECT id, name, equipment_type FROM equipment WHERE id = ANY(:ids)",
+            equipment_index
+        )
+        project_names = self._fetch_lookup(
+            "SELECT id, name FROM projects WHERE id = ANY(:ids)",
+            project_index
+        )
+        operator_names = self._fetch_lookup(
+            "SELECT id, email AS name FROM users WHERE id = ANY(:ids)",
+            operator_index
+        )
+        
+        return {
+            'date_range_start': start_date,
+            'date_range_end': end_date,
+            'equipment': [
+                {
+                    'id': eid,
+                    'name': getattr(equipment_names.get(eid), 'name', None),
+                    'equipment_type': getattr(equipment_names.get(eid), 'equipment_type', None)
+                }
+                for eid in equipment_index
+            ],
+            'projects': [
+                {'id': pid, 'name': getattr(project_names.get(pid), 'name', None)}
+                for pid in project_index
+            ],
+            'operators': [
+                {'id': oid, 'name': getattr(operator_names.get(oid), 'name', None)}
+                for oid in operator_index
+            ],
+            'schedules': schedules
+        }
+    
+    @staticmethod
+    def iter_timeline_json(timeline: Dict[str, Any], chunk_size: int = 5000) -> Iterator[str]:
+        """
+        Encode a timeline as JSON incrementally.
+        
+        Each column is emitted in slices of ``chunk_size`` values so the full
+        document is never materialised as a single string.
+        """
+        yield '{'
+        yield f'"date_range_start":{json.dumps(timeline["date_range_start"].isoformat())},'
+        yield f'"date_range_end":{json.dumps(timeline["date_range_end"].isoformat())}'
+        for key in ('equipment', 'projects', 'operators'):
+            yield f',"{key}":{json.dumps(timeline[key])}'
+        
+        yield ',"schedules":{'
+        for position, (column, values) in enumerate(timeline['schedules'].items()):
+            yield f'{"," if position else ""}"{column}":['
+            for offset in range(0, len(values), chunk_size):
+                chunk = json.dumps(values[offset:offset + chunk_size])[1:-1]
+                yield f'{"," if offset else ""}{chunk}'
+            yield ']'
+        yield '}}'
+    
+    @staticmethod
+    def _index_ids(ids: Iterable[Optional[int]]) -> Dict[int, int]:
+        """Map each distinct non-null ID to its position in first-seen order"""
+        index: Dict[int, int] = {}
+        for entity_id in ids:
+            SchedulingService._index_of(index, entity_id)
+        return index
+    
+    @staticmethod
+    def _index_of(index: Dict[int, int], entity_id: Optional[int]) -> Optional[int]:
+        """Position of an ID in index, appending it if first seen; None for a null ID"""
+        if entity_id is None:
+            return None
+        position = index.get(entity_id)
+        if position is None:
+            position = index[entity_id] = len(index)
+        return position
+    
+    def _fetch_lookup(self, query: str, ids: Dict[int, int]) -> Dict[int, Any]:
+        """Fetch lookup rows for a set of IDs in a single query"""
+        if not ids:
+            return {}
+        result = self.db.execute(text(query), {'ids': list(ids)})
+        return {row.id: row for row in result}
     
     async def generate_smart_suggestions(
         self,
@@ -383,6 +1598,9 @@ class SchedulingService:
         """
         Generate intelligent scheduling suggestions using availability analysis.
         
+        Candidates are drawn from the equipment's available slots, so they
+        fall inside its working calendar when it has one.
+        
         Args:
             request: Smart scheduling request parameters
             
@@ -391,71 +1609,131 @@ class SchedulingService:
         """
         logger.info(f"Generating smart suggestions for equipment {request.equipment_id}")
         
-        # Get equipment name
-        equipment = self.db.query(Equipment).filter(Equipment.id == request.equipment_id).first()
-        if not equipment:
-            raise ValueError(f"Equipment {request.equipment_id} not found")
-        
-        # Get availability for the requested period
+        # Get availability for the requested period (raises if the equipment is unknown)
         availability = await self.get_equipment_availability(
             request.equipment_id,
             request.date_range_start,
             request.date_range_end
         )
         
+        slots = [
+            slot for slot in availability.available_slots
+            if slot.duration_hours >= request.desired_duration_hours
+        ]
+        
         suggestions = []
         
-        # Find slots that can accommodate the requested duration
-        for slot in availability.available_slots:
-            if slot.duration_hours >= request.desired_duration_hours:
-                # Calculate confidence score based on various factors
-                confidence_score = self._calculate_confidence_score(
-                    slot, request, availability.utilization_percentage
-                )
-                
-                # Calculate optimal start time within the slot
-                if request.preferred_start and request.preferred_start >= slot.time_slot_start:
-                    suggested_start = min(request.preferred_start, 
-                                        slot.time_slot_end - timedelta(hours=request.desired_duration_hours))
-                else:
-                    suggested_start = slot.time_slot_start
-                
-                suggested_end = suggested_start + timedelta(hours=request.desired_duration_hours)
-                
-                suggestion = ScheduleSuggestion(
+        if slots:
+            slot_idx, offsets = self._generate_candidate_offsets(slots, request)
+            scores = self._score_candidates(
+                slots, slot_idx, offsets, request, availability.utilization_percentage
+            )
+            
+            # Rank by score, then closeness to the preferred start, then prefer
+            # candidates flush against an existing schedule (less
+            # fragmentation), then earliest start
+            slot_start_ts = np.array([s.time_slot_start.timestamp() for s in slots])
+            slot_seconds = np.array([
+                (s.time_slot_end - s.time_slot_start).total_seconds() for s in slots
+            ])
+            duration_seconds = request.desired_duration_hours * 3600.0
+            candidate_ts = slot_start_ts[slot_idx] + offsets
+            distance = (
+                np.abs(candidate_ts - request.preferred_start.timestamp())
+                if request.preferred_start else np.zeros(len(offsets))
+            )
+            flush = (offsets == 0) | np.isclose(offsets + duration_seconds, slot_seconds[slot_idx])
+            order = np.lexsort((candidate_ts, ~flush, distance, -scores))
+            
+            # Keep one candidate per duration-sized block of each slot so the
+            # top-k are distinct options rather than 15-minute shifts of one
+            block = np.floor(offsets / duration_seconds).astype(np.int64)
+            keys = slot_idx[order].astype(np.int64) * (int(block.max()) + 1) + block[order]
+            _, first = np.unique(keys, return_index=True)
+            top = order[np.sort(first)][:request.max_suggestions]
+            
+            for i in top:
+                slot = slots[slot_idx[i]]
+                suggested_start = slot.time_slot_start + timedelta(seconds=float(offsets[i]))
+                confidence_score = round(float(scores[i]), 4)
+                suggestions.append(ScheduleSuggestion(
                     equipment_id=request.equipment_id,
                     suggested_start=suggested_start,
-                    suggested_end=suggested_end,
+                    suggested_end=suggested_start + timedelta(hours=request.desired_duration_hours),
                     confidence_score=confidence_score,
                     reason=self._generate_suggestion_reason(slot, request, confidence_score),
                     conflicts=[]  # No conflicts since we're using available slots
-                )
-                
-                suggestions.append(suggestion)
-        
-        # Sort by confidence score
-        suggestions.sort(key=lambda s: s.confidence_score, reverse=True)
+                ))
         
         # Find best suggestion
         best_suggestion = suggestions[0] if suggestions else None
         
         return SmartScheduleResponse(
             equipment_id=request.equipment_id,
-            equipment_name=equipment.name,
+            equipment_name=availability.equipment_name,
             requested_duration=request.desired_duration_hours,
-            suggestions=suggestions[:5],  # Return top 5 suggestions
+            suggestions=suggestions,
             best_suggestion=best_suggestion,
             alternative_equipment=[]  # TODO: Implement alternative equipment logic
         )
     
-    def _calculate_confidence_score(
-        self, 
-        slot: TimeSlot, 
+    def _generate_candidate_offsets(
+        self,
+        slots: List[TimeSlot],
+        request: SmartScheduleRequest
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Generate candidate start offsets (seconds from slot start) for every slot.
+        
+        Candidates are placed every ``slot_granularity_minutes`` across each slot,
+        plus the latest feasible start and the preferred start when it falls
+        inside the slot.
+        
+        Returns:
+            Tuple of (slot index per candidate, offset in seconds per candidate)
+        """
+        duration_seconds = request.desired_duration_hours * 3600.0
+        step = request.slot_granularity_minutes * 60.0
+        
+        slot_seconds = np.array([
+            (s.time_slot_end - s.time_slot_start).total_seconds() for s in slots
+        ])
+        latest = np.maximum(slot_seconds - duration_seconds, 0.0)
+        
+        # Regular grid: counts[i] candidates in slot i, offsets 0, step, 2*step...
+        counts = np.floor(latest / step).astype(np.int64) + 1
+        slot_idx = np.repeat(np.arange(len(slots)), counts)
+        first_in_slot = np.repeat(np.cumsum(counts) - counts, counts)
+        offsets = (np.arange(counts.sum()) - first_in_slot) * step
+        
+        extra_idx = [np.arange(len(slots))]
+        extra_offsets = [latest]
+        
+        if request.preferred_start:
+            preferred = request.preferred_start.timestamp()
+            slot_start_ts = np.array([s.time_slot_start.timestamp() for s in slots])
+            preferred_offset = preferred - slot_start_ts
+            inside = (preferred_offset >= 0) & (preferred_offset <= latest)
+            extra_idx.append(np.nonzero(inside)[0])
+            extra_offsets.append(preferred_offset[inside])
+        
+        slot_idx = np.concatenate([slot_idx, *extra_idx])
+        offsets = np.concatenate([offsets, *extra_offsets])
+        
+        # Drop duplicate (slot, offset) pairs introduced by the extra candidates
+        pairs = np.unique(np.column_stack([slot_idx, offsets]), axis=0)
+        return pairs[:, 0].astype(np.int64), pairs[:, 1]
+    
+    def _score_candidates(
+        self,
+        slots: List[TimeSlot],
+        slot_idx: np.ndarray,
+        offsets: np.ndarray,
         request: SmartScheduleRequest,
         current_utilization: float
-    ) -> float:
+    ) -> np.ndarray:
         """
-        Calculate confidence score for a scheduling suggestion.
+        Calculate confidence scores for all candidate starts in one pass.
         
         Factors considered:
         - Slot duration vs requested duration
@@ -463,32 +1741,27 @@ class SchedulingService:
         - Current equipment utilization
         - Priority level
         """
-        base_score = 0.5
+        scores = np.full(len(offsets), 0.5)
         
         # Slot duration factor (prefer slots that closely match requested duration)
-        duration_ratio = request.desired_duration_hours / slot.duration_hours
-        if duration_ratio > 0.8:  # Good fit
-            base_score += 0.2
-        elif duration_ratio > 0.5:  # Acceptable fit
-            base_score += 0.1
+        slot_hours = np.array([s.duration_hours for s in slots], dtype=float)
+        duration_ratio = request.desired_duration_hours / slot_hours[slot_idx]
+        scores += np.select([duration_ratio > 0.8, duration_ratio > 0.5], [0.2, 0.1], 0.0)
         
         # Preferred time factor
         if request.preferred_start:
-            time_diff = abs((slot.time_slot_start - request.preferred_start).total_seconds())
-            if time_diff < 3600:  # Within 1 hour
-                base_score += 0.2
-            elif time_diff < 86400:  # Within 1 day
-                base_score += 0.1
+            slot_start_ts = np.array([s.time_slot_start.timestamp() for s in slots])
+            time_diff = np.abs(slot_start_ts[slot_idx] + offsets - request.preferred_start.timestamp())
+            scores += np.select([time_diff < 3600, time_diff < 86400], [0.2, 0.1], 0.0)
         
         # Utilization factor (prefer scheduling when equipment is already being used efficiently)
         if 60 <= current_utilization <= 80:  # Optimal utilization range
-            base_score += 0.1
+            scores += 0.1
         
         # Priority factor
-        priority_bonus = (request.priority - 1) * 0.05  # 0.0 to 0.2 bonus
-        base_score += priority_bonus
+        scores += (request.priority - 1) * 0.05  # 0.0 to 0.2 bonus
         
-        return min(1.0, base_score)  # Cap at 1.0
+        return np.minimum(scores, 1.0)  # Cap at 1.0
     
     def _generate_suggestion_reason(
         self, 
@@ -503,3 +1776,396 @@ class SchedulingService:
             return f"Good fit: {slot.duration_hours:.1f}h slot available for your {request.desired_duration_hours:.1f}h request"
         else:
             return f"Available slot: {slot.duration_hours:.1f}h slot can accommodate your {request.desired_duration_hours:.1f}h request"
+    
+    async def optimize_fleet_assignment(
+        self,
+        request: FleetOptimizationRequest
+    ) -> FleetOptimizationResponse:
+        """
+        Assign a batch of requests to equipment and start times across the fleet.
+        
+        Existing bookings of every candidate unit are loaded in one query and
+        the problem is solved in integer slots by several process-pool
+        workers with consecutive seeds; the best result wins, so a fixed
+        seed gives a repeatable answer. Nothing is booked.
+        
+        Args:
+            request: Requests plus search budget
+            
+        Returns:
+            Proposed assignment and the requests that could not be placed
+        """
+        items = request.requests
+        types = sorted({item.equipment_type for item in items})
+        
+        units = self.db.execute(text("""
+            SELECT id, name, equipment_type
+            FROM equipment
+            WHERE is_active = TRUE
+                AND status IN ('available', 'in_use')
+                AND equipment_type = ANY(:types)
+            ORDER BY id
+        """), {'types': types}).fetchall()
+        
+        slot_seconds = request.slot_granularity_minutes * 60
+        starts_ts = np.array([item.date_range_start.timestamp() for item in items])
+        ends_ts = np.array([item.date_range_end.timestamp() for item in items])
+        origin = float(starts_ts.min())
+        
+        durations = np.ceil(
+            np.array([item.desired_duration_hours for item in items]) * 3600 / slot_seconds
+        ).astype(np.int64)
+        earliest = np.ceil((starts_ts - origin) / slot_seconds).astype(np.int64)
+        # Requests whose window is too short get latest < earliest and stay unassigned
+        latest = np.floor((ends_ts - origin) / slot_seconds).astype(np.int64) - durations
+        
+        unit_index = {row.id: i for i, row in enumerate(units)}
+        unit_busy: List[List[Tuple[int, int]]] = [[] for _ in units]
+        if units:
+            window_start = items[int(starts_ts.argmin())].date_range_start
+            window_end = items[int(ends_ts.argmax())].date_range_end
+            for equipment_id, start, end in self._busy_intervals(list(unit_index), window_start, window_end):
+                unit_busy[unit_index[equipment_id]].append((
+                    int(np.floor((start.timestamp() - origin) / slot_seconds)),
+                    int(np.ceil((end.timestamp() - origin) / slot_seconds))
+                ))
+            unit_busy = [self._merge_slots(busy) for busy in unit_busy]
+        
+        type_index = {equipment_type: i for i, equipment_type in enumerate(types)}
+        problem = AssignmentProblem(
+            unit_types=np.array([type_index[row.equipment_type] for row in units], dtype=np.int64),
+            unit_busy=unit_busy,
+            request_types=np.array([type_index[item.equipment_type] for item in items], dtype=np.int64),
+            durations=durations,
+            earliest=earliest,
+            latest=latest,
+            priorities=np.array([item.priority for item in items], dtype=np.int64)
+        )
+        
+        loop = asyncio.get_running_loop()
+        pool = get_optimizer_pool(settings.SCHEDULING_OPTIMIZER_WORKERS)
+        solutions = await asyncio.gather(*(
+            loop.run_in_executor(
+                pool, solve_assignment, problem, request.seed + worker,
+                request.time_limit_seconds, request.max_iterations
+            )
+            for worker in range(settings.SCHEDULING_OPTIMIZER_WORKERS)
+        ))
+        solution = best_solution(solutions)
+        
+        assignments = []
+        unassigned = []
+        for i, item in enumerate(items):
+            if solution.units[i] < 0:
+                unassigned.append(item.reference)
+                continue
+            unit = units[solution.units[i]]
+            start_ts = origin + int(solution.starts[i]) * slot_seconds
+            start = convert_timezone(datetime.fromtimestamp(start_ts, tz=timezone.utc), item.date_range_start)
+            assignments.append(FleetAssignment(
+                reference=item.reference,
+                equipment_id=unit.id,
+                equipment_name=unit.name,
+                start_datetime=start,
+                end_datetime=start + timedelta(hours=item.desired_duration_hours),
+                project_id=item.project_id,
+                priority=item.priority
+            ))
+        assignments.sort(key=lambda a: (a.equipment_id, a.start_datetime))
+        
+        logger.info(
+            f"Fleet optimization placed {len(assignments)}/{len(items)} requests on {len(units)} units "
+            f"({solution.iterations} steps, objective {solution.objective:.2f} from greedy {solution.greedy_objective:.2f})"
+        )
+        
+        return FleetOptimizationResponse(
+            assignments=assignments,
+            unassigned=unassigned,
+            assigned_count=len(assignments),
+            unassigned_count=len(unassigned),
+            objective=round(solution.objective, 4),
+            greedy_objective=round(solution.greedy_objective, 4),
+            iterations=solution.iterations,
+            timed_out=solution.timed_out
+        )
+    
+    def _busy_intervals(
+        self,
+        equipment_ids: List[int],
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Tuple[int, datetime, datetime]]:
+        """Live bookings of several equipment in a window, series expanded, in one query"""
+        rows = self.db.execute(text(f"""
+            SELECT es.equipment_id, es.start_datetime, es.end_datetime, {RECURRENCE_COLUMNS_SQL}
+            FROM equipment_schedules es
+            WHERE es.equipment_id = ANY(:equipment_ids)
+                AND es.status IN ('scheduled', 'active')
+                AND {WINDOW_OVERLAP_SQL}
+        """), {
+            'equipment_ids': equipment_ids,
+            'start_date': start_date,
+            'end_date': end_date
+        }).fetchall()
+        return [(row.equipment_id, start, end) for row, start, end in expand_rows(rows, start_date, end_date)]
+    
+    @staticmethod
+    def _merge_slots(busy: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Sort slot intervals and merge overlapping ones"""
+        merged: List[Tuple[int, int]] = []
+        for start, end in sorted(busy):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+    
+    async def find_crew_windows(
+        self,
+        request: CrewSearchRequest
+    ) -> CrewSearchResponse:
+        """
+        Find the earliest windows in which a whole crew is free together.
+        
+        Bookings of every candidate unit are loaded in one query and laid
+        on a 15-minute slot grid next to each unit's working calendar. A
+        cumulative sum along each unit's free bitset tells, for every start
+        slot at once, whether the unit is free for the full duration; a
+        start is feasible when enough units of every requirement fit.
+        Windows returned do not overlap each other. Nothing is booked.
+        
+        Args:
+            request: Crew (exact units or type quantities) and duration
+            
+        Returns:
+            Earliest feasible windows with the units to book
+            
+        Raises:
+            ValueError: If requested units are missing or too few exist
+        """
+        if request.equipment_ids is not None:
+            filter_sql = "id = ANY(:equipment_ids)"
+            params = {'equipment_ids': request.equipment_ids}
+        else:
+            filter_sql = "equipment_type = ANY(:types)"
+            params = {'types': [r.equipment_type for r in request.requirements]}
+        
+        units = self.db.execute(text(f"""
+            SELECT id, name, equipment_type
+            FROM equipment
+            WHERE is_active = TRUE
+                AND status IN ('available', 'in_use')
+                AND {filter_sql}
+            ORDER BY id
+        """), params).fetchall()
+        
+        # Each group needs `quantity` of its member units free at once
+        groups: List[Tuple[List[int], int]] = []
+        if request.equipment_ids is not None:
+            found = {row.id for row in units}
+            missing = [equipment_id for equipment_id in request.equipment_ids if equipment_id not in found]
+            if missing:
+                raise ValueError(f"Equipment not found or not available for scheduling: {missing}")
+            groups = [([i], 1) for i in range(len(units))]
+        else:
+            by_type: Dict[str, List[int]] = {}
+            for i, row in enumerate(units):
+                by_type.setdefault(row.equipment_type, []).append(i)
+            for requirement in request.requirements:
+                members = by_type.get(requirement.equipment_type, [])
+                if len(members) < requirement.quantity:
+                    raise ValueError(
+                        f"Crew needs {requirement.quantity} {requirement.equipment_type} units "
+                        f"but only {len(members)} can be scheduled"
+                    )
+                groups.append((members, requirement.quantity))
+        
+        duration_seconds = request.desired_duration_hours * 3600
+        grid = SlotGrid(request.date_range_start, request.date_range_end)
+        duration_slots = int(np.ceil(duration_seconds / SLOT_SECONDS))
+        first_start = int(np.ceil((grid.start_ts - grid.origin_ts) / SLOT_SECONDS))
+        last_start = int((grid.end_ts - grid.origin_ts - duration_seconds) // SLOT_SECONDS)
+        
+        windows = []
+        if last_start >= first_start:
+            equipment_ids = [row.id for row in units]
+            row_index = {equipment_id: i for i, equipment_id in enumerate(equipment_ids)}
+            busy = self._busy_intervals(equipment_ids, request.date_range_start, request.date_range_end)
+            occupied = occupancy_bits(
+                grid,
+                np.array([row_index[equipment_id] for equipment_id, _, _ in busy], dtype=np.int64),
+                np.array([start.timestamp() for _, start, _ in busy], dtype=float),
+                np.array([end.timestamp() for _, _, end in busy], dtype=float),
+                len(units)
+            )
+            free = np.unpackbits(
+                free_bits(self._working_matrix(equipment_ids, grid), occupied),
+                axis=1, count=grid.n_slots
+            ).astype(np.int32)
+            
+            # fits[u, t]: unit u is free for the whole duration starting at slot t
+            free_before = np.concatenate(
+                [np.zeros((len(units), 1), dtype=np.int32), np.cumsum(free, axis=1)], axis=1
+            )
+            fits = (free_before[:, duration_slots:] - free_before[:, :-duration_slots]) == duration_slots
+            
+            feasible = np.ones(fits.shape[1], dtype=bool)
+            for members, quantity in groups:
+                feasible &= fits[members].sum(axis=0) >= quantity
+            feasible[:first_start] = False
+            feasible[last_start + 1:] = False
+            
+            starts = np.flatnonzero(feasible)
+            position = 0
+            while position < len(starts) and len(windows) < request.max_windows:
+                slot = int(starts[position])
+                start = convert_timezone(
+                    datetime.fromtimestamp(grid.origin_ts + slot * SLOT_SECONDS, tz=timezone.utc),
+                    request.date_range_start
+                )
+                crew = [
+                    units[i]
+                    for members, quantity in groups
+                    for i in [m for m in members if fits[m, slot]][:quantity]
+                ]
+                windows.append(CrewWindow(
+                    start_datetime=start,
+                    end_datetime=start + timedelta(seconds=duration_seconds),
+                    members=[
+                        CrewMemberOption(
+                            equipment_id=row.id,
+                            equipment_name=row.name,
+                            equipment_type=row.equipment_type
+                        )
+                        for row in crew
+                    ]
+                ))
+                position = int(np.searchsorted(starts, slot + duration_slots))
+        
+        return CrewSearchResponse(
+            requested_duration=request.desired_duration_hours,
+            candidate_count=len(units),
+            windows=windows
+        )
+    
+    def _working_matrix(self, equipment_ids: List[int], grid: SlotGrid) -> np.ndarray:
+        """Packed working-time bitsets, one row per equipment; each calendar is compiled once"""
+        profiles = load_equipment_calendars(self.db, equipment_ids)
+        round_the_clock = np.packbits(np.ones(grid.n_slots, dtype=bool))
+        compiled: Dict[int, np.ndarray] = {}
+        rows = []
+        for equipment_id in equipment_ids:
+            calendar = compile_calendar(profiles[equipment_id]['calendar'])
+            if calendar is None:
+                rows.append(round_the_clock)
+                continue
+            if calendar.id not in compiled:
+                compiled[calendar.id] = calendar.working_bits(grid)
+            rows.append(compiled[calendar.id])
+        return np.vstack(rows)
+    
+    async def book_crew(
+        self,
+        request: CrewBookingRequest,
+        created_by: int
+    ) -> CrewBookingResponse:
+        """
+        Book every member of a crew for the same window, all or nothing.
+        
+        The crew's equipment rows are locked in ID order, and operators
+        through their advisory locks, before conflicts are re-checked, so
+        concurrent crew bookings cannot slip in between check and insert.
+        If any member conflicts nothing is booked; otherwise all schedules
+        are inserted in one statement and committed together.
+        
+        Args:
+            request: Crew members and the shared window
+            created_by: User ID creating the schedules
+            
+        Returns:
+            Created schedules, one per member
+            
+        Raises:
+            ValueError: If equipment is unavailable or conflicts are detected
+        """
+        members = sorted(request.members, key=lambda m: m.equipment_id)
+        equipment_ids = [m.equipment_id for m in members]
+        
+        units = self.db.execute(text("""
+            SELECT id, name
+            FROM equipment
+            WHERE id = ANY(:equipment_ids)
+                AND is_active = TRUE
+                AND status IN ('available', 'in_use')
+            ORDER BY id
+            FOR UPDATE
+        """), {'equipment_ids': equipment_ids}).fetchall()
+        names = {row.id: row.name for row in units}
+        missing = [equipment_id for equipment_id in equipment_ids if equipment_id not in names]
+        if missing:
+            self.db.rollback()
+            raise ValueError(f"Equipment not found or not available for scheduling: {missing}")
+        
+        for operator_id in sorted({m.operator_id for m in members if m.operator_id is not None}):
+            self._lock_operator(operator_id)
+        
+        occurrence = [(request.start_datetime, request.end_datetime)]
+        conflicts = []
+        for member in members:
+            conflicts.extend(await self.check_conflicts_for_occurrences(member.equipment_id, occurrence))
+            if member.operator_id is not None:
+                conflicts.extend(await self.check_operator_conflicts_for_occurrences(
+                    member.operator_id, occurrence
+                ))
+        
+        error_conflicts = [c for c in conflicts if c.severity == ConflictSeverity.ERROR]
+        if error_conflicts:
+            self.db.rollback()
+            conflict_messages = [c.message for c in error_conflicts]
+            raise ValueError(f"Crew booking conflicts detected: {'; '.join(conflict_messages)}")
+        
+        rows = self.db.execute(text("""
+            INSERT INTO equipment_schedules (
+                equipment_id, project_id, operator_id, start_datetime,
+                end_datetime, status, notes, created_by
+            )
+            SELECT crew.equipment_id, :project_id, crew.operator_id, :start_datetime,
+                   :end_datetime, 'scheduled', :notes, :created_by
+            FROM UNNEST(
+                CAST(:equipment_ids AS INTEGER[]),
+                CAST(:operator_ids AS INTEGER[])
+            ) AS crew(equipment_id, operator_id)
+            RETURNING id, equipment_id, operator_id, created_at, updated_at, version
+        """), {
+            'equipment_ids': equipment_ids,
+            'operator_ids': [m.operator_id for m in members],
+            'project_id': request.project_id,
+            'start_datetime': request.start_datetime,
+            'end_datetime': request.end_datetime,
+            'notes': request.notes,
+            'created_by': created_by
+        }).fetchall()
+        
+        ScheduleRollupService(self.db).refresh_for_intervals(request.start_datetime)
+        self.db.commit()
+        invalidate_equipment(*equipment_ids)
+        logger.info(f"Booked crew of {len(rows)} units from {request.start_datetime} to {request.end_datetime}")
+        
+        return CrewBookingResponse(schedules=[
+            ScheduleResponse(
+                id=row.id,
+                equipment_id=row.equipment_id,
+                project_id=request.project_id,
+                operator_id=row.operator_id,
+                start_datetime=request.start_datetime,
+                end_datetime=request.end_datetime,
+                status='scheduled',
+                notes=request.notes,
+                created_by=created_by,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+                version=row.version,
+                equipment_name=names[row.equipment_id]
+            )
+            for row in sorted(rows, key=lambda row: row.equipment_id)
+        ])
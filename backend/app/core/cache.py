@@ -0,0 +1,175 @@
+"""Redis-backed caching shared across API workers"""
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+import json
+import logging
+import time
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds to bypass Redis after a connection error so requests do not pay the timeout
+_RETRY_AFTER_SECONDS = 30
+
+# Global cache epoch, part of every VersionedCache key. A process that lost
+# Redis may have dropped invalidations meanwhile, so it bumps the epoch once
+# it reaches Redis again, retiring every entry cached before the outage.
+EPOCH_KEY = "cache:epoch"
+
+_client: Optional[redis.Redis] = None
+_disabled_until = 0.0
+_epoch_stale = False
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """Get the shared Redis client, or None while Redis is unreachable"""
+    global _client, _epoch_stale
+    if time.monotonic() < _disabled_until:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+            decode_responses=True
+        )
+    if _epoch_stale:
+        try:
+            _client.incr(EPOCH_KEY)
+        except redis.RedisError as e:
+            mark_redis_unavailable(e)
+            return None
+        _epoch_stale = False
+        logger.info("Redis reachable again, cache epoch bumped")
+    return _client
+
+
+def mark_redis_unavailable(error: Exception) -> None:
+    """Stop using Redis for a short while after a failure; the cache epoch is bumped on reconnect"""
+    global _disabled_until, _epoch_stale
+    _disabled_until = time.monotonic() + _RETRY_AFTER_SECONDS
+    _epoch_stale = True
+    logger.warning(f"Redis unavailable, caching disabled for {_RETRY_AFTER_SECONDS}s: {error}")
+
+
+def publish_event(channel: str, event: Any) -> None:
+    """Publish a JSON event to subscribers of a channel; dropped while Redis is unavailable"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.publish(channel, json.dumps(event, default=str))
+    except redis.RedisError as e:
+        mark_redis_unavailable(e)
+
+
+class VersionedCache:
+    """
+    JSON cache whose entries are grouped into invalidation scopes.
+
+    Every scope has a generation counter that is part of each entry key,
+    together with the global cache epoch. Invalidating a scope bumps the
+    counter, so older entries become unreachable and expire through their
+    TTL; invalidations dropped while Redis was unreachable are covered by
+    the epoch bump on reconnect. Readers capture the generation
+    before loading data, which keeps a write that lands mid-computation from
+    being masked by a stale entry.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: int, scope_namespace: Optional[str] = None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        # Caches sharing a scope namespace are invalidated together
+        self.scope_namespace = scope_namespace or namespace
+
+    def _generation_key(self, scope: str) -> str:
+        return f"{self.scope_namespace}:gen:{scope}"
+
+    def _version(self, client: redis.Redis, scope: str) -> str:
+        """Epoch and generation of a scope, read in one round trip"""
+        epoch, generation = client.mget([EPOCH_KEY, self._generation_key(scope)])
+        return f"{epoch or '0'}.{generation or '0'}"
+
+    def lookup(self, scope: str, key: str) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Look up an entry.
+
+        Returns:
+            Tuple of (cached value or None, versioned key to store a fresh value
+            under, or None when Redis is unavailable)
+        """
+        client = get_redis()
+        if client is None:
+            return None, None
+        try:
+            versioned_key = f"{self.namespace}:{scope}:{self._version(client, scope)}:{key}"
+            raw = client.get(versioned_key)
+        except redis.RedisError as e:
+            mark_redis_unavailable(e)
+            return None, None
+        return (json.loads(raw) if raw is not None else None), versioned_key
+
+    def lookup_many(
+        self,
+        scope: str,
+        keys: Sequence[str]
+    ) -> Tuple[List[Optional[Any]], Optional[List[str]]]:
+        """
+        Look up several entries of one scope in a single round trip.
+
+        Returns:
+            Tuple of (cached values in key order, None where missing; versioned
+            keys to store fresh values under, or None when Redis is unavailable)
+        """
+        client = get_redis()
+        if client is None:
+            return [None] * len(keys), None
+        try:
+            version = self._version(client, scope)
+            versioned_keys = [f"{self.namespace}:{scope}:{version}:{key}" for key in keys]
+            raws = client.mget(versioned_keys) if versioned_keys else []
+        except redis.RedisError as e:
+            mark_redis_unavailable(e)
+            return [None] * len(keys), None
+        return [json.loads(raw) if raw is not None else None for raw in raws], versioned_keys
+
+    def store(self, versioned_key: Optional[str], value: Any) -> None:
+        """Store a value under a key returned by lookup()"""
+        if versioned_key is None:
+            return
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.set(versioned_key, json.dumps(value, default=str), ex=self.ttl_seconds)
+        except redis.RedisError as e:
+            mark_redis_unavailable(e)
+
+    def store_many(self, entries: Iterable[Tuple[Optional[str], Any]]) -> None:
+        """Store (versioned key, value) pairs returned by lookup_many() in one round trip"""
+        entries = [(key, value) for key, value in entries if key is not None]
+        client = get_redis()
+        if client is None or not entries:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for versioned_key, value in entries:
+                pipe.set(versioned_key, json.dumps(value, default=str), ex=self.ttl_seconds)
+            pipe.execute()
+        except redis.RedisError as e:
+            mark_redis_unavailable(e)
+
+    def invalidate(self, *scopes: str) -> None:
+        """Invalidate every entry in the given scopes"""
+        client = get_redis()
+        if client is None or not scopes:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for scope in scopes:
+                pipe.incr(self._generation_key(scope))
+            pipe.execute()
+        except redis.RedisError as e:
+            mark_redis_unavailable(e)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -44,6 +44,40 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     UPLOAD_DIRECTORY: str = "uploads"
     
+    # Scheduling Settings
+    SCHEDULING_ROLLUP_MAX_STALENESS_SECONDS: int = 300
+    SCHEDULING_CACHE_TTL_SECONDS: int = 3600
+    SCHEDULING_RECURRENCE_HORIZON_DAYS: int = 365
+    SCHEDULING_CONFLICT_LOG_FLUSH_SECONDS: float = 5.0
+    SCHEDULING_CONFLICT_LOG_BATCH_SIZE: int = 500
+    SCHEDULING_CONFLICT_LOG_MAX_BUFFERED: int = 50000
+    SCHEDULING_OPTIMIZER_WORKERS: int = 2
+    SCHEDULING_LIFECYCLE_ENABLED: bool = True
+    SCHEDULING_LIFECYCLE_INTERVAL_SECONDS: int = 60
+    SCHEDULING_ICAL_PAST_DAYS: int = 90
+    
+    # Reports Settings
+    REPORTS_KPI_CACHE_TTL_SECONDS: int = 900
+    REPORTS_STANDARD_HOURS_PER_DAY: float = 8.0
+    REPORTS_FUEL_PRICE_PER_LITER: float = 4.5
+    REPORTS_EQUIPMENT_USEFUL_LIFE_YEARS: float = 10.0
+    REPORTS_JOB_WORKERS: int = 2
+    REPORTS_JOB_TIMEOUT_SECONDS: int = 1800
+    REPORTS_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024  # Disk budget for cached report files
+    REPORTS_CACHE_MAX_AGE_SECONDS: int = 6 * 3600  # Cached report files are rebuilt after this, deletes do not move the watermark
+    REPORTS_WATERMARK_SETTLE_SECONDS: int = 300  # Longest source table write transaction report caches allow for
+    REPORTS_PDF_LOGO_PATH: Optional[str] = None  # PNG/JPEG drawn in the PDF page header
+    REPORTS_PDF_FONT_PATH: Optional[str] = None  # TrueType font for PDF text; Helvetica if unset
+    REPORTS_PDF_BOLD_FONT_PATH: Optional[str] = None
+    REPORTS_SNAPSHOT_ENABLED: bool = True
+    REPORTS_SNAPSHOT_REFRESH_SECONDS: int = 60
+    REPORTS_SNAPSHOT_SETTLE_SECONDS: int = 300  # Longest report write transaction a snapshot allows for
+    REPORTS_SUBMISSION_DEADLINE_HOURS: int = 24  # After shift end; later submissions are late
+    REPORTS_MAINTENANCE_INTERVAL_HOURS: float = 250.0  # Unless equipment specifications set service_interval_hours
+    REPORTS_MAINTENANCE_MAJOR_SERVICE_EVERY: int = 4  # Every Nth service is a major one
+    REPORTS_MAINTENANCE_SERVICE_COST_PERCENT: float = 0.5  # Routine service cost, percent of purchase cost
+    REPORTS_MAINTENANCE_HALF_LIFE_DAYS: float = 30.0  # Age at which a reading counts half in usage fits
+    
     # Development Settings
     DEBUG: bool = False
     
@@ -1,10 +1,13 @@
 """Database initialization and seeding script"""
+from pathlib import Path
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.core.database import engine, get_db
 from app.models.base import Base
 from app.models.user import User, Role, Permission
 from app.models.company import Company
 from app.models.equipment import Equipment
+from app.models.daily_report import DailyReport, OperatorProfile
 from app.services.auth import UserService, RoleService, PermissionService
 from app.api.v1.auth.schemas import UserCreate
 import logging
@@ -12,6 +15,13 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SQL migrations, applied in file name order
+MIGRATIONS_DIRECTORY = Path(__file__).resolve().parents[2] / "migrations"
+
+
+class MigrationError(RuntimeError):
+    """A SQL migration failed; the schema is behind what the application needs"""
+
 
 def create_tables():
     """Create all tables"""
@@ -20,6 +30,54 @@ def create_tables():
     logger.info("Tables created successfully")
 
 
+def apply_migrations():
+    """
+    Apply the SQL migrations not yet recorded in schema_migrations.
+
+    Each file runs in its own transaction together with its record, so a
+    failing migration stops the run without being marked applied. An
+    advisory lock keeps concurrent starts from applying the same file twice.
+    Tables the migrations alter come from create_tables and from
+    000_equipment_scheduling_schema.sql.
+
+    Raises:
+        MigrationError: If a migration fails
+    """
+    logger.info("Applying migrations...")
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(hashtext('schema_migrations'))"))
+        connection.commit()
+        try:
+            connection.execute(text("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    filename VARCHAR(255) PRIMARY KEY,
+                    applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                )
+            """))
+            applied = {row.filename for row in connection.execute(text("SELECT filename FROM schema_migrations"))}
+            connection.commit()
+
+            for path in sorted(MIGRATIONS_DIRECTORY.glob("*.sql")):
+                if path.name in applied:
+                    continue
+                logger.info(f"Applying migration {path.name}")
+                try:
+                    # Whole file in one driver call; no bind parameters, so % needs no escaping
+                    connection.execution_options(no_parameters=True).exec_driver_sql(path.read_text())
+                except Exception as e:
+                    raise MigrationError(f"Migration {path.name} failed: {e}") from e
+                connection.execute(
+                    text("INSERT INTO schema_migrations (filename) VALUES (:filename)"),
+                    {'filename': path.name}
+                )
+                connection.commit()
+        finally:
+            connection.rollback()
+            connection.execute(text("SELECT pg_advisory_unlock(hashtext('schema_migrations'))"))
+            connection.commit()
+    logger.info("Migrations applied successfully")
+
+
 def create_default_permissions(db: Session):
     """Create default permissions"""
     permissions = [
@@ -154,7 +212,7 @@ def create_developer_user(db: Session):
 
 
 def initialize_database():
-    """Initialize database with tables and seed data"""
+    """Initialize database with tables, seed data and migrations"""
     logger.info("Initializing database...")
     
     # Create tables
@@ -182,6 +240,9 @@ def initialize_database():
         raise
     finally:
         db.close()
+    
+    # After seeding, so a failing migration cannot leave the database without users and roles
+    apply_migrations()
 
 
 if __name__ == "__main__":
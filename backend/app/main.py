@@ -3,6 +3,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.api.v1.scheduling.conflict_log import conflict_log_writer
+from app.api.v1.scheduling.lifecycle import lifecycle_worker
+from app.api.v1.scheduling.optimizer import shutdown_optimizer_pool
+from app.api.v1.reports.jobs import shutdown_report_pool
+from app.api.v1.reports.snapshot import snapshot_refresher
 import traceback
 import logging
 
@@ -54,6 +59,43 @@ async def global_exception_handler(request: Request, exc: Exception):
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+@app.on_event("startup")
+def start_schedule_lifecycle():
+    if settings.SCHEDULING_LIFECYCLE_ENABLED:
+        lifecycle_worker.start()
+
+
+@app.on_event("startup")
+def start_usage_snapshot():
+    if settings.REPORTS_SNAPSHOT_ENABLED:
+        snapshot_refresher.start()
+
+
+@app.on_event("shutdown")
+def flush_conflict_log():
+    conflict_log_writer.stop()
+
+
+@app.on_event("shutdown")
+def stop_schedule_lifecycle():
+    lifecycle_worker.stop()
+
+
+@app.on_event("shutdown")
+def stop_schedule_optimizer():
+    shutdown_optimizer_pool()
+
+
+@app.on_event("shutdown")
+def stop_report_jobs():
+    shutdown_report_pool()
+
+
+@app.on_event("shutdown")
+def stop_usage_snapshot():
+    snapshot_refresher.stop()
+
+
 @app.get("/")
 async def root():
     return {"message": "Bitcorp ERP API", "version": "1.0.0"}
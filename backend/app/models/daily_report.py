@@ -64,6 +64,8 @@ class DailyReport(Base):
     approved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     approved_at = Column(DateTime(timezone=True), nullable=True)
     rejection_reason = Column(Text, nullable=True)
+    ledger_posted_at = Column(DateTime(timezone=True), nullable=True)  # Set once added to financial_ledger
+    maintenance_fitted_at = Column(DateTime(timezone=True), nullable=True)  # Set once added to equipment_usage_fits
     
     # Photos and attachments
     photos = Column(Text, nullable=True)  # JSON array of photo URLs
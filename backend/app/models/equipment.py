@@ -25,6 +25,7 @@ class Equipment(BaseModel):
     images = Column(JSON, default=lambda: [])
     notes = Column(Text)
     is_active = Column(Boolean, default=True)
+    working_calendar_id = Column(Integer, nullable=True)  # working_calendars.id; falls back to the company default
     
     # Relationships
     company = relationship("Company", back_populates="equipment")
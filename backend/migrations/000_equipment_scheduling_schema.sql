@@ -0,0 +1,55 @@
+-- Equipment Scheduling Base Schema
+-- Tables the scheduling migrations build on and no ORM model creates: the
+-- idempotent core of .archive/database/equipment_scheduling_schema_v2.sql, so
+-- a fresh database gets it before 001. Databases set up from that file keep
+-- their tables. Its sample rows, the per-row equipment status trigger
+-- (dropped again by 006) and the SQL helper functions the service does not
+-- call are not carried over, nor is the not_too_old check: CHECK constraints
+-- are re-evaluated on every UPDATE, so it would reject status changes of
+-- schedules that started more than a week ago.
+
+CREATE TABLE IF NOT EXISTS projects (
+    id SERIAL PRIMARY KEY,
+    company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
+    name VARCHAR(255) NOT NULL,
+    description TEXT,
+    project_code VARCHAR(50) UNIQUE,
+    client_name VARCHAR(255),
+    client_contact VARCHAR(255),
+    start_date DATE,
+    end_date DATE,
+    estimated_budget DECIMAL(15,2),
+    actual_cost DECIMAL(15,2) DEFAULT 0.0,
+    status VARCHAR(50) DEFAULT 'planning',
+    priority VARCHAR(20) DEFAULT 'medium',
+    project_manager_id INTEGER REFERENCES users(id),
+    location POINT,
+    address TEXT,
+    specifications JSONB DEFAULT '{}',
+    documents JSONB DEFAULT '[]',
+    notes TEXT,
+    is_active BOOLEAN DEFAULT true,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS equipment_schedules (
+    id SERIAL PRIMARY KEY,
+    equipment_id INTEGER NOT NULL REFERENCES equipment(id) ON DELETE CASCADE,
+    project_id INTEGER REFERENCES projects(id) ON DELETE SET NULL,
+    operator_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    start_datetime TIMESTAMP WITH TIME ZONE NOT NULL,
+    end_datetime TIMESTAMP WITH TIME ZONE NOT NULL,
+    status VARCHAR(20) DEFAULT 'scheduled' CHECK (status IN ('scheduled', 'active', 'completed', 'cancelled')),
+    notes TEXT,
+    created_by INTEGER NOT NULL REFERENCES users(id),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT valid_date_range CHECK (start_datetime < end_datetime)
+);
+
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_equipment_date
+    ON equipment_schedules (equipment_id, start_datetime, end_datetime);
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_project ON equipment_schedules (project_id);
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_operator ON equipment_schedules (operator_id);
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_status_date ON equipment_schedules (status, start_datetime);
@@ -0,0 +1,28 @@
+-- Scheduling Dashboard Rollups
+-- Per-day, per-status, per-equipment-type aggregates of equipment_schedules
+-- served by /scheduling/dashboard/overview instead of scanning raw schedules.
+-- Apply after equipment_scheduling_schema_v2.sql.
+
+CREATE TABLE IF NOT EXISTS schedule_daily_rollups (
+    day DATE NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    equipment_type VARCHAR(100) NOT NULL,
+    schedule_count INTEGER NOT NULL DEFAULT 0,
+    scheduled_hours DECIMAL(12,2) NOT NULL DEFAULT 0,
+    equipment_ids INTEGER[] NOT NULL DEFAULT '{}',
+    refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (day, status, equipment_type)
+);
+
+-- Single-row watermark for the periodic catch-up refresh
+CREATE TABLE IF NOT EXISTS schedule_rollup_state (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    refreshed_through TIMESTAMP WITH TIME ZONE
+);
+
+INSERT INTO schedule_rollup_state (id, refreshed_through) VALUES (1, NULL)
+ON CONFLICT (id) DO NOTHING;
+
+-- Day-range recomputation and change detection for the catch-up job
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_start ON equipment_schedules(start_datetime);
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_updated_at ON equipment_schedules(updated_at);
@@ -0,0 +1,17 @@
+-- Recurring Equipment Schedules
+-- A recurring schedule is one equipment_schedules row: start_datetime/end_datetime
+-- describe the first occurrence and recurrence_rule holds an RRULE subset
+-- (FREQ=DAILY|WEEKLY;INTERVAL;BYDAY;COUNT;UNTIL). Occurrences are expanded by the
+-- API inside each query window, never materialised as rows.
+
+ALTER TABLE equipment_schedules
+    ADD COLUMN IF NOT EXISTS recurrence_rule VARCHAR(255),
+    -- End of the last occurrence (NULL = open-ended), used to prune finished series
+    ADD COLUMN IF NOT EXISTS recurrence_until TIMESTAMP WITH TIME ZONE,
+    -- Start times of skipped occurrences (RRULE EXDATE)
+    ADD COLUMN IF NOT EXISTS recurrence_exceptions TIMESTAMP WITH TIME ZONE[] NOT NULL DEFAULT '{}';
+
+-- Series lookup per equipment for conflict checks and availability
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_series
+    ON equipment_schedules(equipment_id, recurrence_until)
+    WHERE recurrence_rule IS NOT NULL;
@@ -0,0 +1,6 @@
+-- Optimistic Concurrency for Equipment Schedules
+-- Every write increments version; updates only apply when the client's version
+-- still matches, so concurrent edits fail fast instead of taking row locks.
+
+ALTER TABLE equipment_schedules
+    ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
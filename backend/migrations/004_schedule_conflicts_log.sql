@@ -0,0 +1,22 @@
+-- Scheduling Conflict Log
+-- Audit log of detected conflicts, written behind in batches by
+-- app/api/v1/scheduling/conflict_log.py. The table matches
+-- equipment_scheduling_schema_v2.sql and is only created if missing.
+
+CREATE TABLE IF NOT EXISTS schedule_conflicts_log (
+    id SERIAL PRIMARY KEY,
+    equipment_id INTEGER NOT NULL REFERENCES equipment(id),
+    conflicting_schedule_id INTEGER REFERENCES equipment_schedules(id),
+    attempted_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    attempted_end TIMESTAMP WITH TIME ZONE NOT NULL,
+    conflict_type VARCHAR(50) NOT NULL, -- overlap, adjacent, nearby, maintenance_conflict
+    severity VARCHAR(20) NOT NULL, -- error, warning, info
+    resolved_at TIMESTAMP WITH TIME ZONE,
+    resolved_by INTEGER REFERENCES users(id),
+    resolution_notes TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Frequency analytics scan a period of the log and group by equipment
+CREATE INDEX IF NOT EXISTS idx_schedule_conflicts_log_created
+    ON schedule_conflicts_log (created_at, equipment_id);
@@ -0,0 +1,7 @@
+-- Operator Double-Booking Detection
+-- Operator conflict checks and the free-operator roster query look up live
+-- bookings of one operator overlapping a window.
+
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_operator_window
+    ON equipment_schedules (operator_id, start_datetime, end_datetime)
+    WHERE operator_id IS NOT NULL AND status IN ('scheduled', 'active');
@@ -0,0 +1,20 @@
+-- Schedule Lifecycle Worker
+-- Schedules are advanced scheduled -> active -> completed and equipment
+-- status is derived from them by app/api/v1/scheduling/lifecycle.py once a
+-- minute, replacing the per-row status trigger.
+
+DROP TRIGGER IF EXISTS equipment_schedule_status_update ON equipment_schedules;
+
+-- Single row holding the time up to which transitions have been applied
+CREATE TABLE IF NOT EXISTS schedule_lifecycle_state (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    processed_through TIMESTAMP WITH TIME ZONE
+);
+
+INSERT INTO schedule_lifecycle_state (id, processed_through) VALUES (1, NULL)
+ON CONFLICT (id) DO NOTHING;
+
+-- Completion scans open one-off schedules by end time
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_open_end
+    ON equipment_schedules (end_datetime)
+    WHERE status IN ('scheduled', 'active');
@@ -0,0 +1,10 @@
+-- Point-in-time Fleet State
+-- /scheduling/fleet/state looks up, per equipment, the schedule covering an
+-- instant (idx_equipment_schedules_equipment_date on equipment_id,
+-- start_datetime, end_datetime) and the latest daily report before it.
+
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_equipment_date
+    ON equipment_schedules (equipment_id, start_datetime, end_datetime);
+
+CREATE INDEX IF NOT EXISTS idx_daily_reports_equipment_date
+    ON daily_reports (equipment_id, report_date);
@@ -0,0 +1,34 @@
+-- Working Calendars
+-- Shift hours and holidays per company or site. Availability only offers time
+-- inside the calendar of each equipment: its own working_calendar_id when set
+-- (typically a site calendar), otherwise its company's default calendar.
+-- Equipment without either keeps round-the-clock availability.
+
+CREATE TABLE IF NOT EXISTS working_calendars (
+    id SERIAL PRIMARY KEY,
+    company_id INTEGER NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    name VARCHAR(255) NOT NULL,
+    -- Site the calendar applies to (NULL = company-wide)
+    site_location VARCHAR(500),
+    -- IANA zone the shift hours are expressed in
+    timezone VARCHAR(64) NOT NULL DEFAULT 'UTC',
+    -- Shift periods as [[weekday (0 = Monday), "HH:MM", "HH:MM"], ...]; "24:00" ends a day
+    weekly_hours JSONB NOT NULL DEFAULT '[]',
+    -- Whole non-working days in the calendar's timezone
+    holidays DATE[] NOT NULL DEFAULT '{}',
+    is_default BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- At most one default calendar per company
+CREATE UNIQUE INDEX IF NOT EXISTS idx_working_calendars_company_default
+    ON working_calendars (company_id)
+    WHERE is_default;
+
+ALTER TABLE equipment
+    ADD COLUMN IF NOT EXISTS working_calendar_id INTEGER REFERENCES working_calendars(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_equipment_working_calendar
+    ON equipment (working_calendar_id)
+    WHERE working_calendar_id IS NOT NULL;
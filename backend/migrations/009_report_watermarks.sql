@@ -0,0 +1,14 @@
+-- Report Data Watermarks
+-- Report caches are keyed by MAX(updated_at) of their source tables; these
+-- indexes keep that lookup to an index probe. equipment_schedules.updated_at
+-- is indexed by 001_schedule_daily_rollups.sql.
+
+CREATE INDEX IF NOT EXISTS idx_daily_reports_updated_at
+    ON daily_reports (updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_equipment_updated_at
+    ON equipment (updated_at);
+
+-- KPI window scans by report date
+CREATE INDEX IF NOT EXISTS idx_daily_reports_report_date
+    ON daily_reports (report_date);
@@ -0,0 +1,32 @@
+-- Financial Ledger
+-- Per-day, per-company, per-project totals of approved daily reports behind
+-- /reports/financial-summary. Reports are posted once, when approved
+-- (ledger_posted_at marks them), so summaries sum pre-aggregated days
+-- instead of scanning raw reports. Approved reports cannot be edited, which
+-- keeps posted amounts final. Reports approved before this migration are
+-- posted by the first summary request.
+
+ALTER TABLE daily_reports
+    ADD COLUMN IF NOT EXISTS ledger_posted_at TIMESTAMP WITH TIME ZONE;
+
+-- Approved reports still waiting to be posted
+CREATE INDEX IF NOT EXISTS idx_daily_reports_ledger_pending
+    ON daily_reports (id)
+    WHERE status = 'approved' AND ledger_posted_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS financial_ledger (
+    day DATE NOT NULL,
+    company_id INTEGER NOT NULL,
+    project_name VARCHAR(200) NOT NULL,
+    report_count INTEGER NOT NULL DEFAULT 0,
+    hours DECIMAL(14,2) NOT NULL DEFAULT 0,
+    -- hours_worked x equipment.hourly_rate at posting time
+    revenue DECIMAL(16,2) NOT NULL DEFAULT 0,
+    fuel_liters DECIMAL(14,2) NOT NULL DEFAULT 0,
+    fuel_cost DECIMAL(16,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (day, company_id, project_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_financial_ledger_company_day
+    ON financial_ledger (company_id, day);
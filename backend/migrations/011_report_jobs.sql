@@ -0,0 +1,35 @@
+-- Report Jobs
+-- Background report generation requested through /reports/generate. Job
+-- state lives here so any API worker can report status; files are written
+-- under UPLOAD_DIRECTORY/reports. request_key is a hash of the normalized
+-- request: at most one identical job can be queued or running at a time.
+
+CREATE TABLE IF NOT EXISTS report_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    request_key CHAR(64) NOT NULL,
+    report_type VARCHAR(50) NOT NULL,
+    format VARCHAR(10) NOT NULL,
+    -- Normalized ReportRequest the job was created from
+    parameters JSONB NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, completed, failed
+    progress SMALLINT NOT NULL DEFAULT 0 CHECK (progress BETWEEN 0 AND 100),
+    message VARCHAR(255),
+    file_path VARCHAR(500),
+    file_size BIGINT,
+    row_count INTEGER,
+    error_message TEXT,
+    requested_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    -- Heartbeat: moved by every progress update
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Deduplicates identical in-flight requests
+CREATE UNIQUE INDEX IF NOT EXISTS idx_report_jobs_in_flight
+    ON report_jobs (request_key)
+    WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS idx_report_jobs_created
+    ON report_jobs (created_at DESC);
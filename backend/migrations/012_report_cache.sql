@@ -0,0 +1,26 @@
+-- Report Cache
+-- Completed report jobs double as a cache of generated files, keyed by the
+-- canonical request (request_key) and the data watermark (latest updated_at
+-- of the report source tables) they were built from. A request is served
+-- from the cache while the watermark is unchanged. Files are evicted
+-- least-recently-used first once REPORTS_CACHE_MAX_BYTES is exceeded, and
+-- their jobs become 'expired'.
+
+ALTER TABLE report_jobs
+    ADD COLUMN IF NOT EXISTS watermark VARCHAR(255) NOT NULL DEFAULT '',
+    ADD COLUMN IF NOT EXISTS last_accessed_at TIMESTAMP WITH TIME ZONE;
+
+-- In-flight deduplication is per watermark: a request over newer data starts a new job
+DROP INDEX IF EXISTS idx_report_jobs_in_flight;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_report_jobs_in_flight
+    ON report_jobs (request_key, watermark)
+    WHERE status IN ('queued', 'running');
+
+-- Cache lookups and LRU eviction
+CREATE INDEX IF NOT EXISTS idx_report_jobs_artifacts
+    ON report_jobs (request_key, watermark, finished_at DESC)
+    WHERE status = 'completed' AND file_path IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_report_jobs_last_accessed
+    ON report_jobs (last_accessed_at DESC)
+    WHERE status = 'completed' AND file_path IS NOT NULL;
@@ -0,0 +1,33 @@
+-- Maintenance Forecasts
+-- Per-equipment hourmeter growth fits behind the maintenance_schedule report
+-- and EquipmentPerformanceReport.next_maintenance. Each approved report's
+-- hourmeter reading is folded once (maintenance_fitted_at marks it) into
+-- exponentially weighted least-squares sums, so forecasts are refreshed
+-- incrementally as reports are approved. Readings are weighted by
+-- 2^(-(anchor_day - day) / REPORTS_MAINTENANCE_HALF_LIFE_DAYS); days count
+-- from 1970-01-01. Reports approved before this migration are fitted by the
+-- first forecast request.
+
+ALTER TABLE daily_reports
+    ADD COLUMN IF NOT EXISTS maintenance_fitted_at TIMESTAMP WITH TIME ZONE;
+
+-- Approved reports still waiting to be fitted
+CREATE INDEX IF NOT EXISTS idx_daily_reports_maintenance_pending
+    ON daily_reports (id)
+    WHERE status = 'approved' AND maintenance_fitted_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS equipment_usage_fits (
+    equipment_id INTEGER PRIMARY KEY REFERENCES equipment(id) ON DELETE CASCADE,
+    reading_count INTEGER NOT NULL DEFAULT 0,
+    -- Day the weights and day offsets below are relative to: the latest reading
+    anchor_day INTEGER NOT NULL DEFAULT 0,
+    weight_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    weighted_day_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    weighted_hourmeter_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    weighted_day_square_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    weighted_day_hourmeter_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    last_hourmeter DOUBLE PRECISION,
+    -- Latest report that flagged maintenance_needed
+    maintenance_flagged_day INTEGER,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
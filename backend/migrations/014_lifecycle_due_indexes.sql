@@ -0,0 +1,16 @@
+-- Schedule Lifecycle Due Indexes
+-- The lifecycle worker selects due schedules by status and time alone
+-- instead of an updated_at watermark, which missed bookings committed after
+-- a run that started before them. These partial indexes keep that cheap:
+-- only open schedules are indexed. schedule_lifecycle_state.processed_through
+-- now only records the last run.
+
+-- Activation scans scheduled rows by start time
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_scheduled_start
+    ON equipment_schedules (start_datetime)
+    WHERE status = 'scheduled';
+
+-- Completion of open series by the end of their last occurrence
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_open_series_until
+    ON equipment_schedules (recurrence_until)
+    WHERE status IN ('scheduled', 'active') AND recurrence_rule IS NOT NULL;
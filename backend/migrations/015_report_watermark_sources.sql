@@ -0,0 +1,13 @@
+-- Report Watermark Sources
+-- Company names, operator profiles and user names appear in report rows, so
+-- their tables are part of the report data watermark as well; these indexes
+-- keep its MAX(updated_at) lookups to an index probe.
+
+CREATE INDEX IF NOT EXISTS idx_companies_updated_at
+    ON companies (updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_operator_profiles_updated_at
+    ON operator_profiles (updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_users_updated_at
+    ON users (updated_at);
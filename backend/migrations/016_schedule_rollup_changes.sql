@@ -0,0 +1,52 @@
+-- Schedule Rollup Changes
+-- Start times whose rollup day must be recomputed, written for every insert,
+-- update and delete on equipment_schedules. Updates record both the old and
+-- the new start, so a schedule moved to another day or deleted outside the
+-- API still refreshes the day it left. The rollup catch-up consumes the rows
+-- it can see, which replaces its updated_at watermark: a change committed
+-- after a catch-up stays queued for the next one. Start times rather than
+-- days are kept so the day is taken in the refreshing session's time zone,
+-- as the rollup grouping is. There is no unique key: concurrent writers of
+-- the same start time must not wait on each other, and the catch-up
+-- collapses duplicates.
+
+CREATE TABLE IF NOT EXISTS schedule_rollup_changes (
+    start_datetime TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION record_schedule_rollup_changes() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO schedule_rollup_changes (start_datetime)
+        SELECT DISTINCT start_datetime FROM old_rows;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO schedule_rollup_changes (start_datetime)
+        SELECT DISTINCT start_datetime FROM new_rows;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level with transition tables: one insert per statement, not per row
+DROP TRIGGER IF EXISTS schedule_rollup_changes_insert ON equipment_schedules;
+CREATE TRIGGER schedule_rollup_changes_insert
+    AFTER INSERT ON equipment_schedules
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_schedule_rollup_changes();
+
+DROP TRIGGER IF EXISTS schedule_rollup_changes_update ON equipment_schedules;
+CREATE TRIGGER schedule_rollup_changes_update
+    AFTER UPDATE ON equipment_schedules
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_schedule_rollup_changes();
+
+DROP TRIGGER IF EXISTS schedule_rollup_changes_delete ON equipment_schedules;
+CREATE TRIGGER schedule_rollup_changes_delete
+    AFTER DELETE ON equipment_schedules
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_schedule_rollup_changes();
+
+-- Changes made before this migration were tracked by updated_at alone;
+-- rebuild every day on the next catch-up
+UPDATE schedule_rollup_state SET refreshed_through = NULL WHERE id = 1;
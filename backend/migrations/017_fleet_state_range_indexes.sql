@@ -0,0 +1,20 @@
+-- Fleet State Range Indexes
+-- /scheduling/fleet/state finds the schedule covering an instant with
+-- tstzrange(...) @> :at per equipment. A GiST index on (equipment_id, range)
+-- answers that by overlap instead of walking an equipment's whole history
+-- backwards from the instant, as the btree on (equipment_id, start_datetime,
+-- end_datetime) did. btree_gist provides the GiST operator class for the
+-- integer equipment_id. The predicates and range expressions must match the
+-- lookup in SchedulingService.get_fleet_state.
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- One-off schedules: [start_datetime, end_datetime)
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_equipment_span
+    ON equipment_schedules USING gist (equipment_id, tstzrange(start_datetime, end_datetime))
+    WHERE recurrence_rule IS NULL AND status IN ('scheduled', 'active', 'completed');
+
+-- Recurring series: [start_datetime, recurrence_until), unbounded while recurrence_until is NULL
+CREATE INDEX IF NOT EXISTS idx_equipment_schedules_equipment_series_span
+    ON equipment_schedules USING gist (equipment_id, tstzrange(start_datetime, recurrence_until))
+    WHERE recurrence_rule IS NOT NULL AND status IN ('scheduled', 'active', 'completed');
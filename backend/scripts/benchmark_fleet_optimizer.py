@@ -0,0 +1,81 @@
+"""
+Benchmark for the fleet assignment optimizer on synthetic problems.
+
+Generates a fleet with existing bookings and a batch of requests over a
+three-day horizon in 15-minute slots, then reports greedy and local search
+results for each seed.
+
+Usage (from backend/):
+    python -m scripts.benchmark_fleet_optimizer --requests 1000 --units 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.api.v1.scheduling.optimizer import AssignmentProblem, solve_assignment
+
+SLOTS_PER_DAY = 96
+
+
+def synthetic_problem(n_requests: int, n_units: int, n_types: int, horizon_days: int, seed: int) -> AssignmentProblem:
+    """Random fleet with 0-6 existing bookings per unit and requests of 2-24 hours"""
+    rng = np.random.default_rng(seed)
+    horizon = horizon_days * SLOTS_PER_DAY
+
+    unit_types = rng.integers(0, n_types, n_units)
+    unit_busy = []
+    for _ in range(n_units):
+        starts = np.sort(rng.choice(horizon - 96, rng.integers(0, 7), replace=False))
+        busy = []
+        for start in starts.tolist():
+            end = start + int(rng.integers(8, 96))
+            if busy and start < busy[-1][1]:
+                continue
+            busy.append((start, end))
+        unit_busy.append(busy)
+
+    durations = rng.integers(8, 97, n_requests)
+    earliest = rng.integers(0, horizon - SLOTS_PER_DAY, n_requests)
+    window = rng.integers(SLOTS_PER_DAY // 2, 4 * SLOTS_PER_DAY, n_requests)
+    latest = np.minimum(earliest + window, horizon - durations)
+
+    return AssignmentProblem(
+        unit_types=unit_types,
+        unit_busy=unit_busy,
+        request_types=rng.integers(0, n_types, n_requests),
+        durations=durations,
+        earliest=earliest,
+        latest=np.maximum(latest, earliest),
+        priorities=rng.integers(1, 6, n_requests)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--units", type=int, default=500)
+    parser.add_argument("--types", type=int, default=25)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--time-limit", type=float, default=10.0)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests, {args.units} units, {args.types} types, {args.days} days")
+    print(f"{'seed':>4} {'greedy':>10} {'final':>10} {'assigned':>9} {'iters':>7} {'seconds':>8}")
+    for seed in range(args.seeds):
+        problem = synthetic_problem(args.requests, args.units, args.types, args.days, seed)
+        started = time.perf_counter()
+        solution = solve_assignment(problem, seed, args.time_limit, args.iterations)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{seed:>4} {solution.greedy_objective:>10.1f} {solution.objective:>10.1f} "
+            f"{int((solution.units >= 0).sum()):>9} {solution.iterations:>7} {elapsed:>8.2f}"
+            + (" (time limit)" if solution.timed_out else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 try:
-    from app.core.init_db import initialize_database
+    from app.core.init_db import MigrationError, initialize_database
     import uvicorn
     
     def main():
@@ -21,6 +21,9 @@ try:
             print("📚 Initializing database...")
             initialize_database()
             print("✅ Database initialized successfully!")
+        except MigrationError as e:
+            print(f"❌ Database migration failed: {e}")
+            sys.exit(1)
         except Exception as e:
             print(f"❌ Database initialization failed: {e}")
             print("🔄 Continuing anyway (database might already be initialized)")
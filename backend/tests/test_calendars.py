@@ -0,0 +1,100 @@
+"""Tests for working calendar bitsets"""
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from app.api.v1.scheduling.calendars import (
+    SLOTS_PER_DAY,
+    SlotGrid,
+    WorkingCalendar,
+    WorkingCalendarService,
+    bit_runs,
+    common_bits,
+    count_bits,
+    free_bits,
+    occupancy_bits
+)
+
+CHICAGO = ZoneInfo("America/Chicago")
+MONDAY = datetime(2030, 1, 7, tzinfo=CHICAGO)
+WEEKDAY_SHIFTS = [(weekday, "07:00", "15:30") for weekday in range(5)]
+
+
+def _timestamps(*values):
+    return np.array([value.timestamp() for value in values], dtype=float)
+
+
+def test_grid_origin_is_floored_to_the_slot_resolution():
+    grid = SlotGrid(MONDAY + timedelta(minutes=7), MONDAY + timedelta(hours=1, minutes=1))
+
+    assert grid.origin_ts == MONDAY.timestamp()
+    assert grid.n_slots == 5
+    first, last = grid.slot_range(
+        _timestamps(MONDAY + timedelta(minutes=20), MONDAY - timedelta(hours=1)),
+        _timestamps(MONDAY + timedelta(minutes=31), MONDAY + timedelta(days=1))
+    )
+    assert first.tolist() == [1, 0]
+    assert last.tolist() == [3, 5]
+
+
+def test_working_bits_follow_local_shifts_and_skip_holidays():
+    calendar = WorkingCalendar(1, "America/Chicago", WEEKDAY_SHIFTS, ["2030-01-09"])
+    grid = SlotGrid(MONDAY, MONDAY + timedelta(weeks=1))
+
+    first, last = bit_runs(calendar.working_bits(grid), grid.n_slots)
+
+    runs = grid.to_datetimes(first, last)
+    assert [start.date() for start, _ in runs] == [date(2030, 1, day) for day in (7, 8, 10, 11)]
+    assert all((start.hour, start.minute, end.hour, end.minute) == (7, 0, 15, 30) for start, end in runs)
+    assert runs[0][0].tzinfo == CHICAGO
+    assert count_bits(calendar.working_bits(grid), grid.n_slots) == 4 * 34
+
+
+def test_working_bits_line_up_on_grids_in_another_timezone():
+    calendar = WorkingCalendar(1, "America/Chicago", WEEKDAY_SHIFTS, [])
+    utc_start = MONDAY.astimezone(timezone.utc)
+    grid = SlotGrid(utc_start, utc_start + timedelta(days=1))
+
+    first, last = bit_runs(calendar.working_bits(grid), grid.n_slots)
+
+    assert grid.to_datetimes(first, last) == [(
+        datetime(2030, 1, 7, 13, 0, tzinfo=timezone.utc),
+        datetime(2030, 1, 7, 21, 30, tzinfo=timezone.utc)
+    )]
+
+
+def test_free_slots_are_working_slots_no_row_is_busy_in():
+    grid = SlotGrid(MONDAY, MONDAY + timedelta(days=1))
+    working = WorkingCalendar(1, "America/Chicago", WEEKDAY_SHIFTS, []).working_bits(grid)
+    busy = occupancy_bits(
+        grid,
+        rows=np.array([0, 0, 1]),
+        starts_ts=_timestamps(MONDAY + timedelta(hours=6), MONDAY + timedelta(hours=12), MONDAY + timedelta(hours=9)),
+        ends_ts=_timestamps(MONDAY + timedelta(hours=8), MONDAY + timedelta(hours=12, minutes=5), MONDAY + timedelta(hours=10)),
+        n_rows=3
+    )
+
+    assert busy.shape == (3, SLOTS_PER_DAY // 8)
+    assert count_bits(busy, grid.n_slots) == 8 + 1 + 4
+    assert count_bits(busy[2], grid.n_slots) == 0
+
+    first, last = bit_runs(common_bits(free_bits(working, busy)), grid.n_slots)
+    assert [
+        (start.strftime("%H:%M"), end.strftime("%H:%M")) for start, end in grid.to_datetimes(first, last)
+    ] == [("08:00", "09:00"), ("10:00", "12:00"), ("12:15", "15:30")]
+
+
+def test_validated_rejects_unknown_timezones_and_inverted_shifts():
+    values = {"timezone": "America/Chicago", "weekly_hours": [{"weekday": 2, "start": "07:00", "end": "15:00"}],
+              "holidays": ["2030-01-02", date(2030, 1, 1), "2030-01-02"]}
+
+    validated = WorkingCalendarService._validated(values)
+
+    assert validated["weekly_hours"] == '[[2, "07:00", "15:00"]]'
+    assert validated["holidays"] == [date(2030, 1, 1), date(2030, 1, 2)]
+    with pytest.raises(ValueError, match="Unknown timezone"):
+        WorkingCalendarService._validated({**values, "timezone": "Mars/Olympus_Mons"})
+    with pytest.raises(ValueError, match="must end after it starts"):
+        WorkingCalendarService._validated({**values, "weekly_hours": [(2, "15:00", "07:00")]})
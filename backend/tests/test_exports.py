@@ -0,0 +1,80 @@
+"""Tests for the streaming CSV and XLSX encoders"""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from xml.etree import ElementTree
+import csv
+import io
+import zipfile
+
+from app.core import exports
+from app.core.exports import iter_csv, iter_xlsx
+
+_NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def _sheet_rows(workbook: zipfile.ZipFile, index: int):
+    root = ElementTree.fromstring(workbook.read(f"xl/worksheets/sheet{index}.xml"))
+    return [
+        [cell.findtext("m:v", namespaces=_NS) or cell.findtext("m:is/m:t", namespaces=_NS) for cell in row]
+        for row in root.iterfind("m:sheetData/m:row", _NS)
+    ]
+
+
+def _sheet_names(workbook: zipfile.ZipFile):
+    root = ElementTree.fromstring(workbook.read("xl/workbook.xml"))
+    return [sheet.get("name") for sheet in root.iterfind("m:sheets/m:sheet", _NS)]
+
+
+def test_csv_yields_one_chunk_per_batch():
+    batches = [[["EX-01", date(2024, 3, 1), 8.5]], [["EX-02, \"B\"", datetime(2024, 3, 1, 7, 30), None]]]
+
+    chunks = list(iter_csv(["Equipment", "Day", "Hours"], batches))
+
+    assert len(chunks) == 2
+    assert list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8")))) == [
+        ["Equipment", "Day", "Hours"],
+        ["EX-01", "2024-03-01", "8.5"],
+        ["EX-02, \"B\"", "2024-03-01T07:30:00", ""]
+    ]
+
+
+def test_xlsx_is_a_readable_workbook_with_typed_cells():
+    rows = [
+        ["EX-01 <main>", 8, Decimal("2.50"), True, None],
+        ["bad\x01char", date(2024, 3, 1), datetime(2024, 3, 1, 7, 30, tzinfo=timezone(timedelta(hours=-5))), False, 1.5]
+    ]
+
+    data = b"".join(iter_xlsx(["Name", "Count", "Cost", "Active", "Other"], [rows], "Fleet"))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as workbook:
+        assert workbook.testzip() is None
+        assert {"[Content_Types].xml", "_rels/.rels", "xl/workbook.xml", "xl/styles.xml"} <= set(workbook.namelist())
+        assert _sheet_names(workbook) == ["Fleet"]
+        assert _sheet_rows(workbook, 1) == [
+            ["Name", "Count", "Cost", "Active", "Other"],
+            ["EX-01 <main>", "8", "2.50", "1", None],
+            ["badchar", str((date(2024, 3, 1) - date(1899, 12, 30)).days), "45352.52083333", "0", "1.5"]
+        ]
+
+
+def test_xlsx_continues_on_numbered_sheets(monkeypatch):
+    monkeypatch.setattr(exports, "XLSX_MAX_ROWS_PER_SHEET", 3)
+    monkeypatch.setattr(exports, "_XLSX_FLUSH_ROWS", 2)
+    batches = [[[n] for n in range(4)], [[n] for n in range(4, 7)]]
+
+    chunks = list(iter_xlsx(["N"], batches, "Rows"))
+
+    assert len(chunks) > 1
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as workbook:
+        assert _sheet_names(workbook) == ["Rows", "Rows 2", "Rows 3"]
+        assert [_sheet_rows(workbook, index) for index in (1, 2, 3)] == [
+            [["N"], ["0"], ["1"], ["2"]],
+            [["N"], ["3"], ["4"], ["5"]],
+            [["N"], ["6"]]
+        ]
+
+
+def test_xlsx_without_rows_has_a_header_only_sheet():
+    with zipfile.ZipFile(io.BytesIO(b"".join(iter_xlsx(["A", "B"], [])))) as workbook:
+        assert _sheet_names(workbook) == ["Export"]
+        assert _sheet_rows(workbook, 1) == [["A", "B"]]
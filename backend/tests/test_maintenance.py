@@ -0,0 +1,102 @@
+"""Tests for the incremental maintenance usage fits"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.api.v1.reports.maintenance import MaintenanceForecastService
+from app.core.config import settings
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+class _FitTable:
+    """Stands in for the session, keeping equipment_usage_fits rows in memory"""
+
+    def __init__(self):
+        self.fits = {}
+
+    def execute(self, statement, params):
+        sql = str(statement)
+        if "INSERT INTO equipment_usage_fits" in sql:
+            for equipment_id in params["ids"]:
+                self.fits.setdefault(equipment_id, SimpleNamespace(
+                    equipment_id=equipment_id, reading_count=0, anchor_day=0,
+                    weight_sum=0.0, weighted_day_sum=0.0, weighted_hourmeter_sum=0.0,
+                    weighted_day_square_sum=0.0, weighted_day_hourmeter_sum=0.0,
+                    last_hourmeter=None, maintenance_flagged_day=None
+                ))
+        elif "FROM equipment_usage_fits" in sql:
+            return _Rows([self.fits[equipment_id] for equipment_id in sorted(params["ids"])])
+        elif "UPDATE equipment_usage_fits" in sql:
+            for index, equipment_id in enumerate(params["equipment_id"]):
+                for name, values in params.items():
+                    setattr(self.fits[equipment_id], name, values[index])
+        return _Rows([])
+
+
+def _readings(equipment_id, days, hourmeters, flagged=()):
+    return [
+        SimpleNamespace(equipment_id=equipment_id, day=day, hourmeter=hourmeter,
+                        maintenance_needed=day in flagged)
+        for day, hourmeter in zip(days, hourmeters)
+    ]
+
+
+def _line(fit):
+    """Slope and intercept (at anchor_day) of the stored weighted sums"""
+    sw, swx, swy = fit.weight_sum, fit.weighted_day_sum, fit.weighted_hourmeter_sum
+    slope = (sw * fit.weighted_day_hourmeter_sum - swx * swy) / (sw * fit.weighted_day_square_sum - swx ** 2)
+    return slope, (swy - slope * swx) / sw
+
+
+def _direct_fit(days, hourmeters):
+    """Exponentially weighted least squares over all readings at once"""
+    days = np.asarray(days, dtype=float)
+    weights = np.exp2((days - days.max()) / settings.REPORTS_MAINTENANCE_HALF_LIFE_DAYS)
+    # polyfit weights multiply the residuals, so they are the square roots of the loss weights
+    return np.polyfit(days - days.max(), hourmeters, 1, w=np.sqrt(weights))
+
+
+def test_folding_in_batches_matches_a_direct_weighted_fit():
+    rng = np.random.default_rng(11)
+    days = np.sort(rng.choice(np.arange(19000, 19200), 60, replace=False))
+    hourmeters = 1500 + 6.5 * (days - days[0]) + rng.normal(0, 4, len(days)) + 0.01 * (days - days[0]) ** 2
+    other_days = days[::3]
+    other_hourmeters = 40 + 2.0 * (other_days - other_days[0])
+    table = _FitTable()
+    service = MaintenanceForecastService(table)
+
+    # Out of order across batches, with a second unit interleaved
+    order = rng.permutation(len(days))
+    for batch in np.array_split(order, 4):
+        other = np.isin(other_days, days[batch])
+        service._fold(
+            _readings(1, days[batch], hourmeters[batch])
+            + _readings(2, other_days[other], other_hourmeters[other])
+        )
+
+    fit = table.fits[1]
+    assert fit.reading_count == len(days)
+    assert fit.anchor_day == days.max()
+    assert fit.last_hourmeter == hourmeters.max()
+    assert _line(fit) == pytest.approx(tuple(_direct_fit(days, hourmeters)), rel=1e-9)
+    assert _line(table.fits[2]) == pytest.approx(tuple(_direct_fit(other_days, other_hourmeters)), rel=1e-9)
+
+
+def test_fold_keeps_the_latest_maintenance_flag():
+    table = _FitTable()
+    service = MaintenanceForecastService(table)
+
+    service._fold(_readings(1, [19000, 19010], [100.0, 180.0], flagged=[19010]))
+    service._fold(_readings(1, [19005], [140.0], flagged=[19005]))
+
+    assert table.fits[1].maintenance_flagged_day == 19010
+    assert table.fits[1].reading_count == 3
+    assert table.fits[1].anchor_day == 19010
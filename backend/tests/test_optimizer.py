@@ -0,0 +1,114 @@
+"""Tests for the fleet assignment optimizer"""
+import numpy as np
+
+from app.api.v1.scheduling.optimizer import (
+    LATENESS_PENALTY,
+    AssignmentProblem,
+    AssignmentSolution,
+    _Timeline,
+    best_solution,
+    solve_assignment
+)
+
+
+def _problem(seed: int = 7, n_units: int = 4, n_requests: int = 40) -> AssignmentProblem:
+    rng = np.random.default_rng(seed)
+    unit_busy = [[(10, 20), (50, 60)] if unit % 2 else [] for unit in range(n_units)]
+    earliest = rng.integers(0, 80, n_requests)
+    return AssignmentProblem(
+        unit_types=np.arange(n_units) % 2,
+        unit_busy=unit_busy,
+        request_types=rng.integers(0, 2, n_requests),
+        durations=rng.integers(4, 16, n_requests),
+        earliest=earliest,
+        latest=earliest + rng.integers(0, 40, n_requests),
+        priorities=rng.integers(1, 6, n_requests)
+    )
+
+
+def _assert_feasible(problem: AssignmentProblem, solution: AssignmentSolution) -> None:
+    bookings = {unit: list(busy) for unit, busy in enumerate(problem.unit_busy)}
+    for request, unit in enumerate(solution.units.tolist()):
+        if unit < 0:
+            continue
+        start = int(solution.starts[request])
+        assert problem.unit_types[unit] == problem.request_types[request]
+        assert problem.earliest[request] <= start <= problem.latest[request]
+        bookings[unit].append((start, start + int(problem.durations[request])))
+    for intervals in bookings.values():
+        intervals.sort()
+        assert all(end <= next_start for (_, end), (next_start, _) in zip(intervals, intervals[1:]))
+
+
+def test_timeline_fits_requests_into_gaps():
+    timeline = _Timeline([(10, 20), (30, 40)])
+
+    assert timeline.earliest_fit(0, 100, 10) == (0, 0)
+    assert timeline.earliest_fit(5, 100, 10) == (20, 0)
+    assert timeline.earliest_fit(5, 100, 11) == (40, 0)
+    assert timeline.earliest_fit(5, 35, 11) is None
+
+    timeline.add(20, 30, owner=3)
+    assert timeline.owners_between(0, 100) == [3]
+    timeline.remove(20, owner=3)
+    assert timeline.owners_between(0, 100) == []
+
+
+def test_solution_is_feasible_and_no_worse_than_greedy():
+    problem = _problem()
+
+    solution = solve_assignment(problem, seed=1, time_limit_seconds=10, max_iterations=500)
+
+    _assert_feasible(problem, solution)
+    assert solution.objective >= solution.greedy_objective - 1e-9
+    assert not solution.timed_out
+    assert (solution.units >= 0).any() and (solution.units < 0).any()
+
+
+def test_objective_is_the_lateness_discounted_weight_of_assigned_requests():
+    problem = _problem()
+
+    solution = solve_assignment(problem, seed=3, time_limit_seconds=10, max_iterations=200)
+
+    assigned = solution.units >= 0
+    window = np.maximum(problem.latest - problem.earliest, 1)
+    lateness = (solution.starts - problem.earliest) / window
+    expected = (problem.weights * (1 - LATENESS_PENALTY * lateness))[assigned].sum()
+    assert np.isclose(solution.objective, expected)
+
+
+def test_search_is_repeatable_for_a_seed():
+    problem = _problem()
+
+    first = solve_assignment(problem, seed=5, time_limit_seconds=10, max_iterations=300)
+    second = solve_assignment(problem, seed=5, time_limit_seconds=10, max_iterations=300)
+
+    assert np.array_equal(first.units, second.units)
+    assert np.array_equal(first.starts, second.starts)
+    assert first.objective == second.objective
+
+
+def test_urgent_request_wins_a_contested_slot():
+    problem = AssignmentProblem(
+        unit_types=np.array([0]),
+        unit_busy=[[]],
+        request_types=np.array([0, 0]),
+        durations=np.array([10, 10]),
+        earliest=np.array([0, 0]),
+        latest=np.array([5, 5]),
+        priorities=np.array([1, 5])
+    )
+
+    solution = solve_assignment(problem, seed=0, time_limit_seconds=10, max_iterations=50)
+
+    assert solution.units.tolist() == [-1, 0]
+    assert solution.starts[1] == 0
+
+
+def test_best_solution_prefers_the_earliest_worker_on_ties():
+    def solution(objective):
+        return AssignmentSolution(np.array([0]), np.array([0]), objective, objective, 0, False)
+
+    candidates = [solution(1.0), solution(2.0), solution(2.0)]
+
+    assert best_solution(candidates) is candidates[1]
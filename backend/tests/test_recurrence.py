@@ -0,0 +1,99 @@
+"""Tests for recurring schedule rules and their expansion"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.v1.scheduling.recurrence import expand_occurrences, format_rrule, parse_rrule, series_end
+from app.api.v1.scheduling.schemas import ScheduleCreate
+
+EST = timezone(timedelta(hours=-5))
+FIRST_START = datetime(2030, 1, 7, 8, 0, tzinfo=EST)  # A Monday
+
+
+def _schedule(**recurrence):
+    return ScheduleCreate(
+        equipment_id=1,
+        start_datetime=FIRST_START,
+        end_datetime=FIRST_START + timedelta(hours=8),
+        recurrence=recurrence
+    )
+
+
+def test_until_with_another_offset_is_normalized_and_stored_in_utc():
+    rule = _schedule(frequency="DAILY", until="2030-01-10T15:00:00+02:00").recurrence
+
+    assert rule.until == datetime(2030, 1, 10, 8, 0, tzinfo=EST)
+    assert rule.until.utcoffset() == timedelta(hours=-5)
+    assert format_rrule(rule, FIRST_START).endswith("UNTIL=20300110T130000Z")
+
+
+def test_utc_until_survives_a_session_in_another_timezone():
+    rule = _schedule(frequency="DAILY", until="2030-01-10T08:00:00-05:00").recurrence
+    stored_start = FIRST_START.astimezone(timezone.utc)
+
+    parsed = parse_rrule(format_rrule(rule, FIRST_START), stored_start)
+
+    assert parsed.until == rule.until
+    assert parsed.until.tzinfo == timezone.utc
+
+
+def test_wall_clock_until_takes_the_first_start_timezone():
+    parsed = parse_rrule("FREQ=DAILY;INTERVAL=1;UNTIL=20300110T080000", FIRST_START)
+
+    assert parsed.until == datetime(2030, 1, 10, 8, 0, tzinfo=EST)
+
+
+def test_naive_until_and_exceptions_with_aware_start_are_accepted():
+    rule = _schedule(
+        frequency="DAILY",
+        until="2030-01-10T08:00:00",
+        exceptions=["2030-01-08T08:00:00"]
+    ).recurrence
+
+    assert rule.until.tzinfo is not None
+    starts = [start for start, _ in expand_occurrences(
+        rule, FIRST_START, FIRST_START + timedelta(hours=8), FIRST_START, FIRST_START + timedelta(days=30)
+    )]
+    assert [start.day for start in starts] == [7, 9, 10]
+
+
+def test_until_before_first_start_is_a_validation_error():
+    with pytest.raises(ValidationError):
+        _schedule(frequency="DAILY", until="2029-12-31T00:00:00")
+
+
+def test_weekly_count_expansion_jumps_into_the_series():
+    rule = _schedule(frequency="WEEKLY", interval=2, by_weekday=[0, 3], count=40).recurrence
+    first_end = FIRST_START + timedelta(hours=8)
+
+    every = list(expand_occurrences(rule, FIRST_START, first_end, FIRST_START, FIRST_START + timedelta(days=400)))
+    window_start = FIRST_START + timedelta(days=100)
+    window_end = window_start + timedelta(days=30)
+    windowed = list(expand_occurrences(rule, FIRST_START, first_end, window_start, window_end))
+
+    assert len(every) == 40
+    assert [start.weekday() for start, _ in every[:4]] == [0, 3, 0, 3]
+    assert every[2][0] - every[0][0] == timedelta(weeks=2)
+    assert windowed == [(start, end) for start, end in every if end > window_start and start < window_end]
+
+
+def test_series_end_is_the_end_of_the_last_occurrence():
+    first_end = FIRST_START + timedelta(hours=8)
+    by_count = _schedule(frequency="WEEKLY", by_weekday=[0, 3], count=5).recurrence
+    by_until = _schedule(frequency="DAILY", until="2030-01-20T07:00:00-05:00").recurrence
+    open_ended = _schedule(frequency="DAILY").recurrence
+
+    assert series_end(by_count, FIRST_START, first_end) == datetime(2030, 1, 21, 16, 0, tzinfo=EST)
+    assert series_end(by_until, FIRST_START, first_end) == datetime(2030, 1, 19, 16, 0, tzinfo=EST)
+    assert series_end(open_ended, FIRST_START, first_end) is None
+
+
+def test_count_and_weekdays_round_trip_through_rrule():
+    rule = _schedule(frequency="WEEKLY", interval=2, by_weekday=[0, 3], count=10).recurrence
+
+    parsed = parse_rrule(format_rrule(rule, FIRST_START), FIRST_START)
+
+    assert (parsed.frequency, parsed.interval, parsed.by_weekday, parsed.count, parsed.until) == (
+        rule.frequency, 2, [0, 3], 10, None
+    )
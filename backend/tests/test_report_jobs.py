@@ -0,0 +1,85 @@
+"""Tests for report job request normalization and rendering"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api.v1.reports import jobs
+from app.api.v1.reports.builders import ReportTable
+from app.api.v1.reports.schemas import ReportRequest
+
+
+class _Session:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def built_requests(monkeypatch):
+    """Replace the builders and sessions so render_report runs without a database"""
+    requests = []
+
+    def build(db, request):
+        requests.append(request)
+        return ReportTable(
+            title="Equipment Utilization",
+            period="",
+            columns=["Equipment", "Hours"],
+            rows=[["EX-01", 8.0], ["EX-02", 6.5]]
+        )
+
+    monkeypatch.setattr(jobs, "SessionLocal", _Session)
+    monkeypatch.setattr(jobs, "REPORT_BUILDERS", {"equipment_utilization": build})
+    return requests
+
+
+def test_canonical_request_normalizes_equivalent_requests():
+    first = ReportRequest(
+        report_type=" Equipment_Utilization ",
+        format="csv",
+        date_from=datetime(2024, 3, 1, 23, 30, tzinfo=timezone(timedelta(hours=-5))),
+        date_to=datetime(2024, 3, 31, 12, 0)
+    )
+    second = ReportRequest(
+        report_type="equipment_utilization",
+        format="CSV",
+        date_from=datetime(2024, 3, 2, 4, 30, tzinfo=timezone.utc),
+        date_to=datetime(2024, 3, 31, 18, 0, tzinfo=timezone.utc)
+    )
+
+    canonical = jobs.canonical_request(first)
+
+    assert canonical == jobs.canonical_request(second)
+    assert jobs.request_key(canonical) == jobs.request_key(jobs.canonical_request(second))
+    assert canonical["date_from"] == "2024-03-02T00:00:00+00:00"
+    assert canonical["date_to"] == "2024-03-31T00:00:00+00:00"
+
+
+def test_canonical_request_defaults_date_to_today():
+    canonical = jobs.canonical_request(ReportRequest(report_type="equipment_utilization", format="csv"))
+
+    today = datetime.now(timezone.utc).date()
+    assert canonical["date_from"] is None
+    assert datetime.fromisoformat(canonical["date_to"]) == datetime(
+        today.year, today.month, today.day, tzinfo=timezone.utc
+    )
+
+
+def test_render_report_round_trips_canonical_request(tmp_path, built_requests):
+    canonical = jobs.canonical_request(ReportRequest(
+        report_type="equipment_utilization",
+        format="csv",
+        date_from=datetime(2024, 3, 1, 15, 0, tzinfo=timezone.utc)
+    ))
+    path = tmp_path / "report.csv"
+    progress = []
+
+    row_count = jobs.render_report(canonical, str(path), lambda percent, message: progress.append(percent))
+
+    assert row_count == 2
+    request = built_requests[0]
+    assert request.date_from == datetime(2024, 3, 1, tzinfo=timezone.utc)
+    assert request.date_to.date() == datetime.now(timezone.utc).date()
+    content = path.read_text()
+    assert "EX-01" in content and "EX-02" in content
+    assert progress[0] == 40
+    assert not list(tmp_path.glob("*.part"))